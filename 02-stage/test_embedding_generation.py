@@ -7,7 +7,7 @@ sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
 from embedding_generator import EmbeddingGenerator
 
 # Initialize the generator
-generator = EmbeddingGenerator()
+generator = EmbeddingGenerator(modalities=["vision"])
 
 # Generate embedding for the image
 image_embedding = generator.generate_embedding(["data/images/crime_scene1.jpg"], "vision")
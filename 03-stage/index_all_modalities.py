@@ -3,7 +3,10 @@ import os
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
 
 from embedding_generator import EmbeddingGenerator
-from elastic_manager import ElasticsearchManager
+from embedding_cache import EmbeddingCache
+from ingestion_pipeline import IngestionPipeline
+from index_manifest import IndexManifest
+from vector_store import create_vector_backend
 import json
 import logging
 from dotenv import load_dotenv
@@ -15,37 +18,12 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-def process_evidence(generator, es_manager, file_path, modality, description, metadata):
-    """Helper function to process each piece of evidence"""
-    try:
-        if not os.path.exists(file_path):
-            logger.error(f"File not found: {file_path}")
-            return
-
-        embedding = generator.generate_embedding([file_path], modality)
-        response = es_manager.index_content(
-            embedding=embedding,
-            modality=modality,
-            description=description,
-            content_path=file_path,
-            metadata=metadata
-        )
-        
-        # Convert Elasticsearch response to dict for JSON serialization
-        response_dict = {
-            "result": response["result"],
-            "_id": response["_id"],
-            "_index": response["_index"]
-        }
-        logger.info(f"\n\nIndexed {modality}: {json.dumps(response_dict, indent=2)}")
-        
-    except Exception as e:
-        logger.error(f"Error processing {modality}: {str(e)}")
-
 def main():
     # Initialize components
-    generator = EmbeddingGenerator()
-    es_manager = ElasticsearchManager()
+    generator = EmbeddingGenerator(
+        cache=EmbeddingCache(), modalities=["vision", "audio", "text", "depth"], fast_vision=True
+    )
+    es_manager = create_vector_backend()  # VECTOR_BACKEND=elasticsearch (default) or numpy
 
     # Create data directories if they don't exist
     for dir_name in ["images", "audios", "texts", "depths"]:
@@ -97,16 +75,30 @@ def main():
         }
     ]
 
-    # Process each piece of evidence
+    # Skip evidence whose file is missing
+    items = []
     for evidence in evidence_list:
-        process_evidence(
-            generator,
-            es_manager,
-            evidence["file_path"],
-            evidence["modality"],
-            evidence["description"],
-            evidence["metadata"]
-        )
+        if not os.path.exists(evidence["file_path"]):
+            logger.error(f"File not found: {evidence['file_path']}")
+            continue
+        # Text is embedded from the note's contents; the other modalities are decoded from their files
+        if evidence["modality"] == "text":
+            with open(evidence["file_path"], "r", encoding="utf-8") as f:
+                content = f.read()
+        else:
+            content = evidence["file_path"]
+        items.append({
+            "input": content,
+            "modality": evidence["modality"],
+            "description": evidence["description"],
+            "metadata": evidence["metadata"],
+            "content_path": evidence["file_path"]
+        })
+
+    # Embed only new or changed evidence, stream it into the vector backend and drop vanished evidence
+    manifest = IndexManifest(es_manager.index_name)
+    summary = IngestionPipeline(generator, es_manager).run_incremental(items, manifest)
+    logger.info(f"\n\nIndexed evidence: {json.dumps(summary, indent=2, default=str)}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
+
+from embedding_generator import EmbeddingGenerator
+from audio_segments import AudioSegmentEmbedder
+from vector_store import create_vector_backend
+import json
+import logging
+from dotenv import load_dotenv
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    # Usage: python 03-stage/index_long_audio.py <recording.wav> [description]
+    audio_path = sys.argv[1] if len(sys.argv) > 1 else "data/audios/joker_laugh.wav"
+    description = sys.argv[2] if len(sys.argv) > 2 else f"Recording {os.path.basename(audio_path)}"
+
+    # Initialize components
+    generator = EmbeddingGenerator(modalities=["audio"])
+    es_manager = create_vector_backend()  # VECTOR_BACKEND=elasticsearch (default) or numpy
+
+    # Read the recording window by window, skip silence and index each segment as its own document
+    summary = AudioSegmentEmbedder(generator).index_recording(
+        audio_path,
+        es_manager,
+        description=description,
+        metadata={"source": "recording"}
+    )
+    logger.info(f"\n\nIndexed segments: {json.dumps(summary, indent=2, default=str)}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
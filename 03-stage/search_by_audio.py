@@ -3,7 +3,8 @@ import os
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
 
 from embedding_generator import EmbeddingGenerator
-from elastic_manager import ElasticsearchManager
+from query_cache import QueryEmbeddingCache
+from vector_store import create_vector_backend
 import json
 import logging
 from dotenv import load_dotenv
@@ -16,8 +17,8 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 # Initialize classes
-generator = EmbeddingGenerator()
-es_manager = ElasticsearchManager()
+generator = EmbeddingGenerator(cache=QueryEmbeddingCache.with_spill(), modalities=["audio"])
+es_manager = create_vector_backend()  # VECTOR_BACKEND=elasticsearch (default) or numpy
 
 # Generate embedding for a suspicious audio
 audio_embedding = generator.generate_embedding(["data/audios/joker_laugh.wav"], "audio")
@@ -38,4 +39,6 @@ for i, evidence in enumerate(similar_evidences, start=1):
     
     print(f"{i}. {description} ({modality})")
     print(f"   Similarity: {score:.4f}")
-    print(f"   File path: {content_path}\n")
\ No newline at end of file
+    print(f"   File path: {content_path}\n")
+
+logger.info(f"Query embedding cache: {generator.cache.stats()}")
\ No newline at end of file
@@ -3,10 +3,14 @@ import os
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
 
 from embedding_generator import EmbeddingGenerator
-from elastic_manager import ElasticsearchManager
+from query_cache import QueryEmbeddingCache
+from async_elastic_manager import AsyncElasticsearchManager
 from llm_analyzer import LLMAnalyzer
+from llm_cache import LLMResponseCache
+from request_scheduler import RequestScheduler
 
 import json
+import asyncio
 import logging
 from dotenv import load_dotenv
 
@@ -18,15 +22,42 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 # Initialize classes
-generator = EmbeddingGenerator()
-es_manager = ElasticsearchManager()
+generator = EmbeddingGenerator(cache=QueryEmbeddingCache.with_spill(), modalities=["vision", "audio", "text", "depth"])
 
-llm = LLMAnalyzer()
+# Reruns with the same evidence reuse the stored report; the scheduler paces and retries the API calls
+llm = LLMAnalyzer(cache=LLMResponseCache(), scheduler=RequestScheduler())
 logger.info("✅ All components initialized successfully")
-    
-try:
+
+async def collect_evidence(test_files, k=2):
+    """Embeds each query and fires its search without waiting for the previous ones to return"""
     evidence_data = {}
     
+    async with AsyncElasticsearchManager() as es_manager:
+        searches = {}
+        for modality, test_input in test_files.items():
+            try:
+                # Embed in a worker thread so the event loop keeps the earlier searches moving
+                embedding = await asyncio.to_thread(generator.generate_embedding, [str(test_input)], modality)
+                if modality == 'text':
+                    # Text queries also match the descriptions by keyword, fused with kNN server-side
+                    search = es_manager.search_hybrid(test_input, embedding, k=k)
+                else:
+                    search = es_manager.search_similar(embedding, k=k)
+                searches[modality] = asyncio.create_task(search)
+            except Exception as e:
+                logger.error(f"❌ Error retrieving {modality} data: {str(e)}")
+        
+        for modality, search in searches.items():
+            results = await search
+            if results:
+                evidence_data[modality] = results
+                logger.info(f"✅ Data retrieved for {modality}: {len(results)} results")
+            else:
+                logger.warning(f"⚠️ No results found for {modality}")
+    
+    return evidence_data
+    
+try:
     # Get data for each modality
     test_files = {
         'vision': 'data/images/crime_scene2.jpg',
@@ -36,58 +67,46 @@ try:
     }
     
     logger.info("🔍 Collecting evidence...")
-    for modality, test_input in test_files.items():
-        try:
-            if modality == 'text':
-                embedding = generator.generate_embedding([test_input], modality)
-            else:
-                embedding = generator.generate_embedding([str(test_input)], modality)
-            
-            results = es_manager.search_similar(embedding, k=2)
-            if results:
-                evidence_data[modality] = results
-                logger.info(f"✅ Data retrieved for {modality}: {len(results)} results")
-            else:
-                logger.warning(f"⚠️ No results found for {modality}")
-                
-        except Exception as e:
-            logger.error(f"❌ Error retrieving {modality} data: {str(e)}")
+    evidence_data = asyncio.run(collect_evidence(test_files))
+    logger.info(f"Query embedding cache: {generator.cache.stats()}")
     
     if not evidence_data:
         raise ValueError("No evidence data found in Elasticsearch!")
     
     # Test forensic report generation
     logger.info("\n📝 Generating forensic report...")
-    report = llm.analyze_evidence(evidence_data)
+    stream = llm.analyze_evidence(evidence_data, stream=True)
+    if stream is None:
+        raise ValueError("Failed to start forensic report generation")
+    
+    # Print the report as it is generated instead of waiting for the whole completion
+    for delta in stream:
+        print(delta, end="", flush=True)
+    print()
+    report = stream.report
     
     if report:
-        logger.info("✅ Forensic report generated successfully")
+        logger.info(f"✅ Forensic report generated successfully "
+                    f"(first token {stream.metrics.get('time_to_first_token', 0):.2f}s, total {stream.metrics['total_time']:.2f}s)")
         logger.info("\n📊 Report Preview:")
         logger.info("+" * 50)
         logger.info(report)
         logger.info("+" * 50)
     else:
         raise ValueError("Failed to generate forensic report")
+    
+    # Cross-modal analysis of every modality pair, run concurrently
+    logger.info("\n🔄 Running cross-modal analysis...")
+    cross_modal = llm.analyze_all_cross_modal_connections(evidence_data, max_concurrency=3)
+    
+    for (modality_a, modality_b), analysis in cross_modal.items():
+        if analysis:
+            logger.info(f"\n🔍 Cross-modal Analysis Preview ({modality_a} x {modality_b}):")
+            logger.info("=" * 50)
+            logger.info(analysis[:500] + "..." if len(analysis) > 500 else analysis)
+            logger.info("=" * 50)
+        else:
+            logger.warning(f"⚠️ Cross-modal analysis failed for {modality_a} x {modality_b}")
         
 except Exception as e:
     logger.error(f"❌ Error in analysis : {str(e)}")
-
-
-    # # Test cross-modal analysis
-    # if 'audio' in evidence_data and 'vision' in evidence_data:
-    #     logger.info("\n🔄 Testing cross-modal analysis...")
-    #     cross_modal = llm.analyze_cross_modal_connections(
-    #         evidence_data['audio'],
-    #         'audio',
-    #         evidence_data['vision'],
-    #         'vision'
-    #     )
-        
-    #     if cross_modal:
-    #         logger.info("✅ Cross-modal analysis generated successfully")
-    #         logger.info("\n🔍 Cross-modal Analysis Preview:")
-    #         logger.info("=" * 50)
-    #         logger.info(cross_modal[:500] + "..." if len(cross_modal) > 500 else cross_modal)
-    #         logger.info("=" * 50)
-    #     else:
-    #         raise ValueError("Failed to generate cross-modal analysis")
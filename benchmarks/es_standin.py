@@ -0,0 +1,261 @@
+import re
+import json
+import uuid
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+_TOKENS = re.compile(r"\w+")
+
+
+class StandinIndex:
+    """In-memory documents of one index with brute-force cosine kNN and a term-overlap text score"""
+
+    def __init__(self):
+        self.docs = {}
+        self._matrix = None
+        self._ids = None
+
+    def put(self, doc_id, source):
+        self.docs[doc_id] = source
+        self._matrix = None
+
+    def delete(self, doc_id):
+        self._matrix = None
+        return self.docs.pop(doc_id, None) is not None
+
+    def _vectors(self):
+        if self._matrix is None:
+            self._ids = list(self.docs)
+            vectors = np.array([self.docs[i]["embedding"] for i in self._ids], dtype=np.float32).reshape(-1, 1024)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            self._matrix = vectors / np.maximum(norms, 1e-12)
+        return self._ids, self._matrix
+
+    def _allowed(self, filters):
+        """Returns the doc ids passing term filters"""
+        terms = [f["term"] for f in filters or [] if "term" in f]
+        return {
+            doc_id for doc_id, source in self.docs.items()
+            if all(source.get(field) == value for term in terms for field, value in term.items())
+        }
+
+    def knn(self, knn):
+        """Returns [(doc_id, score)] best first, scored like Elasticsearch cosine: (1 + cos) / 2"""
+        ids, matrix = self._vectors()
+        if not ids:
+            return []
+        query = np.asarray(knn["query_vector"], dtype=np.float32)
+        scores = (1 + matrix @ (query / max(np.linalg.norm(query), 1e-12))) / 2
+        allowed = self._allowed(knn.get("filter"))
+        order = np.argsort(-scores)
+        hits = [(ids[i], float(scores[i]) * knn.get("boost", 1.0)) for i in order if ids[i] in allowed]
+        return hits[:knn.get("k", 10)]
+
+    def match(self, query):
+        """Scores a bool/match query on description by the number of query terms a document contains"""
+        clauses = query.get("bool", {"must": [query]})
+        allowed = self._allowed(clauses.get("filter"))
+        hits = []
+        for clause in clauses.get("must", []):
+            for field, spec in clause.get("match", {}).items():
+                terms = set(_TOKENS.findall(str(spec.get("query", "")).lower()))
+                for doc_id in allowed:
+                    found = terms & set(_TOKENS.findall(str(self.docs[doc_id].get(field, "")).lower()))
+                    if found:
+                        hits.append((doc_id, len(found) * spec.get("boost", 1.0)))
+        return sorted(hits, key=lambda hit: -hit[1])
+
+    def search(self, body):
+        """Runs a search body as built by elastic_manager and returns the ranked (doc_id, score, rank) list"""
+        size = body.get("size", 10)
+        query = body.get("query") or {}
+        if "knn" in query:
+            return [(doc_id, score, None) for doc_id, score in self.knn(query["knn"])[:size]]
+
+        knn_hits = self.knn(body["knn"]) if "knn" in body else []
+        text_hits = self.match(query) if query else []
+        if "rank" in body:
+            constant = body["rank"]["rrf"].get("rank_constant", 60)
+            fused = {}
+            for hits in (knn_hits, text_hits):
+                for rank, (doc_id, _) in enumerate(hits, 1):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (constant + rank)
+            ranked = sorted(fused.items(), key=lambda hit: -hit[1])[:size]
+            return [(doc_id, None, rank) for rank, (doc_id, _) in enumerate(ranked, 1)]
+
+        summed = {}
+        for doc_id, score in knn_hits + text_hits:
+            summed[doc_id] = summed.get(doc_id, 0.0) + score
+        ranked = sorted(summed.items(), key=lambda hit: -hit[1])[:size]
+        return [(doc_id, score, None) for doc_id, score in ranked]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle's algorithm each reply would stall ~40 ms
+    disable_nagle_algorithm = True
+
+    def _reply(self, status, payload=None):
+        data = json.dumps(payload if payload is not None else {}).encode("utf-8")
+        self.send_response(status)
+        # The client refuses servers that do not identify as Elasticsearch
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(0 if self.command == "HEAD" else len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode("utf-8") if length else ""
+
+    def _source(self, source, fields):
+        return {key: value for key, value in source.items() if fields is None or key in fields}
+
+    def _hits(self, index, ranked, fields):
+        hits = []
+        for doc_id, score, rank in ranked:
+            hit = {"_index": self.server.index_name, "_id": doc_id, "_score": score,
+                   "_source": self._source(index.docs[doc_id], fields)}
+            if rank is not None:
+                hit["_rank"] = rank
+            hits.append(hit)
+        return {"took": 0, "timed_out": False, "hits": {"total": {"value": len(hits), "relation": "eq"}, "hits": hits}}
+
+    def do_HEAD(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if not parts:
+            return self._reply(200)
+        return self._reply(200 if parts[0] in self.server.indices else 404)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if not parts:
+            return self._reply(200, {"version": {"number": "8.11.0"}, "tagline": "You Know, for Search"})
+        if len(parts) == 3 and parts[1] == "_doc":
+            return self._get_doc(parts[0], parts[2], parse_qs(url.query))
+        return self._reply(404, {"error": "not supported by the stand-in"})
+
+    def _get_doc(self, index_name, doc_id, params):
+        # /{index}/_doc/{id}, honouring _source_includes
+        index = self.server.indices.get(index_name)
+        if index is None or doc_id not in index.docs:
+            return self._reply(404, {"_index": index_name, "_id": doc_id, "found": False})
+        includes = params.get("_source_includes")
+        fields = ",".join(includes).split(",") if includes else None
+        return self._reply(200, {"_index": index_name, "_id": doc_id, "found": True,
+                                 "_source": self._source(index.docs[doc_id], fields)})
+
+    def do_PUT(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if len(parts) == 1 and not parts[0].startswith("_"):
+            self._body()
+            self.server.indices.setdefault(parts[0], StandinIndex())
+            return self._reply(200, {"acknowledged": True, "index": parts[0]})
+        return self.do_POST()
+
+    def do_POST(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        body = self._body()
+        if parts[-1] == "_bulk":
+            return self._bulk(body)
+        if parts[-1] == "_msearch":
+            return self._msearch(body)
+        if parts[-1] == "_search":
+            index = self.server.indices.setdefault(parts[0], StandinIndex())
+            request = json.loads(body or "{}")
+            return self._reply(200, self._hits(index, index.search(request), request.get("_source")))
+        return self._index_doc(parts, body)
+
+    def _index_doc(self, parts, body):
+        # /{index}/_doc or /{index}/_doc/{id}
+        index = self.server.indices.setdefault(parts[0], StandinIndex())
+        doc_id = parts[2] if len(parts) > 2 else uuid.uuid4().hex
+        index.put(doc_id, json.loads(body))
+        return self._reply(201, {"_index": parts[0], "_id": doc_id, "result": "created"})
+
+    def _bulk(self, body):
+        lines = [line for line in body.split("\n") if line.strip()]
+        items = []
+        i = 0
+        while i < len(lines):
+            action = json.loads(lines[i])
+            op, meta = next(iter(action.items()))
+            index = self.server.indices.setdefault(meta.get("_index", self.server.index_name), StandinIndex())
+            doc_id = meta.get("_id") or uuid.uuid4().hex
+            if op == "delete":
+                found = index.delete(doc_id)
+                items.append({op: {"_id": doc_id, "status": 200 if found else 404}})
+                i += 1
+            else:
+                source = json.loads(lines[i + 1])
+                error = self._mapping_error(source)
+                if error:
+                    items.append({op: {"_id": doc_id, "status": 400, "error": error}})
+                else:
+                    index.put(doc_id, source)
+                    items.append({op: {"_id": doc_id, "status": 201, "result": "created"}})
+                i += 2
+        errors = any("error" in result for item in items for result in item.values())
+        return self._reply(200, {"took": 0, "errors": errors, "items": items})
+
+    @staticmethod
+    def _mapping_error(source):
+        """Rejects an embedding of the wrong size the way the dense_vector mapping does"""
+        dims = len(source.get("embedding") or [])
+        if dims in (0, 1024):
+            return None
+        return {
+            "type": "document_parsing_exception",
+            "reason": f"The [dense_vector] field [embedding] has a different number of dimensions [{dims}] "
+                      f"than defined in the mapping [1024]"
+        }
+
+    def _msearch(self, body):
+        lines = [json.loads(line) for line in body.split("\n") if line.strip()]
+        responses = []
+        for header, request in zip(lines[::2], lines[1::2]):
+            index = self.server.indices.setdefault(header.get("index", self.server.index_name), StandinIndex())
+            responses.append(self._hits(index, index.search(request), request.get("_source")))
+        return self._reply(200, {"took": 0, "responses": responses})
+
+    def log_message(self, *args):
+        pass
+
+
+class ElasticsearchStandin:
+    """
+    Local HTTP server answering the subset of the Elasticsearch API that ElasticsearchManager uses
+
+    Index creation, single and bulk indexing, kNN, hybrid (RRF or summed) and
+    multi-search are served from memory, with exact cosine kNN. It measures the
+    client side (serialization, HTTP round trips, parsing), not Elasticsearch's own
+    indexing or HNSW search costs.
+    """
+
+    def __init__(self, index_name="multimodal_content"):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.indices = {}
+        self.server.index_name = index_name
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self):
+        """Drops every index"""
+        self.server.indices.clear()
@@ -0,0 +1,392 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import time
+import argparse
+import platform
+import tempfile
+import itertools
+import threading
+import subprocess
+import logging
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+import synthetic_data
+from es_standin import ElasticsearchStandin
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUITES = ["embedding", "elasticsearch", "llm"]
+MODALITIES = ["vision", "audio", "text", "depth"]
+# Modules whose per-call INFO logging would drown the benchmark output
+QUIET_LOGGERS = ["embedding_generator", "elastic_manager", "elastic_transport", "llm_analyzer",
+                 "evidence_packer", "blob_store", "httpx"]
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (the peak so far where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return float("nan")
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class PeakRSS:
+    """Samples the resident set size in a background thread while a case runs and keeps the peak"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+def run_case(name, fn, items, repeats, warmup=1, **params):
+    """
+    Times fn() over repeats calls after warmup calls
+
+    Args:
+        name: Case name, e.g. "embedding/vision"
+        fn: Zero-argument callable doing one unit of work
+        items: Number of items (inputs, documents, queries) one call processes
+        repeats: Timed calls
+        warmup: Untimed calls first, so lazy initialization and caches do not skew the latencies
+        params: Case parameters recorded with the result (batch_size, chunk_size, ...)
+
+    Returns:
+        Result dict with p50/p95 latency per call, items/sec and the peak RSS while timing
+    """
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    with PeakRSS() as rss:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - start)
+
+    latencies_ms = np.array(latencies) * 1000
+    result = {
+        "name": name,
+        "params": params,
+        "repeats": repeats,
+        "items_per_call": items,
+        "latency_ms": {
+            "p50": float(np.percentile(latencies_ms, 50)),
+            "p95": float(np.percentile(latencies_ms, 95)),
+            "mean": float(latencies_ms.mean()),
+            "min": float(latencies_ms.min())
+        },
+        "items_per_sec": items * repeats / sum(latencies),
+        "peak_rss_mb": round(rss.peak_mb, 1)
+    }
+    logger.info(f"⏱️ {name} {params}: p50 {result['latency_ms']['p50']:.2f} ms, "
+                f"p95 {result['latency_ms']['p95']:.2f} ms, {result['items_per_sec']:.1f} items/s, "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB")
+    return result
+
+
+def build_random_imagebind(seed=0, width=192, blocks=2, heads=3):
+    """ImageBind architecture with small trunks and random weights, for running without the checkpoint"""
+    from imagebind.models import imagebind_model
+    from embedding_generator import EMBEDDING_DIM
+
+    torch.manual_seed(seed)
+    sizes = {}
+    for modality in ("vision", "audio", "text", "depth", "thermal", "imu"):
+        sizes.update({
+            f"{modality}_embed_dim": width,
+            f"{modality}_num_blocks": blocks,
+            f"{modality}_num_heads": heads
+        })
+    return imagebind_model.ImageBindModel(out_embed_dim=EMBEDDING_DIM, **sizes)
+
+
+def load_generator(model_kind, modalities, seed):
+    """Returns (EmbeddingGenerator, kind) using the checkpoint when present, or random weights"""
+    from embedding_generator import EmbeddingGenerator, CHECKPOINT_PATH
+
+    if model_kind == "auto":
+        model_kind = "checkpoint" if os.path.exists(os.path.expanduser(CHECKPOINT_PATH)) else "random"
+    if model_kind == "checkpoint":
+        return EmbeddingGenerator(modalities=modalities), model_kind
+
+    logger.info("🎲 Using a random-weight ImageBind-shaped model; latencies are not comparable to the checkpoint's")
+    return EmbeddingGenerator(modalities=modalities, model=build_random_imagebind(seed)), model_kind
+
+
+def bench_embedding(args, rng, work_dir, meta):
+    """EmbeddingGenerator per modality and batch size: preprocessing alone, then end to end"""
+    from embedding_generator import preprocess
+
+    generator, meta["model"] = load_generator(args.model, args.modalities, args.seed)
+    results = []
+    for modality in args.modalities:
+        inputs = synthetic_data.make_inputs(modality, work_dir, max(args.batch_sizes), rng)
+        for batch_size in args.batch_sizes:
+            batch = inputs[:batch_size]
+            results.append(run_case(
+                f"embedding/{modality}/preprocess",
+                lambda: preprocess(batch, modality, generator.device),
+                batch_size, args.repeats, batch_size=batch_size
+            ))
+            results.append(run_case(
+                f"embedding/{modality}/embed",
+                lambda: generator.generate_embeddings(batch, modality, batch_size=batch_size),
+                batch_size, args.repeats, batch_size=batch_size
+            ))
+    return results
+
+
+def bench_elasticsearch(args, rng, work_dir, meta):
+    """ElasticsearchManager indexing and search round trips against the in-process stand-in"""
+    from elastic_manager import ElasticsearchManager
+    from blob_store import BlobStore
+
+    embeddings = synthetic_data.make_embeddings(args.docs, rng)
+    descriptions = synthetic_data.make_texts(args.docs, rng)
+    records = [
+        (embeddings[i], MODALITIES[i % len(MODALITIES)], descriptions[i], {"synthetic": True},
+         f"synthetic/{i:06d}", f"bench-{i:06d}")
+        for i in range(args.docs)
+    ]
+    queries = synthetic_data.make_embeddings(args.queries, rng)
+    query_texts = synthetic_data.make_texts(args.queries, rng, words=(2, 5))
+
+    results = []
+    with ElasticsearchStandin() as standin:
+        os.environ["ELASTICSEARCH_ENDPOINT"] = standin.url
+        meta["elasticsearch"] = "stand-in"
+        manager = ElasticsearchManager(blob_store=BlobStore(os.path.join(work_dir, "blobs")))
+
+        single = itertools.cycle(records)
+        results.append(run_case(
+            "elasticsearch/index_content",
+            lambda: manager.index_content(*next(single)[:2], description="synthetic", doc_id="bench-single"),
+            1, args.queries
+        ))
+        for chunk_size in args.chunk_sizes:
+            # Fixed ids, so every repeat overwrites the same documents and the index size stays constant
+            results.append(run_case(
+                "elasticsearch/bulk_index",
+                lambda: manager.bulk_index(records, chunk_size=chunk_size),
+                len(records), max(1, args.repeats // 2), chunk_size=chunk_size
+            ))
+
+        query_cycle = itertools.cycle(range(args.queries))
+        results.append(run_case(
+            "elasticsearch/search_similar",
+            lambda: manager.search_similar(queries[next(query_cycle)], k=5),
+            1, args.queries, k=5, docs=args.docs
+        ))
+        results.append(run_case(
+            "elasticsearch/search_similar_many",
+            lambda: manager.search_similar_many(queries[:10], k=5),
+            10, args.repeats, k=5, docs=args.docs
+        ))
+        results.append(run_case(
+            "elasticsearch/search_hybrid",
+            lambda: manager.search_hybrid(query_texts[next(query_cycle)], queries[next(query_cycle)], k=5),
+            1, args.queries, k=5, docs=args.docs
+        ))
+    return results
+
+
+class MockCompletions:
+    """Stands in for client.chat.completions and answers instantly, so only the local work is timed"""
+
+    def create(self, **kwargs):
+        message = SimpleNamespace(content="Prime Suspect: The Joker\nConfidence Level: 90%")
+        usage = SimpleNamespace(total_tokens=kwargs.get("max_tokens", 0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def bench_llm(args, rng, work_dir, meta):
+    """LLMAnalyzer prompt building and analysis calls against a mock client"""
+    from llm_analyzer import LLMAnalyzer
+
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+    analyzer = LLMAnalyzer()
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=MockCompletions()))
+    meta["token_counter"] = "tiktoken" if analyzer.packer.counter.encoding is not None else "estimate"
+
+    results = []
+    for hits in args.hits:
+        evidence = synthetic_data.make_evidence(hits, rng)
+        total_hits = sum(len(results) for results in evidence.values())
+        request = analyzer._evidence_request(evidence)
+
+        result = run_case(
+            "llm/evidence_prompt",
+            lambda: analyzer._evidence_request(evidence),
+            total_hits, args.repeats * 4, hits_per_modality=hits
+        )
+        result["prompt_tokens"] = analyzer.packer.counter.count(request["messages"][-1]["content"])
+        results.append(result)
+
+        results.append(run_case(
+            "llm/analyze_evidence",
+            lambda: analyzer.analyze_evidence(evidence),
+            total_hits, args.repeats * 4, hits_per_modality=hits
+        ))
+        results.append(run_case(
+            "llm/cross_modal_pairs",
+            lambda: analyzer.analyze_all_cross_modal_connections(evidence),
+            total_hits, args.repeats, hits_per_modality=hits
+        ))
+    return results
+
+
+def git_commit():
+    """Short hash of the checked-out commit, with a -dirty suffix for local changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _csv(cast):
+    return lambda value: [cast(item) for item in value.split(",") if item]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the embedding, indexing, search and analysis stages")
+    parser.add_argument("--suites", type=_csv(str), default=SUITES, help="Comma-separated subset of " + ",".join(SUITES))
+    parser.add_argument("--modalities", type=_csv(str), default=MODALITIES)
+    parser.add_argument("--batch-sizes", type=_csv(int), default=[1, 8, 32])
+    parser.add_argument("--chunk-sizes", type=_csv(int), default=[100, 500])
+    parser.add_argument("--hits", type=_csv(int), default=[5, 20, 100], help="Search hits per modality for the LLM suite")
+    parser.add_argument("--docs", type=int, default=2000, help="Documents indexed for the Elasticsearch suite")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--model", choices=["auto", "checkpoint", "random"], default="auto",
+                        help="auto uses the ImageBind checkpoint when it is present and random weights otherwise")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="Small sizes, for a smoke run")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.batch_sizes = [1, 4]
+        args.chunk_sizes = [100]
+        args.hits = [5, 20]
+        args.docs = 200
+        args.queries = 10
+        args.repeats = 2
+    unknown = set(args.suites) - set(SUITES) or set(args.modalities) - set(MODALITIES)
+    if unknown:
+        parser.error(f"Unknown suites or modalities: {sorted(unknown)}")
+    return args
+
+
+def run(args):
+    """Runs the selected suites and returns {"meta": ..., "results": [...]}"""
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    }
+
+    suites = {"embedding": bench_embedding, "elasticsearch": bench_elasticsearch, "llm": bench_llm}
+    results = []
+    with tempfile.TemporaryDirectory(prefix="mmrag_bench_") as work_dir:
+        for suite in args.suites:
+            logger.info(f"\n🚀 Running {suite} benchmarks...")
+            # Each suite gets its own stream, so its synthetic data does not depend on which suites ran before
+            rng = np.random.default_rng([args.seed, SUITES.index(suite)])
+            results.extend(suites[suite](args, rng, work_dir, meta))
+
+    meta["peak_rss_mb"] = round(max(result["peak_rss_mb"] for result in results), 1) if results else None
+    return {"meta": meta, "results": results}
+
+
+def _case_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(baseline, current):
+    """Logs the p50 latency and throughput change of every case present in both runs"""
+    previous = {_case_key(result): result for result in baseline["results"]}
+    logger.info(f"\n📊 Compared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for result in current["results"]:
+        old = previous.get(_case_key(result))
+        if old is None:
+            continue
+        p50_ratio = result["latency_ms"]["p50"] / max(old["latency_ms"]["p50"], 1e-9)
+        throughput_ratio = result["items_per_sec"] / max(old["items_per_sec"], 1e-9)
+        marker = "🟢" if p50_ratio < 0.95 else "🔴" if p50_ratio > 1.05 else "⚪"
+        logger.info(f"{marker} {result['name']} {result['params']}: p50 {old['latency_ms']['p50']:.2f} -> "
+                    f"{result['latency_ms']['p50']:.2f} ms (x{p50_ratio:.2f}), throughput x{throughput_ratio:.2f}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"✅ Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
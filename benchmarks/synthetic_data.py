@@ -0,0 +1,101 @@
+import os
+import wave
+
+import numpy as np
+from PIL import Image
+
+WORDS = [
+    "joker", "card", "vault", "laugh", "alley", "rain", "purple", "green", "bank", "gotham",
+    "shadow", "mask", "smile", "ransom", "note", "police", "night", "siren", "footprint", "glass",
+    "dance", "stairs", "detective", "clue", "witness", "camera", "gas", "balloon", "chemical", "riddle"
+]
+
+
+def _smooth_noise(rng, height, width, channels, cell=16):
+    """Low-frequency noise upsampled from a coarse grid, so images compress like photos rather than static"""
+    coarse = rng.integers(0, 256, size=(height // cell + 1, width // cell + 1, channels), dtype=np.uint8)
+    image = Image.fromarray(coarse.squeeze(-1) if channels == 1 else coarse)
+    return np.asarray(image.resize((width, height), Image.BILINEAR))
+
+
+def write_images(directory, count, rng, size=(640, 480)):
+    """Writes count RGB JPEGs and returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        pixels = _smooth_noise(rng, size[1], size[0], 3)
+        path = os.path.join(directory, f"image_{i:05d}.jpg")
+        Image.fromarray(pixels).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def write_depth_maps(directory, count, rng, size=(640, 480)):
+    """Writes count 8-bit grayscale PNG depth maps (a gradient plus smooth noise) and returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    gradient = np.linspace(0, 160, size[1], dtype=np.float32)[:, None]
+    paths = []
+    for i in range(count):
+        depth = gradient + _smooth_noise(rng, size[1], size[0], 1, cell=32) * (95 / 255)
+        path = os.path.join(directory, f"depth_{i:05d}.png")
+        Image.fromarray(depth.astype(np.uint8), mode="L").save(path)
+        paths.append(path)
+    return paths
+
+
+def write_wavs(directory, count, rng, seconds=5.0, sample_rate=16000):
+    """Writes count mono 16-bit WAVs of a few tones plus noise and returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    paths = []
+    for i in range(count):
+        frequencies = rng.uniform(110, 2000, size=3)
+        signal = sum(0.2 * np.sin(2 * np.pi * f * t) for f in frequencies) + 0.05 * rng.standard_normal(len(t))
+        samples = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+        path = os.path.join(directory, f"audio_{i:05d}.wav")
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(samples.tobytes())
+        paths.append(path)
+    return paths
+
+
+def make_texts(count, rng, words=(6, 20)):
+    """Returns count random sentences over the case vocabulary"""
+    return [" ".join(rng.choice(WORDS, size=rng.integers(*words))).capitalize() for _ in range(count)]
+
+
+def make_inputs(modality, directory, count, rng):
+    """Returns count synthetic inputs for a modality: file paths, or strings for text"""
+    if modality == "vision":
+        return write_images(os.path.join(directory, "images"), count, rng)
+    if modality == "audio":
+        return write_wavs(os.path.join(directory, "audios"), count, rng)
+    if modality == "depth":
+        return write_depth_maps(os.path.join(directory, "depths"), count, rng)
+    if modality == "text":
+        return make_texts(count, rng)
+    raise ValueError(f"Unsupported modality: {modality}")
+
+
+def make_embeddings(count, rng, dim=1024):
+    """Returns a (count, dim) float32 matrix of unit vectors"""
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_evidence(hits_per_modality, rng, modalities=("vision", "audio", "text", "depth")):
+    """Returns search results by modality shaped like the RAG stage's, with documents shared across modalities"""
+    pool = max(1, hits_per_modality * len(modalities) // 2)
+    descriptions = make_texts(pool, rng, words=(10, 40))
+    evidence = {}
+    for modality in modalities:
+        ids = rng.choice(pool, size=min(hits_per_modality, pool), replace=False)
+        evidence[modality] = [
+            {"id": f"doc-{i}", "description": descriptions[i], "score": float(rng.uniform(0.5, 1.0))}
+            for i in ids
+        ]
+    return evidence
@@ -0,0 +1,150 @@
+from elasticsearch import AsyncElasticsearch
+from elastic_transport import AiohttpHttpNode
+import asyncio
+import aiohttp
+import os
+import logging
+from dotenv import load_dotenv
+
+from elastic_manager import (
+    INDEX_NAME, build_index_mapping, resolve_index_options, build_knn_query, build_msearch_body, build_hybrid_search,
+    parse_hits, parse_hybrid_hits, parse_msearch, source_filter
+)
+from blob_store import BlobStore, fetch_content, document_id_of
+
+logger = logging.getLogger(__name__)
+
+class KeepAliveAiohttpNode(AiohttpHttpNode):
+    """aiohttp node whose pooled connections stay open for keep_alive_timeout seconds when idle"""
+
+    keep_alive_timeout = 60
+
+    def _create_aiohttp_session(self):
+        # aiohttp only takes the idle keep-alive as a TCPConnector argument, so the session is
+        # built here like the transport builds it, with a connector that carries keepalive_timeout
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            skip_auto_headers=("accept", "accept-encoding", "user-agent"),
+            auto_decompress=True,
+            loop=self._loop,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            connector=aiohttp.TCPConnector(
+                limit_per_host=self.config.connections_per_node,
+                keepalive_timeout=self.keep_alive_timeout,
+                use_dns_cache=True,
+                ssl=self._ssl_context or False
+            )
+        )
+
+class AsyncElasticsearchManager:
+    """
+    Manages multimodal searches in Elasticsearch with an asyncio client
+
+    One client and its connection pool are shared by every coroutine, so searches
+    for several modalities can be in flight at once over warm connections. Use it
+    as an async context manager so the index is checked on entry and the pool is
+    closed on exit.
+    """
+
+    def __init__(self, connections_per_node=10, keep_alive_timeout=60, request_timeout=30,
+                 index_preset=None, index_options=None, number_of_shards=None, number_of_replicas=None,
+                 blob_store=None):
+        load_dotenv()  # Load variables from .env
+        self.blob_store = blob_store or BlobStore()
+        self.connections_per_node = connections_per_node
+        self.keep_alive_timeout = keep_alive_timeout
+        self.request_timeout = request_timeout
+        self.es = self._connect_elastic()
+        self.index_name = INDEX_NAME
+        self.index_mapping = build_index_mapping(
+            resolve_index_options(index_preset, index_options), number_of_shards, number_of_replicas
+        )
+
+    def _connect_elastic(self):
+        """Connects to Elasticsearch with a pooled aiohttp transport"""
+        node_class = type(
+            "KeepAliveAiohttpNode", (KeepAliveAiohttpNode,), {"keep_alive_timeout": self.keep_alive_timeout}
+        )
+        return AsyncElasticsearch(
+            os.getenv("ELASTICSEARCH_ENDPOINT"),  # Elasticsearch endpoint
+            api_key=os.getenv("ELASTIC_API_KEY"),
+            node_class=node_class,
+            connections_per_node=self.connections_per_node,
+            request_timeout=self.request_timeout
+        )
+
+    async def __aenter__(self):
+        await self._setup_index()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _setup_index(self):
+        """Sets up the index if it doesn't exist"""
+        if not await self.es.indices.exists(index=self.index_name):
+            await self.es.indices.create(index=self.index_name, body=self.index_mapping)
+
+    async def close(self):
+        """Closes the connection pool"""
+        await self.es.close()
+
+    async def fetch_content(self, doc):
+        """
+        Returns the raw content of a search hit, loading it only when asked
+
+        Blob-store content is read locally; a legacy document's base64 "content",
+        which default searches leave out of their hits, is fetched by _id.
+        """
+        content = fetch_content(doc, self.blob_store)
+        doc_id = document_id_of(doc)
+        if content is None and not doc.get("content_digest") and doc_id:
+            response = await self.es.get(index=self.index_name, id=doc_id, source_includes=["content"])
+            content = fetch_content(response.get("_source") or {}, self.blob_store)
+        return content
+
+    async def search_similar(self, query_embedding, modality=None, k=5, include_fields=None):
+        """Searches for similar contents, fetching only the default fields plus include_fields"""
+        query = build_knn_query(query_embedding, modality, k)
+
+        try:
+            response = await self.es.search(
+                index=self.index_name,
+                query=query,
+                size=k,
+                source=source_filter(include_fields)
+            )
+
+            return parse_hits(response)
+
+        except Exception as e:
+            logger.error(f"Error: processing search_evidence: {str(e)}")
+            return []
+
+    async def search_similar_many(self, query_embeddings, modality=None, k=5, include_fields=None):
+        """Searches for similar contents for many query vectors in a single _msearch round trip"""
+        searches = build_msearch_body(self.index_name, query_embeddings, modality, k, include_fields)
+
+        try:
+            response = await self.es.msearch(searches=searches)
+            return parse_msearch(response)
+
+        except Exception as e:
+            logger.error(f"Error: processing multi-search: {str(e)}")
+            return [[] for _ in range(len(searches) // 2)]
+    
+    async def search_hybrid(self, query_text, query_embedding, modality=None, k=5, fusion="rrf", knn_weight=0.5,
+                            text_weight=0.5, rank_constant=60, include_fields=None):
+        """Searches with BM25 on description and kNN on embedding, fused server-side in one request"""
+        body = build_hybrid_search(query_text, query_embedding, modality, k, fusion, knn_weight, text_weight,
+                                   rank_constant)
+        
+        try:
+            response = await self.es.search(index=self.index_name, source=source_filter(include_fields), **body)
+            return parse_hybrid_hits(response, rank_constant)
+        
+        except Exception as e:
+            logger.error(f"Error: processing hybrid search: {str(e)}")
+            return []
@@ -0,0 +1,174 @@
+import os
+import math
+import wave
+import logging
+
+import torch
+import numpy as np
+import torchaudio
+from imagebind import data
+from torchvision import transforms
+
+from index_manifest import hash_file, document_id
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ImageBind audio input: 3 clips of 2 s at 16 kHz, each a 128 x 204 log-mel bank
+# normalized with the AudioSet statistics used by data.load_and_transform_audio_data
+SAMPLE_RATE = 16000
+CLIP_SECONDS = 2
+CLIPS_PER_SEGMENT = 3
+NUM_MEL_BINS = 128
+TARGET_LENGTH = 204
+MEL_MEAN = -4.268
+MEL_STD = 9.138
+
+# PCM sample width in bytes -> numpy dtype and full-scale value
+PCM_FORMATS = {
+    1: (np.uint8, 128.0),
+    2: (np.int16, 32768.0),
+    4: (np.int32, 2147483648.0)
+}
+
+
+def iter_wav_windows(path, window_seconds=CLIP_SECONDS * CLIPS_PER_SEGMENT):
+    """
+    Reads a PCM WAV file one window at a time
+
+    Yields:
+        (start_seconds, waveform) with waveform a mono float32 tensor of shape (1, samples)
+        at the file's sample rate; the last window may be shorter
+    """
+    with wave.open(path, "rb") as wav:
+        sample_width, channels, sample_rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+        if sample_width not in PCM_FORMATS:
+            raise ValueError(f"Unsupported WAV sample width {sample_width * 8} bits in {path}")
+        dtype, full_scale = PCM_FORMATS[sample_width]
+
+        window_frames = int(window_seconds * sample_rate)
+        start = 0
+        while True:
+            frames = wav.readframes(window_frames)
+            if not frames:
+                return
+            samples = np.frombuffer(frames, dtype=dtype).astype(np.float32)
+            if dtype == np.uint8:
+                samples -= 128.0
+            samples = samples.reshape(-1, channels).mean(axis=1) / full_scale
+            yield start / sample_rate, torch.from_numpy(samples).unsqueeze(0)
+            start += len(samples)
+
+
+def energy_db(waveform):
+    """Returns the RMS level of a waveform in dBFS"""
+    rms = waveform.pow(2).mean().sqrt().item()
+    return 20 * np.log10(max(rms, 1e-10))
+
+
+def clips_for_window(window_seconds):
+    """Number of consecutive CLIP_SECONDS clips needed to cover a window"""
+    if window_seconds <= 0:
+        raise ValueError(f"window_seconds must be positive, got {window_seconds}")
+    return math.ceil(window_seconds / CLIP_SECONDS)
+
+
+def segment_to_tensor(waveform, sample_rate, clips=CLIPS_PER_SEGMENT):
+    """Turns one window into the (clips, 1, mel_bins, frames) tensor the audio trunk expects"""
+    if sample_rate != SAMPLE_RATE:
+        waveform = torchaudio.functional.resample(waveform, sample_rate, SAMPLE_RATE)
+
+    # Short windows are zero-padded to whole clips; longer ones must ask for more clips
+    clip_samples = CLIP_SECONDS * SAMPLE_RATE
+    if waveform.shape[1] > clip_samples * clips:
+        raise ValueError(f"{waveform.shape[1] / SAMPLE_RATE:.2f}s window does not fit {clips} clips of {CLIP_SECONDS}s")
+    padding = clip_samples * clips - waveform.shape[1]
+    if padding > 0:
+        waveform = torch.nn.functional.pad(waveform, (0, padding))
+
+    # waveform2melspec subtracts the mean in place, so each clip gets its own copy
+    normalize = transforms.Normalize(mean=MEL_MEAN, std=MEL_STD)
+    clips = [
+        normalize(data.waveform2melspec(waveform[:, i * clip_samples:(i + 1) * clip_samples].clone(), SAMPLE_RATE,
+                                        NUM_MEL_BINS, TARGET_LENGTH))
+        for i in range(clips)
+    ]
+    return torch.stack(clips)
+
+
+class AudioSegmentEmbedder:
+    """
+    Streams long recordings through the audio trunk one fixed window at a time
+
+    data.load_and_transform_audio_data decodes a whole file and samples three
+    clips from it, so an hour-long recording gets one vector. Here the file is read
+    window by window (consecutive 2 s clips covering the window, three for the
+    default 6 s, the same input shape the model sees), windows quieter than
+    silence_db are skipped, and the rest are embedded in batches. Memory stays
+    bounded by one batch regardless of length.
+    """
+
+    def __init__(self, generator, window_seconds=CLIP_SECONDS * CLIPS_PER_SEGMENT, silence_db=-50.0,
+                 batch_size=None):
+        self.generator = generator
+        self.window_seconds = window_seconds
+        self.clips_per_window = clips_for_window(window_seconds)
+        self.silence_db = silence_db
+        self.batch_size = batch_size or generator.batch_size_for("audio")
+
+    def embed_segments(self, path):
+        """
+        Yields (segment, embedding) for every non-silent window of a WAV file
+
+        segment is a dict with the window's index, start_seconds and end_seconds
+        """
+        with wave.open(path, "rb") as wav:
+            sample_rate = wav.getframerate()
+
+        batch = []
+        skipped = 0
+        for index, (start, waveform) in enumerate(iter_wav_windows(path, self.window_seconds)):
+            if energy_db(waveform) < self.silence_db:
+                skipped += 1
+                continue
+
+            segment = {
+                "segment_index": index,
+                "start_seconds": round(start, 3),
+                "end_seconds": round(start + waveform.shape[1] / sample_rate, 3)
+            }
+            batch.append((segment, segment_to_tensor(waveform, sample_rate, self.clips_per_window)))
+            if len(batch) >= self.batch_size:
+                yield from self._embed_batch(batch)
+                batch = []
+
+        if batch:
+            yield from self._embed_batch(batch)
+        logger.info(f"Skipped {skipped} silent windows in {path}")
+
+    def _embed_batch(self, batch):
+        """Runs one batch of segment tensors through the model"""
+        embeddings = self.generator.embed_tensors(torch.stack([tensor for _, tensor in batch]), "audio")
+        return [(segment, embedding) for (segment, _), embedding in zip(batch, embeddings)]
+
+    def records(self, path, description="", metadata=None):
+        """
+        Yields one bulk record per non-silent segment, each its own document
+
+        Segments share a parent_id derived from the recording's content and path, and
+        their _ids derive from it, so re-indexing a recording overwrites its segments.
+        """
+        parent_id = document_id(hash_file(path), "audio", path)
+        for segment, embedding in self.embed_segments(path):
+            segment_metadata = dict(metadata or {}, parent_id=parent_id, **segment)
+            segment_description = (
+                f"{description} [{segment['start_seconds']:.1f}s - {segment['end_seconds']:.1f}s]"
+            )
+            yield (embedding, "audio", segment_description, segment_metadata, path,
+                   f"{parent_id}-{segment['segment_index']:06d}")
+
+    def index_recording(self, path, es_manager, description="", metadata=None, **bulk_options):
+        """Streams the segments of a recording into a vector backend and returns the bulk summary"""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Audio file not found: {path}")
+        return es_manager.bulk_index(self.records(path, description, metadata), **bulk_options)
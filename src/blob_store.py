@@ -0,0 +1,142 @@
+import os
+import json
+import base64
+import hashlib
+import threading
+
+DEFAULT_BLOB_DIR = "~/.cache/mmrag/blobs"
+
+
+class BlobStore:
+    """
+    Local content-addressed store for raw evidence bytes
+
+    Blobs are keyed by their sha256 digest, so identical content is stored once and
+    documents only need the digest and size. The "sharded" layout writes one file
+    per blob under ab/cd/<digest>, two directory levels deep so no directory grows
+    too large. The "pack" layout appends blobs to pack files of up to
+    pack_max_bytes with a JSON-lines index of (digest, pack, offset, size), which
+    suits many small blobs and keeps the inode count low.
+    """
+
+    def __init__(self, root=DEFAULT_BLOB_DIR, layout="sharded", pack_max_bytes=256 * 1024 * 1024):
+        if layout not in ("sharded", "pack"):
+            raise ValueError(f"Unknown blob layout '{layout}'. Use 'sharded' or 'pack'")
+        self.root = os.path.expanduser(root)
+        self.layout = layout
+        self.pack_max_bytes = pack_max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+        if layout == "pack":
+            self.pack_index_path = os.path.join(self.root, "packs.jsonl")
+            self.pack_index = self._load_pack_index()
+
+    def _load_pack_index(self):
+        """Loads the digest -> (pack, offset, size) index of the pack layout"""
+        index = {}
+        if os.path.exists(self.pack_index_path):
+            with open(self.pack_index_path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        index[entry["digest"]] = (entry["pack"], entry["offset"], entry["size"])
+        return index
+
+    def _blob_path(self, digest):
+        """Returns the file path of a blob in the sharded layout"""
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def _current_pack(self, size):
+        """Returns the pack file that the next blob of this size is appended to"""
+        packs = sorted(name for name in os.listdir(self.root) if name.startswith("pack-"))
+        if packs:
+            path = os.path.join(self.root, packs[-1])
+            if os.path.getsize(path) + size <= self.pack_max_bytes or os.path.getsize(path) == 0:
+                return packs[-1]
+        return f"pack-{len(packs):06d}.bin"
+
+    def put(self, content):
+        """Stores bytes (or text, as UTF-8) and returns {"digest", "size"}; existing blobs are not rewritten"""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            if not self.exists(digest):
+                if self.layout == "sharded":
+                    path = self._blob_path(digest)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path + ".tmp", "wb") as f:
+                        f.write(content)
+                    os.replace(path + ".tmp", path)
+                else:
+                    self._append_to_pack(digest, content)
+
+        return {"digest": digest, "size": len(content)}
+
+    def put_file(self, path):
+        """Stores the contents of a file"""
+        with open(path, "rb") as f:
+            return self.put(f.read())
+
+    def _append_to_pack(self, digest, content):
+        """Appends a blob to the current pack file and records it in the index"""
+        pack = self._current_pack(len(content))
+        with open(os.path.join(self.root, pack), "ab") as f:
+            offset = f.tell()
+            f.write(content)
+        # The index line is written last, so a torn append is never referenced
+        with open(self.pack_index_path, "a") as f:
+            f.write(json.dumps({"digest": digest, "pack": pack, "offset": offset, "size": len(content)}) + "\n")
+        self.pack_index[digest] = (pack, offset, len(content))
+
+    def exists(self, digest):
+        """Returns whether a blob is stored"""
+        if self.layout == "sharded":
+            return os.path.exists(self._blob_path(digest))
+        return digest in self.pack_index
+
+    def get(self, digest):
+        """Returns the bytes of a blob"""
+        if self.layout == "sharded":
+            path = self._blob_path(digest)
+            if not os.path.exists(path):
+                raise KeyError(f"Blob {digest} not found in {self.root}")
+            with open(path, "rb") as f:
+                return f.read()
+
+        if digest not in self.pack_index:
+            raise KeyError(f"Blob {digest} not found in {self.root}")
+        pack, offset, size = self.pack_index[digest]
+        with open(os.path.join(self.root, pack), "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+
+def fetch_content(doc, blob_store, load_source=None):
+    """
+    Returns the raw bytes of a document's content, or None when it has none
+
+    Accepts a SearchHit or a source dict. Documents written before the blob store
+    carry base64 in "content", which is decoded instead. Searches leave "content" out
+    of hits by default, so when a hit has neither field and load_source is given,
+    load_source(doc_id) is called to fetch the document's "content" by _id.
+    """
+    digest = doc.get("content_digest")
+    if digest:
+        return blob_store.get(digest)
+
+    content = doc.get("content")
+    if not content and load_source is not None:
+        doc_id = document_id_of(doc)
+        if doc_id:
+            content = (load_source(doc_id) or {}).get("content")
+    if content:
+        return base64.b64decode(content)
+    return None
+
+
+def document_id_of(doc):
+    """Returns the _id of a SearchHit or raw hit, or None for a bare source dict"""
+    return getattr(doc, "id", None) or doc.get("_id")
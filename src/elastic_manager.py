@@ -1,16 +1,194 @@
 from elasticsearch import Elasticsearch, helpers
 import base64
 import os
+import uuid
+import logging
 from dotenv import load_dotenv
 import numpy as np
 
+from search_hit import SearchHit, DEFAULT_SOURCE_FIELDS
+from blob_store import BlobStore, fetch_content
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "multimodal_content"
+
+# dense_vector index_options presets, from best recall to smallest memory footprint.
+# int8 variants keep a quantized copy of the vectors in memory, about 4x smaller.
+# int8_hnsw needs Elasticsearch 8.12+ and flat needs 8.13+; hnsw works on every 8.x server
+INDEX_PRESETS = {
+    "exact": {"type": "flat"},
+    "high_recall": {"type": "hnsw", "m": 32, "ef_construction": 200},
+    "balanced": {"type": "int8_hnsw", "m": 16, "ef_construction": 100},
+    "compact": {"type": "int8_hnsw", "m": 8, "ef_construction": 64}
+}
+
+def build_index_mapping(index_options=None, number_of_shards=None, number_of_replicas=None):
+    """Builds the index body; unset options fall back to the Elasticsearch defaults"""
+    embedding_mapping = {
+        "type": "dense_vector",
+        "dims": 1024,
+        "index": True,
+        "similarity": "cosine"
+    }
+    if index_options:
+        embedding_mapping["index_options"] = index_options
+    
+    body = {
+        "mappings": {
+            "properties": {
+                "embedding": embedding_mapping,
+                "modality": {"type": "keyword"},
+                "content": {"type": "binary"},
+                "content_digest": {"type": "keyword"},
+                "content_size": {"type": "long"},
+                "description": {"type": "text"},
+                "metadata": {"type": "object"},
+                "content_path": {"type": "text"}
+            }
+        }
+    }
+    
+    settings = {}
+    if number_of_shards is not None:
+        settings["number_of_shards"] = number_of_shards
+    if number_of_replicas is not None:
+        settings["number_of_replicas"] = number_of_replicas
+    if settings:
+        body["settings"] = settings
+    
+    return body
+
+def resolve_index_options(index_preset=None, index_options=None):
+    """Merges a named preset with explicit index_options, the explicit values winning"""
+    if index_preset is not None and index_preset not in INDEX_PRESETS:
+        raise ValueError(f"Unknown index preset '{index_preset}'. Available: {list(INDEX_PRESETS)}")
+    
+    options = dict(INDEX_PRESETS[index_preset]) if index_preset else {}
+    options.update(index_options or {})
+    return options or None
+
+def source_filter(include_fields=None):
+    """Returns the _source fields to fetch: the defaults plus any requested extras"""
+    return DEFAULT_SOURCE_FIELDS + [f for f in include_fields or [] if f not in DEFAULT_SOURCE_FIELDS]
+
+def build_knn_query(query_embedding, modality=None, k=5):
+    """Builds the kNN query for a query vector, optionally filtered by modality"""
+    return {
+        "knn": {
+            "field": "embedding",
+            "query_vector": query_embedding.tolist(),
+            "k": k,
+            "num_candidates": 100,
+            "filter": [{"term": {"modality": modality}}] if modality else []
+        }
+    }
+
+def build_hybrid_search(query_text, query_embedding, modality=None, k=5, fusion="rrf", knn_weight=0.5,
+                        text_weight=0.5, rank_constant=60, num_candidates=100):
+    """
+    Builds the body of a single search that fuses BM25 on description with kNN on embedding
+    
+    Args:
+        query_text: Text matched against the description field
+        query_embedding: Query vector for the kNN clause
+        modality: Modality filter applied to both clauses
+        k: Number of fused results
+        fusion: "rrf" for reciprocal rank fusion, or "linear" for knn_weight * kNN score + text_weight * BM25 score
+        knn_weight: Boost of the kNN score with linear fusion
+        text_weight: Boost of the BM25 score with linear fusion
+        rank_constant: RRF rank constant; larger values flatten the contribution of top ranks
+        num_candidates: Candidates per shard for the kNN clause
+    
+    Returns:
+        Keyword arguments for Elasticsearch.search
+    """
+    if fusion not in ("rrf", "linear"):
+        raise ValueError(f"Unknown fusion '{fusion}'. Use 'rrf' or 'linear'")
+    
+    filters = [{"term": {"modality": modality}}] if modality else []
+    knn = {
+        "field": "embedding",
+        "query_vector": query_embedding.tolist(),
+        "k": max(k, 10),
+        "num_candidates": max(num_candidates, k),
+        "filter": filters
+    }
+    match = {"match": {"description": {"query": query_text}}}
+    body = {"knn": knn, "query": {"bool": {"must": [match], "filter": filters}}, "size": k}
+    
+    if fusion == "rrf":
+        body["rank"] = {"rrf": {"window_size": max(k, num_candidates), "rank_constant": rank_constant}}
+    else:
+        # Without a rank section Elasticsearch adds the boosted scores of both clauses
+        knn["boost"] = knn_weight
+        match["match"]["description"]["boost"] = text_weight
+    
+    return body
+
+def parse_hybrid_hits(response, rank_constant=60):
+    """Parses a hybrid search response; RRF hits without a _score get 1 / (rank_constant + _rank)"""
+    results = parse_hits(response)
+    for result, hit in zip(results, response["hits"]["hits"]):
+        if result.score is None and "_rank" in hit:
+            result.score = 1.0 / (rank_constant + hit["_rank"])
+    return results
+
+def build_msearch_body(index_name, query_embeddings, modality=None, k=5, include_fields=None):
+    """Builds the header/body pairs of a multi-search, one kNN search per query vector"""
+    query_embeddings = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, 1024)
+    modalities = modality if isinstance(modality, (list, tuple)) else [modality] * len(query_embeddings)
+    if len(modalities) != len(query_embeddings):
+        raise ValueError(f"Got {len(modalities)} modalities for {len(query_embeddings)} query vectors")
+    
+    searches = []
+    for query_embedding, query_modality in zip(query_embeddings, modalities):
+        searches.append({"index": index_name})
+        searches.append({
+            "query": build_knn_query(query_embedding, query_modality, k),
+            "size": k,
+            "_source": source_filter(include_fields)
+        })
+    return searches
+
+def parse_msearch(response):
+    """Parses a multi-search response into one result list per query, logging per-query errors"""
+    results = []
+    for i, query_response in enumerate(response["responses"]):
+        if "error" in query_response:
+            logger.error(f"Error: search {i} of multi-search failed: {query_response['error']}")
+            results.append([])
+        else:
+            results.append(parse_hits(query_response))
+    return results
+
+def parse_hits(response):
+    """Returns a SearchHit with the source data and score of each hit"""
+    return [SearchHit.from_hit(hit) for hit in response["hits"]["hits"]]
+
 class ElasticsearchManager:
     """Manages multimodal operations in Elasticsearch"""
     
-    def __init__(self):
+    def __init__(self, index_preset=None, index_options=None, number_of_shards=None, number_of_replicas=None,
+                 blob_store=None, inline_content=False):
+        """
+        Args:
+            index_preset: Name of an INDEX_PRESETS entry for the embedding field
+            index_options: dense_vector index_options (type, m, ef_construction) overriding the preset
+            number_of_shards: Primary shard count of the index
+            number_of_replicas: Replica count of the index
+            blob_store: BlobStore that raw content is written to; a local one by default
+            inline_content: Store raw content base64-encoded in the document instead of the blob store
+        
+        The index settings only apply when the index is created.
+        """
         load_dotenv()  # Load variables from .env
+        self.blob_store = None if inline_content else blob_store or BlobStore()
         self.es = self._connect_elastic()
-        self.index_name = "multimodal_content"
+        self.index_name = INDEX_NAME
+        self.index_mapping = build_index_mapping(
+            resolve_index_options(index_preset, index_options), number_of_shards, number_of_replicas
+        )
         self._setup_index()
     
     def _connect_elastic(self):
@@ -23,27 +201,10 @@ class ElasticsearchManager:
     def _setup_index(self):
         """Sets up the index if it doesn't exist"""
         if not self.es.indices.exists(index=self.index_name):
-            mapping = {
-                "mappings": {
-                    "properties": {
-                        "embedding": {
-                            "type": "dense_vector",
-                            "dims": 1024,
-                            "index": True,
-                            "similarity": "cosine"
-                        },
-                        "modality": {"type": "keyword"},
-                        "content": {"type": "binary"},
-                        "description": {"type": "text"},
-                        "metadata": {"type": "object"},
-                        "content_path": {"type": "text"}
-                    }
-                }
-            }
-            self.es.indices.create(index=self.index_name, body=mapping)
+            self.es.indices.create(index=self.index_name, body=self.index_mapping)
     
-    def index_content(self, embedding, modality, content=None, description="", metadata=None, content_path=None):
-        """Indexes multimodal content"""
+    def _build_document(self, embedding, modality, content=None, description="", metadata=None, content_path=None):
+        """Builds the document body stored for a piece of content"""
         doc = {
             "embedding": embedding.tolist(),
             "modality": modality,
@@ -52,36 +213,189 @@ class ElasticsearchManager:
             "content_path": content_path
         }
         
-        if content:
+        if content and self.blob_store is not None:
+            # Only the digest and size go into the index; the bytes stay in the blob store
+            blob = self.blob_store.put(content)
+            doc["content_digest"] = blob["digest"]
+            doc["content_size"] = blob["size"]
+        elif content:
             doc["content"] = base64.b64encode(content).decode() if isinstance(content, bytes) else content
         
-        return self.es.index(index=self.index_name, document=doc)
-    
-    def search_similar(self, query_embedding, modality=None, k=5):
-        """Searches for similar contents"""
-        query = {
-            "knn": {
-                "field": "embedding",
-                "query_vector": query_embedding.tolist(),
-                "k": k,
-                "num_candidates": 100,
-                "filter": [{"term": {"modality": modality}}] if modality else []
+        return doc
+    
+    def fetch_content(self, doc):
+        """
+        Returns the raw content of a search hit or document source, loading it only when asked
+
+        Legacy documents keep base64 "content", which default searches leave out of
+        their hits, so it is fetched by _id when the hit carries neither field.
+        """
+        return fetch_content(doc, self.blob_store, load_source=self._load_content_source)
+    
+    def _load_content_source(self, doc_id):
+        """Returns the _source of one document restricted to its inline content"""
+        return self.es.get(index=self.index_name, id=doc_id, source_includes=["content"]).get("_source")
+    
+    def index_content(self, embedding, modality, content=None, description="", metadata=None, content_path=None,
+                      doc_id=None):
+        """Indexes multimodal content; with a doc_id an existing document is overwritten instead of duplicated"""
+        doc = self._build_document(embedding, modality, content, description, metadata, content_path)
+        return self.es.index(index=self.index_name, id=doc_id, document=doc)
+    
+    def _bulk_actions(self, records, content_paths):
+        """
+        Turns bulk records into index actions, keeping the _id when a record carries one
+
+        Records without one get a generated _id so a failure can be traced back to its
+        content_path, which is recorded in content_paths until the result comes back
+        """
+        for embedding, modality, description, metadata, content_path, *doc_id in records:
+            action_id = doc_id[0] if doc_id and doc_id[0] else uuid.uuid4().hex
+            content_paths[action_id] = content_path
+            yield {
+                "_index": self.index_name,
+                "_id": action_id,
+                "_source": self._build_document(embedding, modality, None, description, metadata, content_path)
+            }
+    
+    def bulk_index(self, records, chunk_size=500, max_chunk_bytes=10 * 1024 * 1024,
+                   max_retries=5, initial_backoff=2, max_backoff=60):
+        """
+        Streams records into the index with the bulk API
+        
+        Args:
+            records: Iterable of (embedding, modality, description, metadata, content_path) tuples,
+                consumed lazily so a generator never has to be materialized. An optional sixth
+                element is the document _id, which makes re-indexing overwrite instead of duplicate
+            chunk_size: Maximum number of documents per bulk request
+            max_chunk_bytes: Maximum size in bytes of a single bulk request
+            max_retries: Times a document rejected with 429 is retried before it is reported as failed
+            initial_backoff: Seconds to wait before the first retry, doubled on every attempt
+            max_backoff: Upper bound in seconds for the wait between retries
+        
+        Returns:
+            Dict with the number of indexed documents and the list of per-document failures
+        """
+        summary = {"indexed": 0, "failed": []}
+        # _id -> content_path of the documents sent and not yet reported back
+        content_paths = {}
+        for ok, item in helpers.streaming_bulk(
+            self.es,
+            self._bulk_actions(records, content_paths),
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            max_retries=max_retries,
+            initial_backoff=initial_backoff,
+            max_backoff=max_backoff,
+            raise_on_error=False,
+            raise_on_exception=False
+        ):
+            result = next(iter(item.values()))
+            content_path = content_paths.pop(result.get("_id"), None)
+            if ok:
+                summary["indexed"] += 1
+                continue
+            
+            # Failures are reported and the stream keeps going
+            failure = {
+                "_id": result.get("_id"),
+                "status": result.get("status"),
+                "error": result.get("error"),
+                "content_path": content_path
             }
-        }
+            summary["failed"].append(failure)
+            logger.warning(f"Failed to index document: {failure}")
+        
+        logger.info(f"Bulk indexing finished: {summary['indexed']} indexed, {len(summary['failed'])} failed")
+        return summary
+    
+    def delete_documents(self, doc_ids, chunk_size=500):
+        """
+        Deletes documents by _id with the bulk API; ids that are already gone count as deleted
+        
+        Returns:
+            Dict with the number of deleted documents and the list of ids that could not be deleted
+        """
+        actions = ({"_op_type": "delete", "_index": self.index_name, "_id": doc_id} for doc_id in doc_ids)
+        
+        summary = {"deleted": 0, "failed": []}
+        for ok, item in helpers.streaming_bulk(
+            self.es, actions, chunk_size=chunk_size, raise_on_error=False, raise_on_exception=False
+        ):
+            result = item["delete"]
+            if ok or result.get("status") == 404:
+                summary["deleted"] += 1
+            else:
+                summary["failed"].append(result.get("_id"))
+                logger.warning(f"Failed to delete document {result.get('_id')}: {result.get('error')}")
+        
+        logger.info(f"Deleted {summary['deleted']} documents, {len(summary['failed'])} failed")
+        return summary
+    
+    def search_similar(self, query_embedding, modality=None, k=5, include_fields=None):
+        """Searches for similar contents, fetching only the default fields plus include_fields"""
+        query = build_knn_query(query_embedding, modality, k)
         
         try:
             response = self.es.search(
                 index=self.index_name,
                 query=query,
-                size=k            
+                size=k,
+                source=source_filter(include_fields)
             )
             
-            # Return both source data and score for each hit
-            return [{
-                **hit["_source"],
-                "score": hit["_score"]
-            } for hit in response["hits"]["hits"]]
+            return parse_hits(response)
         
         except Exception as e:
             print(f"Error: processing search_evidence: {str(e)}")
-            return "Error generating search evidence"
\ No newline at end of file
+            return "Error generating search evidence"
+    
+    def search_similar_many(self, query_embeddings, modality=None, k=5, include_fields=None):
+        """
+        Searches for similar contents for many query vectors in a single _msearch round trip
+        
+        Args:
+            query_embeddings: (N, 1024) matrix, one query vector per row
+            modality: Modality filter applied to every query, or a list with one filter per query
+            k: Number of results per query
+            include_fields: Extra _source fields to fetch, e.g. ["embedding"]
+        
+        Returns:
+            List of N result lists in query order; a query that fails gets an empty list
+        """
+        searches = build_msearch_body(self.index_name, query_embeddings, modality, k, include_fields)
+        
+        try:
+            response = self.es.msearch(searches=searches)
+            return parse_msearch(response)
+        
+        except Exception as e:
+            logger.error(f"Error: processing multi-search: {str(e)}")
+            return [[] for _ in range(len(searches) // 2)]
+    
+    def search_hybrid(self, query_text, query_embedding, modality=None, k=5, fusion="rrf", knn_weight=0.5,
+                      text_weight=0.5, rank_constant=60, include_fields=None):
+        """
+        Searches with BM25 on description and kNN on embedding, fused server-side in one request
+        
+        Args:
+            query_text: Text matched against the description field
+            query_embedding: Query vector, usually the embedding of query_text
+            modality: Modality filter applied to both clauses
+            k: Number of results
+            fusion: "rrf" (reciprocal rank fusion) or "linear" (weighted sum of the two scores)
+            knn_weight: Weight of the kNN score with linear fusion
+            text_weight: Weight of the BM25 score with linear fusion
+            rank_constant: RRF rank constant
+            include_fields: Extra _source fields to fetch, e.g. ["embedding"]
+        """
+        body = build_hybrid_search(query_text, query_embedding, modality, k, fusion, knn_weight, text_weight,
+                                   rank_constant)
+        
+        try:
+            response = self.es.search(index=self.index_name, source=source_filter(include_fields), **body)
+            return parse_hybrid_hits(response, rank_constant)
+        
+        except Exception as e:
+            logger.error(f"Error: processing hybrid search: {str(e)}")
+            return []
\ No newline at end of file
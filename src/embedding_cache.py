@@ -0,0 +1,124 @@
+import os
+import hashlib
+import logging
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "~/.cache/mmrag/embeddings"
+
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk cache of embeddings
+
+    Vectors live in a memory-mapped float32 slab with one row per entry. A parallel
+    slab holds each row's 32-byte key and another its last access tick, so the
+    key -> row index is rebuilt from disk on open and nothing has to be rewritten
+    on every insert. When the slab is full the least recently used row is reused.
+    Meant for a single writer process.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=100_000, dim=1024):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_entries = max_entries
+        self.dim = dim
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        layouts = {
+            "vectors.npy": (np.float32, (max_entries, dim)),
+            "keys.npy": (np.uint8, (max_entries, 32)),
+            "access.npy": (np.int64, (max_entries,))
+        }
+        self._drop_stale_slabs(layouts)
+        self.vectors, self.keys, self.access = (
+            self._open_slab(name, dtype, shape) for name, (dtype, shape) in layouts.items()
+        )
+
+        # Access tick 0 marks an empty row
+        used = np.flatnonzero(self.access)
+        self.index = {self.keys[row].tobytes(): int(row) for row in used}
+        self.free_rows = [int(row) for row in np.flatnonzero(self.access == 0)[::-1]]
+        self.tick = int(self.access.max()) if len(used) else 0
+        self.hits = 0
+        self.misses = 0
+        logger.info(f"Embedding cache opened at {self.cache_dir} with {len(self.index)} entries")
+
+    def _drop_stale_slabs(self, layouts):
+        """Removes every slab when any of them does not match the requested layout"""
+        paths = [os.path.join(self.cache_dir, name) for name in layouts]
+        for path, (dtype, shape) in zip(paths, layouts.values()):
+            if not os.path.exists(path):
+                continue
+            slab = np.load(path, mmap_mode="r")
+            stale = slab.shape != shape or slab.dtype != dtype
+            del slab
+            if stale:
+                logger.warning(f"Cache slab {path} does not match the requested layout, recreating the cache")
+                for other in paths:
+                    if os.path.exists(other):
+                        os.remove(other)
+                return
+
+    def _open_slab(self, name, dtype, shape):
+        """Opens a memory-mapped .npy slab, creating it when missing"""
+        path = os.path.join(self.cache_dir, name)
+        if os.path.exists(path):
+            return np.load(path, mmap_mode="r+")
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    @staticmethod
+    def make_key(input_item, modality, model_fingerprint):
+        """Builds the cache key of an input: its content hash, modality and model fingerprint"""
+        content_hash = hashlib.sha256()
+        if modality == "text":
+            content_hash.update(input_item.encode("utf-8"))
+        else:
+            with open(input_item, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    content_hash.update(block)
+
+        key = hashlib.sha256()
+        key.update(model_fingerprint.encode())
+        key.update(modality.encode())
+        key.update(content_hash.digest())
+        return key.digest()
+
+    def get(self, key):
+        """Returns a copy of the cached vector for a key, or None"""
+        row = self.index.get(key)
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.tick += 1
+        self.access[row] = self.tick
+        return np.array(self.vectors[row])
+
+    def put(self, key, vector):
+        """Stores a vector, evicting the least recently used entry when full"""
+        row = self.index.get(key)
+        if row is None:
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                row = int(np.argmin(self.access))
+                del self.index[self.keys[row].tobytes()]
+            self.index[key] = row
+
+        # The row is only marked live once its vector and key are written
+        self.access[row] = 0
+        self.vectors[row] = vector
+        self.keys[row] = np.frombuffer(key, dtype=np.uint8)
+        self.tick += 1
+        self.access[row] = self.tick
+
+    def flush(self):
+        """Flushes the slabs to disk"""
+        for slab in (self.vectors, self.keys, self.access):
+            slab.flush()
+
+    def __len__(self):
+        return len(self.index)
@@ -1,6 +1,13 @@
 import os
 import cv2
+import time
+import wave
+import zipfile
+import tempfile
+import hashlib
 from io import BytesIO
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from torch.hub import download_url_to_file
 
@@ -10,79 +17,455 @@ from PIL import Image
 from imagebind import data
 from imagebind.models import imagebind_model
 
-from torchvision import transforms
-
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIM = 1024
+CHECKPOINT_PATH = "~/.cache/torch/checkpoints/imagebind_huge.pth"
+
+# Rough peak memory (MB) a single item costs during a no-grad forward pass:
+# input tensor plus the largest trunk activations (tokens x width x MLP ratio
+# and the attention matrix). Used to size micro-batches to a memory budget.
+ITEM_MEMORY_MB = {
+    "vision": 12,  # 257 tokens x 1280 dims, 16 heads
+    "audio": 18,   # 3 clips x 229 tokens x 768 dims, 12 heads
+    "text": 2,     # 77 tokens x 1024 dims, 16 heads
+    "depth": 3     # 197 tokens x 384 dims, 8 heads
+}
+
+# Inputs used to measure how closely int8 embeddings track the fp32 ones
+# when no modality-specific samples are given; the file modalities are
+# synthesized by write_quantization_samples
+DEFAULT_QUANTIZATION_SAMPLES = {
+    "text": [
+        "Why so serious?",
+        "A sinister laugh captured near the crime scene",
+        "Playing cards scattered across a rain-soaked alley"
+    ]
+}
+
+# CLIP normalization used by data.load_and_transform_vision_data
+VISION_MEAN = (0.48145466, 0.4578275, 0.40821073)
+VISION_STD = (0.26862954, 0.26130258, 0.27577711)
+
+@contextmanager
+def init_empty_weights():
+    """
+    Registers the parameters of modules built inside the block on the meta device
+    
+    Like accelerate's init_empty_weights: only parameter registration is redirected,
+    so buffers and plain tensor ops in constructors (ImageBind computes its drop-path
+    schedule with linspace(...).item()) still run on CPU, while no weight memory is
+    allocated and parameter initialization is a no-op.
+    """
+    register_parameter = torch.nn.Module.register_parameter
+    
+    def register_empty_parameter(module, name, param):
+        register_parameter(module, name, param)
+        if param is not None:
+            module._parameters[name] = torch.nn.Parameter(param.to("meta"), requires_grad=param.requires_grad)
+    
+    torch.nn.Module.register_parameter = register_empty_parameter
+    try:
+        yield
+    finally:
+        torch.nn.Module.register_parameter = register_parameter
+
+def load_and_transform_vision_data_fast(image_paths, device="cpu", size=224, draft_scale=2):
+    """
+    Loads images as normalized 224x224 tensors, decoding JPEGs at reduced size
+    
+    Matches data.load_and_transform_vision_data (bicubic resize of the short side,
+    center crop, CLIP normalization) up to resampling differences. JPEG draft mode
+    lets the decoder skip DCT detail and return the image at 1/2, 1/4 or 1/8 scale,
+    no smaller than draft_scale x size, and the center crop and resize happen in one
+    resampling pass, so no full-resolution RGB copy is made.
+    """
+    batch = torch.empty((len(image_paths), 3, size, size), dtype=torch.float32)
+    for i, path in enumerate(image_paths):
+        with Image.open(path) as img:
+            # Only JPEG implements draft; other formats decode at full size
+            img.draft("RGB", (draft_scale * size, draft_scale * size))
+            img = img.convert("RGB")
+            
+            # Same output grid as Resize(size) then CenterCrop(size), mapped back onto the decoded image
+            width, height = img.size
+            if width <= height:
+                resized_width, resized_height = size, int(size * height / width)
+            else:
+                resized_width, resized_height = int(size * width / height), size
+            left = int(round((resized_width - size) / 2.0)) * width / resized_width
+            top = int(round((resized_height - size) / 2.0)) * height / resized_height
+            box = (left, top, left + size * width / resized_width, top + size * height / resized_height)
+            img = img.resize((size, size), Image.BICUBIC, box=box)
+        
+        batch[i] = torch.from_numpy(np.array(img)).permute(2, 0, 1)
+    
+    batch.div_(255)
+    batch.sub_(torch.tensor(VISION_MEAN).view(1, 3, 1, 1)).div_(torch.tensor(VISION_STD).view(1, 3, 1, 1))
+    return batch.to(device)
+
+def _decode_depth_map(path, size):
+    """Decodes one depth map to a size x size uint8 array"""
+    with Image.open(path) as img:
+        if img.mode != "L":
+            img = img.convert("L")
+        # Bilinear with antialiasing, as transforms.Resize does on PIL images
+        return np.asarray(img.resize((size, size), Image.BILINEAR))
+
+def load_and_transform_depth_data(depth_paths, device="cpu", size=224, chunk_size=64, workers=None):
+    """
+    Loads depth maps as single-channel size x size tensors in [0, 1]
+    
+    Maps are decoded and resized straight to uint8 by a thread pool (Pillow releases
+    the GIL while decoding and resampling), at most chunk_size at a time so a large
+    set never holds more than one chunk of decoded maps. Each chunk is copied to the
+    target device and scaled into one preallocated float tensor in a single op.
+    """
+    try:
+        # Check file existence
+        for path in depth_paths:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Depth map file not found: {path}")
+        
+        batch = torch.empty((len(depth_paths), 1, size, size), dtype=torch.float32, device=device)
+        chunk = np.empty((min(chunk_size, len(depth_paths)), size, size), dtype=np.uint8)
+        workers = workers or min(8, os.cpu_count() or 1)
+        
+        with ThreadPoolExecutor(workers) as pool:
+            for chunk_start in range(0, len(depth_paths), chunk_size):
+                paths = depth_paths[chunk_start:chunk_start + chunk_size]
+                for i, depth_map in enumerate(pool.map(_decode_depth_map, paths, [size] * len(paths))):
+                    chunk[i] = depth_map
+                
+                maps = torch.from_numpy(chunk[:len(paths)]).to(device)
+                batch[chunk_start:chunk_start + len(paths), 0] = maps.float().div_(255)
+        
+        return batch
+        
+    except Exception as e:
+        logger.error(f"🚨 - Error processing depth map: {str(e)}")
+        raise
+
+def preprocess(input_data, modality, device="cpu", fast_vision=False):
+    """Converts a list of inputs of one modality to the batched tensor ImageBind expects"""
+    processors = {
+        "vision": load_and_transform_vision_data_fast if fast_vision else data.load_and_transform_vision_data,
+        "audio": data.load_and_transform_audio_data,
+        "text": data.load_and_transform_text,
+        "depth": load_and_transform_depth_data
+    }
+    
+    # For images: [batch_size, channels, height, width] 
+    # For audio: [batch_size, clips, channels, mel_bins, frames] 
+    # For text: [batch_size, sequence_length]
+    # For depth: [batch_size, 1, height, width]
+    return processors[modality](input_data, device)
+
+def write_quantization_samples(directory, modalities, count=3, seed=0):
+    """
+    Writes synthetic inputs for the file-based modalities to measure int8 agreement on
+
+    Returns:
+        Dict of modality -> list of file paths; text gets DEFAULT_QUANTIZATION_SAMPLES
+    """
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for modality in modalities:
+        if modality == "text":
+            samples[modality] = list(DEFAULT_QUANTIZATION_SAMPLES["text"])
+            continue
+        
+        paths = []
+        for i in range(count):
+            path = os.path.join(directory, f"{modality}_{i}.{'wav' if modality == 'audio' else 'png'}")
+            if modality == "audio":
+                # A few seconds of tones plus noise at 16 kHz
+                t = np.arange(16000 * 3) / 16000
+                signal = sum(0.2 * np.sin(2 * np.pi * f * t) for f in rng.uniform(110, 2000, size=3))
+                signal = signal + 0.05 * rng.standard_normal(len(t))
+                with wave.open(path, "wb") as wav:
+                    wav.setnchannels(1)
+                    wav.setsampwidth(2)
+                    wav.setframerate(16000)
+                    wav.writeframes((np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes())
+            elif modality in ("vision", "depth"):
+                # Smooth noise upsampled from a coarse grid, closer to a photo than per-pixel static
+                channels = 3 if modality == "vision" else 1
+                coarse = rng.integers(0, 256, size=(16, 16, channels), dtype=np.uint8)
+                image = Image.fromarray(coarse[:, :, 0] if channels == 1 else coarse)
+                image.resize((320, 240), Image.BILINEAR).save(path)
+            else:
+                raise ValueError(f"No default quantization samples for modality: {modality}")
+            paths.append(path)
+        samples[modality] = paths
+    return samples
+
 class EmbeddingGenerator:
     """Generates multimodal embeddings using ImageBind"""
     
-    def __init__(self, device="cpu"):
+    def __init__(self, device="cpu", memory_budget_mb=512, cache=None, modalities=None, warmup=False,
+                 quantize=False, quantization_samples=None, fast_vision=False, model=None,
+                 checkpoint_path=CHECKPOINT_PATH, model_config=None):
+        """
+        Args:
+            model: Prebuilt ImageBind model, used instead of loading a checkpoint
+            checkpoint_path: ImageBind state dict to load; the default one is downloaded when missing
+            model_config: ImageBindModel keyword arguments matching the checkpoint (default: imagebind_huge)
+        """
         self.device = device
-        self.model = self._load_model()
+        self.checkpoint_path = os.path.expanduser(checkpoint_path)
+        self.model_config = model_config
+        self.memory_budget_mb = memory_budget_mb
+        self.cache = cache
+        # None loads every modality; otherwise only the listed ones are built
+        self.modalities = list(modalities) if modalities is not None else None
+        self.warmup = warmup
+        if model is None:
+            self.model = self._load_model()
+            self.model_fingerprint = self._checkpoint_fingerprint(self.checkpoint_path)
+        else:
+            # A prebuilt model (e.g. random weights for benchmarks) skips the checkpoint entirely
+            if self.modalities is not None:
+                self._trim_modalities(model)
+            self.model = model.eval().to(device)
+            self.model_fingerprint = f"custom:{type(model).__name__}"
+        # The draft-mode loader resamples differently, so its vectors get their own cache entries
+        self.fast_vision = fast_vision
+        if fast_vision:
+            self.model_fingerprint += ":fast-vision"
+        self.quantization_agreement = {}
+        if quantize:
+            self._quantize(quantization_samples)
+
+    def _quantize(self, samples=None):
+        """
+        Applies dynamic int8 quantization to the Linear layers of the trunks and logs the cosine agreement with fp32
+        
+        Args:
+            samples: Dict of modality -> inputs covering every loaded modality; synthetic ones by default
+        """
+        if torch.device(self.device).type != "cpu":
+            raise ValueError(f"Dynamic int8 quantization is only supported on CPU, not {self.device}")
+        
+        loaded = self.modalities if self.modalities is not None else list(ITEM_MEMORY_MB)
+        if samples is not None:
+            missing = set(loaded) - set(samples)
+            if missing:
+                raise ValueError(f"No quantization samples for loaded modalities: {sorted(missing)}")
+        
+        with tempfile.TemporaryDirectory(prefix="quantization_samples_") as sample_dir:
+            if samples is None:
+                samples = write_quantization_samples(sample_dir, loaded)
+            samples = {modality: samples[modality] for modality in loaded}
+            reference = {modality: self._embed(inputs, modality) for modality, inputs in samples.items()}
+            
+            torch.ao.quantization.quantize_dynamic(
+                self.model.modality_trunks, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+            quantized_embeddings = {modality: self._embed(inputs, modality) for modality, inputs in samples.items()}
+        # Quantized vectors differ slightly, so they must not share cache entries with fp32 ones
+        self.model_fingerprint += ":int8"
+        
+        for modality in samples:
+            quantized = quantized_embeddings[modality]
+            cosine = np.sum(reference[modality] * quantized, axis=1) / (
+                np.linalg.norm(reference[modality], axis=1) * np.linalg.norm(quantized, axis=1)
+            )
+            self.quantization_agreement[modality] = {"mean": float(cosine.mean()), "min": float(cosine.min())}
+            logger.info(f"int8 {modality} cosine agreement with fp32: mean {cosine.mean():.4f}, min {cosine.min():.4f}")
+        
+        logger.info("🤖 ImageBind trunks quantized to int8")
         
     def _load_model(self):
         """Initialize and test the ImageBind model."""
-        checkpoint_path = "~/.cache/torch/checkpoints/imagebind_huge.pth"
-        os.makedirs(os.path.expanduser("~/.cache/torch/checkpoints"), exist_ok=True)
-
-        if not os.path.exists(os.path.expanduser(checkpoint_path)):
+        checkpoint_path = self.checkpoint_path
+        
+        # Only the default huge checkpoint is downloaded; any other path must exist
+        if not os.path.exists(checkpoint_path) and checkpoint_path == os.path.expanduser(CHECKPOINT_PATH):
+            os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
             print("Downloading ImageBind weights...")
             download_url_to_file(
                 "https://dl.fbaipublicfiles.com/imagebind/imagebind_huge.pth",
-                os.path.expanduser(checkpoint_path)
+                checkpoint_path
             )
             
         try:
-            checkpoint_path = os.path.expanduser("~/.cache/torch/checkpoints/imagebind_huge.pth")
+            start_time = time.perf_counter()
         
             # Check if file exists
             if not os.path.exists(checkpoint_path):
                 raise FileNotFoundError(f"Checkpoint not found: {checkpoint_path}")
                 
-            model = imagebind_model.imagebind_huge(pretrained=False)
-            model.load_state_dict(torch.load(checkpoint_path))
+            # Build the architecture with meta parameters so no weights are allocated
+            # until the unused modalities have been removed
+            with init_empty_weights():
+                if self.model_config is not None:
+                    model = imagebind_model.ImageBindModel(**self.model_config)
+                else:
+                    model = imagebind_model.imagebind_huge(pretrained=False)
+            if self.modalities is not None:
+                self._trim_modalities(model)
+            
+            # Buffers are real CPU tensors; persistent ones are replaced from the checkpoint below
+            expected_keys = set(model.state_dict().keys())
+            
+            # Tensors are memory-mapped from the checkpoint and assigned to the model
+            # as-is, so weights are paged in on demand and never copied a second time
+            state_dict = torch.load(self._mmap_checkpoint_path(checkpoint_path),
+                                    map_location="cpu", mmap=True, weights_only=True)
+            state_dict = {key: value for key, value in state_dict.items() if key in expected_keys}
+            model.load_state_dict(state_dict, assign=True)
             model.eval().to(self.device)
+            del state_dict
             
-            # Quick test with empty text input
-            logger.info("Testing model with sample input...")
-            test_input = data.load_and_transform_text([""], self.device)
-            with torch.no_grad():
-                _ = model({"text": test_input})
+            # Optional test with empty text input, which also warms up the kernels
+            if self.warmup and (self.modalities is None or "text" in self.modalities):
+                logger.info("Testing model with sample input...")
+                test_input = data.load_and_transform_text([""], self.device)
+                with torch.no_grad():
+                    _ = model({"text": test_input})
             
-            logger.info("🤖 ImageBind model initialized successfully")
+            elapsed = time.perf_counter() - start_time
+            logger.info(f"🤖 ImageBind model initialized successfully ({', '.join(model.modality_trunks.keys())}) in {elapsed:.2f}s")
             return model
         except Exception as e:
             logger.error(f"🚨 Model initialization failed: {str(e)}")
             raise
+
+    @staticmethod
+    def _mmap_checkpoint_path(checkpoint_path):
+        """Returns a checkpoint path torch.load can memory-map, converting a legacy-format checkpoint once"""
+        # Only the zip format written by torch.save since 1.6 can be memory-mapped
+        if zipfile.is_zipfile(checkpoint_path):
+            return checkpoint_path
+        
+        converted_path = os.path.splitext(checkpoint_path)[0] + ".mmap.pth"
+        if not os.path.exists(converted_path):
+            logger.info(f"Converting checkpoint to a memory-mappable copy: {converted_path}")
+            state_dict = torch.load(checkpoint_path, map_location="cpu", weights_only=True)
+            torch.save(state_dict, converted_path + ".tmp")
+            os.replace(converted_path + ".tmp", converted_path)
+        return converted_path
+
+    def _trim_modalities(self, model):
+        """Drops the preprocessors, trunks, heads and postprocessors of modalities that were not requested"""
+        unknown = set(self.modalities) - set(model.modality_trunks.keys())
+        if unknown:
+            raise ValueError(f"Unknown modalities: {sorted(unknown)}")
+        
+        for modules in (model.modality_preprocessors, model.modality_trunks,
+                        model.modality_heads, model.modality_postprocessors):
+            for modality in list(modules.keys()):
+                if modality not in self.modalities:
+                    del modules[modality]
+
+    @staticmethod
+    def _checkpoint_fingerprint(checkpoint_path, sample_bytes=1024 * 1024):
+        """Cheap fingerprint of the checkpoint: its size plus a hash of its first and last MB"""
+        fingerprint = hashlib.sha256()
+        size = os.path.getsize(checkpoint_path)
+        fingerprint.update(str(size).encode())
+        with open(checkpoint_path, "rb") as f:
+            fingerprint.update(f.read(sample_bytes))
+            f.seek(max(0, size - sample_bytes))
+            fingerprint.update(f.read(sample_bytes))
+        return fingerprint.hexdigest()
     
     def generate_embedding(self, input_data, modality):
         """Generates embedding for different modalities"""
-        processors = {
-            "vision": lambda x: data.load_and_transform_vision_data(x, self.device),
-            "audio": lambda x: data.load_and_transform_audio_data(x, self.device),
-            "text": lambda x: data.load_and_transform_text(x, self.device),
-            "depth": self.process_depth
-        }
-        
         try:
             # Input type verification
             if not isinstance(input_data, list):
                 raise ValueError(f"Input data must be a list. Received: {type(input_data)}")
-                
-            # Convert input data to a tensor format that the model can process
-            # For images: [batch_size, channels, height, width] 
-            # For audio: [batch_size, channels, time] 
-            # For text: [batch_size, sequence_length]
-            inputs = {modality: processors[modality](input_data)}
-            with torch.no_grad():
-                embedding = self.model(inputs)[modality]
-            return embedding.squeeze(0).cpu().numpy()
+            
+            embedding = self._embed_batch(input_data, modality)
+            return embedding[0] if len(embedding) == 1 else embedding
         except Exception as e:
             logger.error(f"Error generating {modality} embedding: {str(e)}", exc_info=True)
             raise
+
+    def _embed_batch(self, input_data, modality):
+        """Embeds a list of inputs, going through the cache when one is configured"""
+        if self.cache is None:
+            return self._embed(input_data, modality)
+        return self._embed_cached(input_data, modality)
+
+    def _embed_cached(self, input_data, modality):
+        """Serves cached embeddings and runs the model only for the inputs missing from the cache"""
+        keys = [self.cache.make_key(item, modality, self.model_fingerprint) for item in input_data]
+        embeddings = [self.cache.get(key) for key in keys]
+        
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            computed = self._embed([input_data[i] for i in misses], modality)
+            for i, embedding in zip(misses, computed):
+                self.cache.put(keys[i], embedding)
+                embeddings[i] = embedding
+            self.cache.flush()
+        
+        return np.stack(embeddings)
+
+    def _embed(self, input_data, modality):
+        """Runs the model on a list of inputs and returns an (N, 1024) array"""
+        if self.modalities is not None and modality not in self.modalities:
+            raise ValueError(f"Modality '{modality}' was not loaded. Loaded modalities: {self.modalities}")
+        
+        # Convert input data to a tensor format that the model can process
+        return self.embed_tensors(preprocess(input_data, modality, self.device, self.fast_vision), modality)
+
+    def embed_tensors(self, tensors, modality):
+        """Runs the model on an already preprocessed batch and returns an (N, 1024) array"""
+        with torch.no_grad():
+            embedding = self.model({modality: tensors.to(self.device)})[modality]
+        return embedding.cpu().numpy()
+
+    def generate_embeddings(self, inputs, modality, batch_size=None):
+        """
+        Generates an (N, 1024) float32 embedding matrix, one row per input, in input order
+        
+        An input that cannot be loaded is logged and its row is filled with NaN,
+        so the rest of its micro-batch is still embedded
+        """
+        if not isinstance(inputs, list):
+            raise ValueError(f"Inputs must be a list. Received: {type(inputs)}")
+        if modality not in ITEM_MEMORY_MB:
+            raise ValueError(f"Unsupported modality: {modality}")
+
+        batch_size = batch_size or self.batch_size_for(modality)
+        embeddings = np.empty((len(inputs), EMBEDDING_DIM), dtype=np.float32)
+
+        # Preprocess and run one micro-batch at a time so decoded inputs and
+        # activations never exceed the memory budget
+        for start in range(0, len(inputs), batch_size):
+            chunk = inputs[start:start + batch_size]
+            try:
+                embeddings[start:start + len(chunk)] = self._embed_batch(chunk, modality)
+            except Exception as e:
+                logger.warning(f"⚠️ {modality} micro-batch at {start} failed ({str(e)}), checking its inputs one by one")
+                self._embed_readable(chunk, modality, embeddings[start:start + len(chunk)])
+
+        return embeddings
+
+    def _embed_readable(self, chunk, modality, out):
+        """Embeds the inputs of a failed micro-batch that load on their own into out, leaving NaN rows for the rest"""
+        readable = []
+        for i, item in enumerate(chunk):
+            try:
+                preprocess([item], modality, self.device, self.fast_vision)
+                readable.append(i)
+            except Exception as e:
+                logger.error(f"❌ Skipping unreadable {modality} input {str(item)[:80]!r}: {str(e)}")
+                out[i] = np.nan
+        
+        # An error that remains once the unreadable inputs are gone is not an input problem
+        if readable:
+            out[readable] = self._embed_batch([chunk[i] for i in readable], modality)
+
+    def batch_size_for(self, modality):
+        """Largest micro-batch that fits the memory budget for a modality"""
+        return max(1, int(self.memory_budget_mb // ITEM_MEMORY_MB[modality]))
     
 
     def process_vision(self, image_path):
@@ -97,24 +480,6 @@ class EmbeddingGenerator:
         """Processes text"""
         return data.load_and_transform_text([text], self.device)
     
-    def process_depth(self, depth_paths, device="cpu"):
-        """Custom processing for depth maps"""
-        try:
-            # Check file existence
-            for path in depth_paths:
-                if not os.path.exists(path):
-                    raise FileNotFoundError(f"Depth map file not found: {path}")
-            
-            # Load and transform
-            depth_images = [Image.open(path).convert("L") for path in depth_paths]
-            
-            transform = transforms.Compose([
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-            ])
-            
-            return torch.stack([transform(img) for img in depth_images]).to(device)
-            
-        except Exception as e:
-            logger.error(f"🚨 - Error processing depth map: {str(e)}")
-            raise
\ No newline at end of file
+    def process_depth(self, depth_paths, device=None):
+        """Custom processing for depth maps, on the generator's device unless another is given"""
+        return load_and_transform_depth_data(depth_paths, device or self.device)
\ No newline at end of file
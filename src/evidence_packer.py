@@ -0,0 +1,151 @@
+import re
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Word runs and single punctuation marks; the estimate counts a token per 4 characters of a word
+_PIECES = re.compile(r"\w+|[^\w\s]")
+ELLIPSIS = "…"
+
+
+class TokenCounter:
+    """
+    Counts and truncates prompt text in model tokens
+
+    Uses tiktoken's encoding for the model when it is installed. Otherwise the count
+    is estimated from word pieces (about 4 characters per token), which slightly
+    overestimates English text so packed prompts stay within the budget.
+    """
+
+    def __init__(self, model="gpt-4"):
+        self.encoding = None
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            logger.info("ℹ️ tiktoken not installed, estimating token counts")
+
+    @staticmethod
+    def _piece_tokens(piece):
+        return max(1, math.ceil(len(piece) / 4))
+
+    def count(self, text):
+        """Returns the number of tokens in text"""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return sum(self._piece_tokens(m.group()) for m in _PIECES.finditer(text))
+
+    def truncate(self, text, max_tokens):
+        """Returns the longest prefix of text that fits in max_tokens"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+        used = 0
+        for m in _PIECES.finditer(text):
+            cost = self._piece_tokens(m.group())
+            if used + cost > max_tokens:
+                # Keep the part of a long word that still fits
+                return text[:m.start() + (max_tokens - used) * 4].rstrip()
+            used += cost
+        return text
+
+
+def _document_key(hit):
+    """Identifies the document behind a hit, so the same one found by several queries is listed once"""
+    for field in ("id", "_id", "content_digest", "content_path"):
+        value = hit.get(field)
+        if value:
+            return value
+    return hit.get("description")
+
+
+class EvidencePacker:
+    """
+    Packs search results into a prompt section that fits a token budget
+
+    Hits are deduplicated by document across modalities, keeping the best score and
+    the list of queries that found each one, then ranked by score. Lines are added in
+    rank order until the budget is used; the description of the last line that does
+    not fit is truncated when at least min_description_tokens of it remain.
+    """
+
+    def __init__(self, token_budget=1500, model="gpt-4", min_description_tokens=16, counter=None):
+        self.token_budget = token_budget
+        self.min_description_tokens = min_description_tokens
+        self.counter = counter or TokenCounter(model)
+
+    def rank(self, evidence_results):
+        """Returns the unique hits as dicts with modalities, score and description, best first"""
+        documents = {}
+        for modality, results in evidence_results.items():
+            for hit in results or []:
+                key = _document_key(hit)
+                score = hit.get("score", 0) or 0
+                entry = documents.get(key)
+                if entry is None:
+                    documents[key] = {
+                        "modalities": [modality],
+                        "score": score,
+                        "description": hit.get("description", "No description")
+                    }
+                else:
+                    if modality not in entry["modalities"]:
+                        entry["modalities"].append(modality)
+                    entry["score"] = max(entry["score"], score)
+        return sorted(documents.values(), key=lambda entry: entry["score"], reverse=True)
+
+    @staticmethod
+    def _line(rank, entry, description):
+        modalities = ", ".join(m.upper() for m in entry["modalities"])
+        return f"{rank}. [{modalities}] {description} (Similarity: {entry['score']:.2f})"
+
+    def pack(self, evidence_results):
+        """
+        Formats the ranked evidence within the token budget
+
+        Returns:
+            (text, stats) where stats counts the candidate hits, unique documents,
+            included and truncated lines and the tokens used
+        """
+        ranked = self.rank(evidence_results)
+        lines, used, truncated = [], 0, 0
+        for entry in ranked:
+            line = self._line(len(lines) + 1, entry, entry["description"])
+            cost = self.counter.count(line) + (1 if lines else 0)  # The newline joining it
+            if self.token_budget is None or used + cost <= self.token_budget:
+                lines.append(line)
+                used += cost
+                continue
+
+            # Truncate the description into what is left, if enough of it survives
+            separator = 1 if lines else 0
+            overhead = self.counter.count(self._line(len(lines) + 1, entry, ELLIPSIS)) + separator
+            room = self.token_budget - used - overhead
+            while room >= self.min_description_tokens:
+                description = self.counter.truncate(entry["description"], room) + ELLIPSIS
+                line = self._line(len(lines) + 1, entry, description)
+                cost = self.counter.count(line) + separator
+                if used + cost <= self.token_budget:
+                    lines.append(line)
+                    used += cost
+                    truncated += 1
+                    break
+                # Tokens can merge differently at the cut, so retry a little shorter
+                room -= 1
+            break
+
+        stats = {
+            "candidates": sum(len(results or []) for results in evidence_results.values()),
+            "unique": len(ranked),
+            "included": len(lines),
+            "truncated": truncated,
+            "tokens": used
+        }
+        return "\n".join(lines), stats
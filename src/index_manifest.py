@@ -0,0 +1,128 @@
+import os
+import json
+import hashlib
+
+DEFAULT_MANIFEST_DIR = "~/.cache/mmrag/manifests"
+
+
+def hash_file(path):
+    """Returns the sha256 hex digest of a file's contents"""
+    content_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def document_id(content_hash, modality, content_path):
+    """
+    Derives a stable document _id from a content hash, modality and normalized content_path
+
+    The path is part of the _id so identical files at different paths keep their own
+    documents, each with its own description and content_path.
+    """
+    path = os.path.abspath(content_path)
+    return hashlib.sha256(f"{modality}\0{content_hash}\0{path}".encode()).hexdigest()
+
+
+def fields_hash(item):
+    """Hashes the stored fields that do not come from the file, so editing them also triggers a re-index"""
+    fields = {"input": item["input"], "description": item["description"], "metadata": item.get("metadata")}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IndexManifest:
+    """
+    Local record of what has been indexed, used to re-index incrementally
+
+    One entry per content_path holds the file's size, mtime, content hash, the
+    model fingerprint it was embedded with and the resulting document _id. A file
+    whose size and mtime are unchanged is skipped without being read; one that was
+    only touched is re-hashed and skipped if its content is the same. Because the
+    _id is derived from content, modality and path, re-indexing a file overwrites
+    its document instead of duplicating it.
+    """
+
+    def __init__(self, index_name, manifest_dir=DEFAULT_MANIFEST_DIR):
+        self.path = os.path.join(os.path.expanduser(manifest_dir), f"{index_name}.json")
+        self.entries = self._load()
+
+    def _load(self):
+        """Loads the manifest entries, keyed by content_path"""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def save(self):
+        """Writes the manifest atomically"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(self.path + ".tmp", self.path)
+
+    def plan(self, items, model_fingerprint):
+        """
+        Splits items into the ones to (re-)index and the document ids to delete
+
+        Args:
+            items: Ingestion items (see IngestionPipeline.run) whose content_path is a file
+            model_fingerprint: Fingerprint of the model the embeddings come from
+
+        Returns:
+            (changed, stale_ids, pending): items to embed, each with its "id" set; _ids of
+            documents whose sources vanished or changed; and the manifest entry of every
+            current item, to record once the run is done
+        """
+        changed, pending = [], {}
+        live_ids = set()
+
+        for item in items:
+            path = item["content_path"]
+            stat = os.stat(path)
+            entry = self.entries.get(path)
+            item_fields = fields_hash(item)
+            current = (
+                entry is not None
+                and entry["model"] == model_fingerprint
+                and entry["modality"] == item["modality"]
+                and entry["fields"] == item_fields
+                # Entries written with another _id scheme are re-indexed under the current one
+                and entry["id"] == document_id(entry["hash"], item["modality"], path)
+            )
+
+            if current and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+                pending[path] = entry
+                live_ids.add(entry["id"])
+                continue
+
+            content_hash = hash_file(path)
+            doc_id = document_id(content_hash, item["modality"], path)
+            pending[path] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "hash": content_hash,
+                "model": model_fingerprint,
+                "modality": item["modality"],
+                "fields": item_fields,
+                "id": doc_id
+            }
+            live_ids.add(doc_id)
+            if current and entry["hash"] == content_hash:
+                # Only touched: the stored document is still right
+                continue
+            changed.append(dict(item, id=doc_id))
+
+        stale_ids = {entry["id"] for entry in self.entries.values()} - live_ids
+        return changed, sorted(stale_ids), pending
+
+    def update(self, pending, failed_paths=(), undeleted_ids=()):
+        """
+        Replaces the entries with those of the current run
+
+        Failed paths get no entry, so the next run retries them. Entries of stale
+        documents that could not be deleted are kept, so the next run retries the delete.
+        """
+        kept = {path: entry for path, entry in self.entries.items() if entry["id"] in set(undeleted_ids)}
+        kept.update((path, entry) for path, entry in pending.items() if path not in set(failed_paths))
+        self.entries = kept
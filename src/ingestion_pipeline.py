@@ -0,0 +1,206 @@
+import logging
+import queue
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import torch
+
+from embedding_generator import preprocess
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def _init_decode_worker():
+    """Keeps each decode process on one thread so workers do not oversubscribe the CPU"""
+    torch.set_num_threads(1)
+
+
+def _decode(input_item, modality, fast_vision=False):
+    """Decodes and transforms a single input into its model-ready tensor"""
+    return preprocess([input_item], modality, "cpu", fast_vision)[0]
+
+
+class IngestionPipeline:
+    """
+    Three-stage ingestion pipeline: parallel decode, batched inference, bulk writes
+
+    Decoding runs in a process pool, inference in a single thread that groups
+    decoded items into modality-homogeneous batches, and writing in a thread that
+    streams embedded records into ElasticsearchManager.bulk_index. The stages are
+    connected by bounded queues, so a slow stage applies backpressure upstream
+    instead of letting decoded tensors pile up in memory.
+    """
+
+    def __init__(self, generator, es_manager, decode_workers=None, batch_size=None, queue_size=64,
+                 bulk_options=None):
+        self.generator = generator
+        self.es_manager = es_manager
+        self.decode_workers = decode_workers or max(1, multiprocessing.cpu_count() - 1)
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.bulk_options = bulk_options or {}
+        self._cache_lock = threading.Lock()
+
+    def run(self, items):
+        """
+        Ingests items and returns the bulk summary, including decode and inference failures
+
+        Args:
+            items: Iterable of dicts with "input" (file path, or the text itself for text),
+                "modality", "description", "metadata", "content_path" and optionally the document "id"
+        """
+        decoded_queue = queue.Queue(maxsize=self.queue_size)
+        embedded_queue = queue.Queue(maxsize=self.queue_size)
+        failures = []
+        summary = {}
+
+        def write():
+            try:
+                summary.update(self.es_manager.bulk_index(iter(embedded_queue.get, _DONE), **self.bulk_options))
+            except Exception as e:
+                logger.error(f"❌ Bulk writer failed: {str(e)}")
+                failures.append({"content_path": None, "stage": "write", "error": str(e)})
+                # Keep draining so the upstream stages never block on a full queue
+                for _ in iter(embedded_queue.get, _DONE):
+                    pass
+
+        writer = threading.Thread(target=write, name="bulk-writer")
+        inference = threading.Thread(
+            target=self._infer, args=(decoded_queue, embedded_queue, failures), name="inference"
+        )
+        writer.start()
+        inference.start()
+
+        try:
+            self._decode_all(items, decoded_queue, embedded_queue, failures)
+        finally:
+            decoded_queue.put(_DONE)
+            inference.join()
+            writer.join()
+
+        if self.generator.cache is not None:
+            self.generator.cache.flush()
+
+        summary.setdefault("indexed", 0)
+        summary.setdefault("failed", [])
+        summary["failed"].extend(failures)
+        logger.info(f"✅ Ingestion finished: {summary['indexed']} indexed, {len(summary['failed'])} failed")
+        return summary
+
+    def run_incremental(self, items, manifest):
+        """
+        Indexes only new or changed items and deletes the documents of vanished ones
+
+        Args:
+            items: The complete current set of items, each with a content_path file
+            manifest: IndexManifest recording what was indexed by previous runs
+
+        Returns:
+            The run summary plus the number of unchanged items and deleted documents
+        """
+        items = list(items)
+        changed, stale_ids, pending = manifest.plan(items, self.generator.model_fingerprint)
+        logger.info(f"🔄 {len(changed)} new or changed, {len(items) - len(changed)} unchanged, "
+                    f"{len(stale_ids)} stale documents")
+
+        summary = self.run(changed) if changed else {"indexed": 0, "failed": []}
+        deleted = self.es_manager.delete_documents(stale_ids) if stale_ids else {"deleted": 0, "failed": []}
+
+        failed_paths = {failure.get("content_path") for failure in summary["failed"]}
+        if None in failed_paths:
+            # A failure that cannot be traced to its item leaves every changed item to be retried
+            failed_paths = {item["content_path"] for item in changed}
+        manifest.update(pending, failed_paths, undeleted_ids=deleted["failed"])
+        manifest.save()
+
+        summary["unchanged"] = len(items) - len(changed)
+        summary["deleted"] = deleted["deleted"]
+        summary["failed"].extend({"_id": doc_id, "stage": "delete"} for doc_id in deleted["failed"])
+        return summary
+
+    def _decode_all(self, items, decoded_queue, embedded_queue, failures):
+        """Submits decode jobs with a bounded number in flight and forwards results in submission order"""
+        pending = deque()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.decode_workers, mp_context=context,
+                                 initializer=_init_decode_worker) as pool:
+            for item in items:
+                try:
+                    key, embedding = self._cached_embedding(item)
+                except Exception as e:
+                    logger.error(f"❌ Error reading {item['modality']} {item['content_path']}: {str(e)}")
+                    failures.append({"content_path": item["content_path"], "stage": "decode", "error": str(e)})
+                    continue
+
+                if embedding is not None:
+                    embedded_queue.put(self._record(item, embedding))
+                    continue
+
+                pending.append((item, key, pool.submit(_decode, item["input"], item["modality"], self.generator.fast_vision)))
+                if len(pending) >= self.queue_size:
+                    self._forward_decoded(pending.popleft(), decoded_queue, failures)
+
+            while pending:
+                self._forward_decoded(pending.popleft(), decoded_queue, failures)
+
+    def _forward_decoded(self, pending_item, decoded_queue, failures):
+        """Waits for one decode job and hands its tensor to the inference stage"""
+        item, key, future = pending_item
+        try:
+            decoded_queue.put((item, key, future.result()))
+        except Exception as e:
+            logger.error(f"❌ Error decoding {item['modality']} {item['content_path']}: {str(e)}")
+            failures.append({"content_path": item["content_path"], "stage": "decode", "error": str(e)})
+
+    def _infer(self, decoded_queue, embedded_queue, failures):
+        """Groups decoded tensors by modality and embeds each group once it reaches the batch size"""
+        batches = {}
+        try:
+            for item, key, tensor in iter(decoded_queue.get, _DONE):
+                batch = batches.setdefault(item["modality"], [])
+                batch.append((item, key, tensor))
+                if len(batch) >= (self.batch_size or self.generator.batch_size_for(item["modality"])):
+                    self._embed_batch(batches.pop(item["modality"]), embedded_queue, failures)
+
+            for batch in batches.values():
+                self._embed_batch(batch, embedded_queue, failures)
+        finally:
+            embedded_queue.put(_DONE)
+
+    def _embed_batch(self, batch, embedded_queue, failures):
+        """Runs one modality-homogeneous batch through the model and queues the records"""
+        modality = batch[0][0]["modality"]
+        try:
+            embeddings = self.generator.embed_tensors(torch.stack([tensor for _, _, tensor in batch]), modality)
+        except Exception as e:
+            logger.error(f"❌ Error embedding {modality} batch: {str(e)}")
+            failures.extend(
+                {"content_path": item["content_path"], "stage": "inference", "error": str(e)} for item, _, _ in batch
+            )
+            return
+
+        for (item, key, _), embedding in zip(batch, embeddings):
+            if key is not None:
+                with self._cache_lock:
+                    self.generator.cache.put(key, embedding)
+            embedded_queue.put(self._record(item, embedding))
+
+    def _cached_embedding(self, item):
+        """Returns the cache key of an item and its cached embedding, when the generator has a cache"""
+        cache = self.generator.cache
+        if cache is None:
+            return None, None
+
+        key = cache.make_key(item["input"], item["modality"], self.generator.model_fingerprint)
+        with self._cache_lock:
+            return key, cache.get(key)
+
+    @staticmethod
+    def _record(item, embedding):
+        """Builds the bulk record of an embedded item"""
+        return embedding, item["modality"], item["description"], item.get("metadata"), item["content_path"], item.get("id")
@@ -1,31 +1,190 @@
 import os
-from openai import OpenAI
+import time
+import inspect
+from itertools import combinations
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, AsyncOpenAI
 import logging
 from dotenv import load_dotenv
+from evidence_packer import EvidencePacker
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL = "gpt-4-turbo-preview"
+MODALITIES = ["vision", "audio", "text", "depth"]
+
+def _delta_text(chunk):
+    """Returns the text carried by a streamed completion chunk (or a cached response string)"""
+    if isinstance(chunk, str):
+        return chunk
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
+
+class ReportStream:
+    """
+    Iterator, or async iterator, of report text deltas
+    
+    The full text is assembled while the deltas are consumed: once iteration ends,
+    `report` holds it and `metrics` the time to first token, total generation time
+    (seconds, measured from the request) and number of deltas.
+    """
+    
+    def __init__(self, chunks, started, on_complete=None, cached=False):
+        self._chunks = chunks
+        self._started = started
+        self._on_complete = on_complete
+        self._parts = []
+        self.report = None
+        self.metrics = {"cached": cached}
+    
+    def _add(self, delta):
+        if not self._parts:
+            self.metrics["time_to_first_token"] = time.perf_counter() - self._started
+        self._parts.append(delta)
+    
+    def _finish(self):
+        self.report = "".join(self._parts)
+        self.metrics["total_time"] = time.perf_counter() - self._started
+        self.metrics["chunks"] = len(self._parts)
+        logger.info(f"⏱️ Time to first token: {self.metrics.get('time_to_first_token', 0):.2f}s, "
+                    f"total: {self.metrics['total_time']:.2f}s")
+        if self._on_complete is not None:
+            self._on_complete(self.report)
+    
+    def __iter__(self):
+        for chunk in self._chunks:
+            delta = _delta_text(chunk)
+            if delta:
+                self._add(delta)
+                yield delta
+        self._finish()
+    
+    async def __aiter__(self):
+        chunks = self._chunks
+        if inspect.isawaitable(chunks):
+            chunks = await chunks
+        
+        if hasattr(chunks, "__aiter__"):
+            async for chunk in chunks:
+                delta = _delta_text(chunk)
+                if delta:
+                    self._add(delta)
+                    yield delta
+        else:
+            for chunk in chunks:
+                delta = _delta_text(chunk)
+                if delta:
+                    self._add(delta)
+                    yield delta
+        self._finish()
+
 class LLMAnalyzer:
     """Evidence analyzer using GPT-4"""
     
-    def __init__(self):
-        load_dotenv()
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    def analyze_evidence(self, evidence_results):
+    def __init__(self, cache=None, token_budget=1500, scheduler=None):
         """
-        Analyzes multimodal search results and generates a report
-        
         Args:
-            evidence_results: Dict with results by modality
-            {
-                'vision': [...],
-                'audio': [...],
-                'text': [...],
-                'depth': [...]
-            }
+            cache: Optional LLMResponseCache; identical requests are then answered from it
+            token_budget: Maximum prompt tokens for the evidence list (None for no limit)
+            scheduler: Optional RequestScheduler that paces and retries the API calls
         """
+        load_dotenv()
+        self.scheduler = scheduler
+        # The scheduler does the retrying, so the client must not retry on its own
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0 if scheduler else 2)
+        self.cache = cache
+        self.packer = EvidencePacker(token_budget, model=MODEL)
+        self._async_client = None
+    
+    @property
+    def async_client(self):
+        """AsyncOpenAI client, created on first use"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._async_client
+    
+    def _cached(self, messages, temperature, max_tokens, bypass_cache):
+        """Returns the cache key of a request and its cached response, when a cache is configured"""
+        if self.cache is None:
+            return None, None
+        key = self.cache.make_key(MODEL, messages, temperature, max_tokens)
+        cached = None if bypass_cache else self.cache.get(key)
+        if cached is not None:
+            logger.info("♻️ LLM response served from cache")
+        return key, cached
+    
+    def _store(self, key, content):
+        """Stores a fresh response; a bypassed call still refreshes the cached entry"""
+        if key is not None and content:
+            self.cache.put(key, content)
+    
+    def _create(self, priority, **request):
+        """Sends a chat completion request, through the scheduler when one is configured"""
+        if self.scheduler is None:
+            return self.client.chat.completions.create(model=MODEL, **request)
+        
+        estimated_tokens = request["max_tokens"] + sum(
+            self.packer.counter.count(message["content"]) for message in request["messages"]
+        )
+        return self.scheduler.call(
+            lambda: self.client.chat.completions.create(model=MODEL, **request),
+            estimated_tokens,
+            priority
+        )
+    
+    def _complete(self, messages, temperature, max_tokens, bypass_cache=False, priority="batch"):
+        """Runs a chat completion, going through the response cache unless bypassed"""
+        key, cached = self._cached(messages, temperature, max_tokens, bypass_cache)
+        if cached is not None:
+            return cached
+        
+        response = self._create(
+            priority,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        content = response.choices[0].message.content
+        self._store(key, content)
+        return content
+    
+    def _stream(self, messages, temperature, max_tokens, bypass_cache=False, priority="batch"):
+        """Starts a streamed chat completion and returns its ReportStream; a cache hit is one delta"""
+        started = time.perf_counter()
+        key, cached = self._cached(messages, temperature, max_tokens, bypass_cache)
+        if cached is not None:
+            return ReportStream([cached], started, cached=True)
+        
+        chunks = self._create(
+            priority,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        return ReportStream(chunks, started, lambda report: self._store(key, report))
+    
+    def _stream_async(self, messages, temperature, max_tokens, bypass_cache=False):
+        """Like _stream, but the returned ReportStream is consumed with async for"""
+        started = time.perf_counter()
+        key, cached = self._cached(messages, temperature, max_tokens, bypass_cache)
+        if cached is not None:
+            return ReportStream([cached], started, cached=True)
+        
+        # The request is sent when iteration starts
+        chunks = self.async_client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        return ReportStream(chunks, started, lambda report: self._store(key, report))
+    
+    def _evidence_request(self, evidence_results):
+        """Builds the messages and sampling parameters of the forensic report request"""
         # Format evidence for the prompt
         evidence_summary = self._format_evidence(evidence_results)
 
@@ -57,21 +216,37 @@ If there is **insufficient evidence**, specify exactly what is missing and sugge
 
 This report must be **direct and definitive**—avoid speculation and provide a final, actionable determination of the suspect's identity.
 """
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a forensic detective specialized in multimodal evidence analysis."
+            },
+            {"role": "user", "content": prompt}
+        ]
+        return {"messages": messages, "temperature": 0.2, "max_tokens": 1000}
+    
+    def analyze_evidence(self, evidence_results, bypass_cache=False, stream=False, priority="interactive"):
+        """
+        Analyzes multimodal search results and generates a report
+        
+        Args:
+            evidence_results: Dict with results by modality
+            {
+                'vision': [...],
+                'audio': [...],
+                'text': [...],
+                'depth': [...]
+            }
+            bypass_cache: Call the API even when the response cache has this request
+            stream: Return a ReportStream of text deltas instead of waiting for the whole report
+            priority: Scheduler lane, "interactive" or "batch"
+        """
+        request = self._evidence_request(evidence_results)
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a forensic detective specialized in multimodal evidence analysis."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=1000
-            )
+            if stream:
+                return self._stream(**request, bypass_cache=bypass_cache, priority=priority)
             
-            report = response.choices[0].message.content
+            report = self._complete(**request, bypass_cache=bypass_cache, priority=priority)
             logger.info("\n📋 Forensic Report Generated:")
             logger.info("=" * 50)
             logger.info(report)
@@ -83,20 +258,19 @@ This report must be **direct and definitive**—avoid speculation and provide a
             logger.error(f"Error generating report: {str(e)}")
             return None
     
+    def analyze_evidence_async(self, evidence_results, bypass_cache=False):
+        """Generates the report as a ReportStream of text deltas to consume with async for (not paced by the scheduler)"""
+        return self._stream_async(**self._evidence_request(evidence_results), bypass_cache=bypass_cache)
+    
     def _format_evidence(self, evidence_results):
-        """Formats evidence for the prompt"""
-        formatted = []
-        
-        for modality, results in evidence_results.items():
-            formatted.append(f"\n{modality.upper()}:")
-            for i, result in enumerate(results, 1):
-                description = result.get('description', 'No description')
-                similarity = result.get('score', 0)
-                formatted.append(f"{i}. {description} (Similarity: {similarity:.2f})")
-        
-        return "\n".join(formatted)
+        """Formats evidence for the prompt: unique documents ranked by score, within the token budget"""
+        formatted, stats = self.packer.pack(evidence_results)
+        logger.info(f"📦 Packed {stats['included']}/{stats['unique']} unique results "
+                    f"({stats['candidates']} hits, {stats['truncated']} truncated) into {stats['tokens']} tokens")
+        return formatted
 
-    def analyze_cross_modal_connections(self, results_a, modality_a, results_b, modality_b):
+    def analyze_cross_modal_connections(self, results_a, modality_a, results_b, modality_b, bypass_cache=False,
+                                        priority="batch"):
         """Analyzes specific connections between two different modalities"""
         prompt = f"""Analyze the relationship between the following evidence from different modalities:
 
@@ -115,8 +289,7 @@ Please identify:
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
+            analysis = self._complete(
                 messages=[
                     {
                         "role": "system",
@@ -125,10 +298,10 @@ Please identify:
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=500,
+                bypass_cache=bypass_cache,
+                priority=priority
             )
-            
-            analysis = response.choices[0].message.content
             logger.info(f"\n🔍 Cross-Modal Analysis ({modality_a} x {modality_b}):")
             logger.info(analysis)
             
@@ -136,4 +309,39 @@ Please identify:
             
         except Exception as e:
             logger.error(f"Error: in cross-modal analysis: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+    
+    def analyze_all_cross_modal_connections(self, evidence_results, modalities=None, max_concurrency=3, bypass_cache=False):
+        """
+        Runs the cross-modal analysis for every pair of modalities concurrently
+        
+        Args:
+            evidence_results: Dict with results by modality, as for analyze_evidence
+            modalities: Modalities to pair (default: vision, audio, text, depth); those without results are skipped
+            max_concurrency: Maximum number of requests in flight at once
+            bypass_cache: Call the API even when the response cache has a request
+            
+        Returns:
+            Dict mapping each (modality_a, modality_b) pair to its analysis (None when it failed)
+        """
+        modalities = [m for m in (modalities or MODALITIES) if evidence_results.get(m)]
+        pairs = list(combinations(modalities, 2))
+        if not pairs:
+            logger.warning("⚠️ Cross-modal analysis needs results for at least two modalities")
+            return {}
+        
+        logger.info(f"🔄 Analyzing {len(pairs)} modality pairs, {max_concurrency} at a time")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = {
+                (a, b): executor.submit(
+                    self.analyze_cross_modal_connections,
+                    evidence_results[a], a, evidence_results[b], b, bypass_cache
+                )
+                for a, b in pairs
+            }
+            analyses = {pair: future.result() for pair, future in futures.items()}
+        
+        failed = sum(analysis is None for analysis in analyses.values())
+        logger.info(f"✅ Cross-modal analysis done in {time.perf_counter() - started:.2f}s ({failed} failed)")
+        return analyses
\ No newline at end of file
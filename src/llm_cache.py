@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = "~/.cache/mmrag/llm_responses.sqlite"
+
+
+class LLMResponseCache:
+    """
+    SQLite cache of chat completion responses
+
+    Responses are keyed by a hash of the model, messages, temperature and
+    max_tokens, so identical requests are answered locally. Entries older than
+    ttl_seconds are ignored and removed; past max_entries or max_bytes the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=7 * 24 * 3600, max_entries=1000,
+                 max_bytes=50 * 1024 * 1024):
+        self.path = os.path.expanduser(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self.db.commit()
+
+    @staticmethod
+    def make_key(model, messages, temperature, max_tokens):
+        """Hashes the parameters that determine a completion"""
+        request = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached response for a key, or None when missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self.db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.db.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        """Stores a response and evicts expired and least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, len(response.encode("utf-8")), now, now)
+            )
+            self._evict(now)
+            self.db.commit()
+
+    def _evict(self, now):
+        """Drops expired entries, then the least recently used ones until both limits hold"""
+        self.db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+
+        count, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Keep the most recently used entries that fit and drop everything older
+        kept, kept_bytes, full = 0, 0, False
+        for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY accessed DESC").fetchall():
+            full = full or kept >= self.max_entries or kept_bytes + size > self.max_bytes
+            if full:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            else:
+                kept += 1
+                kept_bytes += size
+
+    def stats(self):
+        """Returns the hit and miss counters and the number of stored responses"""
+        with self._lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        """Closes the database"""
+        self.db.close()
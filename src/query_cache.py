@@ -0,0 +1,112 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_DIR = "~/.cache/mmrag/query_embeddings"
+
+
+class QueryEmbeddingCache:
+    """
+    In-memory LRU cache of query-time embeddings, optionally spilled to disk
+
+    Unlike EmbeddingCache it never reads file contents to build a key: text is keyed
+    by its normalized string and files by path, mtime and size, so a repeated query
+    is answered without touching the model or the input file. Entries are scoped by
+    modality and model fingerprint. When a `spill` cache (an EmbeddingCache) is
+    given, stored vectors are also written there and memory misses fall back to it,
+    so repeated queries survive restarts. Plugs into EmbeddingGenerator(cache=...).
+    """
+
+    def __init__(self, max_entries=256, spill=None):
+        self.max_entries = max_entries
+        self.spill = spill
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def with_spill(cls, spill_dir=DEFAULT_SPILL_DIR, max_entries=256, spill_entries=10_000):
+        """Creates a cache that spills to an EmbeddingCache in spill_dir"""
+        return cls(max_entries, EmbeddingCache(spill_dir, max_entries=spill_entries))
+
+    @staticmethod
+    def normalize_text(text):
+        """Collapses whitespace and lowercases, as the ImageBind tokenizer does before encoding"""
+        return " ".join(text.split()).lower()
+
+    @classmethod
+    def make_key(cls, input_item, modality, model_fingerprint):
+        """Builds the key of a query: normalized text, or file path + mtime + size, scoped per modality"""
+        if modality == "text":
+            identity = cls.normalize_text(input_item)
+        else:
+            stat = os.stat(input_item)
+            identity = f"{os.path.abspath(input_item)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+
+        key = hashlib.sha256()
+        key.update(model_fingerprint.encode())
+        key.update(modality.encode())
+        key.update(identity.encode("utf-8"))
+        return key.digest()
+
+    def get(self, key):
+        """Returns a copy of the cached vector for a key, or None"""
+        with self._lock:
+            vector = self.entries.get(key)
+            if vector is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return vector.copy()
+
+            vector = self.spill.get(key) if self.spill is not None else None
+            if vector is None:
+                self.misses += 1
+                return None
+
+            self.spill_hits += 1
+            self.hits += 1
+            self._remember(key, vector)
+            return vector.copy()
+
+    def put(self, key, vector):
+        """Stores a vector, evicting the least recently used entry when full"""
+        with self._lock:
+            self._remember(key, np.array(vector, dtype=np.float32))
+            if self.spill is not None:
+                self.spill.put(key, vector)
+
+    def _remember(self, key, vector):
+        """Inserts a vector at the most recently used end of the LRU"""
+        self.entries[key] = vector
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def flush(self):
+        """Flushes the spill cache to disk"""
+        if self.spill is not None:
+            self.spill.flush()
+
+    def stats(self):
+        """Returns the hit and miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "spill_hits": self.spill_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries)
+        }
+
+    def __len__(self):
+        return len(self.entries)
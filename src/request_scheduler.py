@@ -0,0 +1,189 @@
+import time
+import heapq
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITIES = {"interactive": INTERACTIVE, "batch": BATCH}
+
+
+class TokenBucket:
+    """
+    Refilling budget of units per minute (requests or tokens)
+
+    Holds at most `capacity` units (default: one minute's worth) and refills
+    continuously. A request larger than the capacity is clamped to it, so it waits
+    for a full bucket instead of forever. Not thread-safe on its own.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.available = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Returns the seconds until `amount` units are available"""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.available
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount):
+        """Consumes units; the balance may go negative when actual usage exceeds the estimate"""
+        self.available -= min(amount, self.capacity)
+
+    def give_back(self, amount):
+        """Returns units that were reserved but not used"""
+        self.available = min(self.capacity, self.available + amount)
+
+
+def retry_after_seconds(headers):
+    """Reads the server's requested delay from retry-after-ms or retry-after (seconds or HTTP date)"""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+class RequestScheduler:
+    """
+    Admits API calls within requests-per-minute and tokens-per-minute limits
+
+    Each call reserves one request and its estimated tokens from two token buckets
+    before it is sent. Waiting calls are admitted in priority order, interactive
+    before batch and first-come within a lane, so a report a user is waiting for
+    overtakes a queue of background analyses. Rate limit (429), server (5xx) and
+    connection errors are retried with jittered exponential backoff; when the
+    server sends retry-after headers, that delay is used as the floor and holds
+    back every other call too.
+
+    burst_seconds sizes the buckets: the default lets a minute's budget go out at
+    once, as the API allows, while a smaller value spreads calls more evenly.
+    """
+
+    def __init__(self, requests_per_minute=500, tokens_per_minute=30000, max_retries=5,
+                 base_delay=1.0, max_delay=60.0, jitter=0.25, burst_seconds=60):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute * burst_seconds / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute * burst_seconds / 60)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.paused_until = 0.0
+        # Updated under _condition, since calls run on many threads
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "waited_seconds": 0.0}
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = 0
+
+    def _admit(self, estimated_tokens, priority):
+        """Blocks until this call is first in line and both buckets cover it, then reserves them"""
+        started = time.monotonic()
+        with self._condition:
+            self._sequence += 1
+            ticket = (priority, self._sequence)
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] == ticket:
+                        wait = max(
+                            self.paused_until - now,
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(estimated_tokens, now)
+                        )
+                        if wait <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(estimated_tokens)
+                            self.stats["requests"] += 1
+                            break
+                    else:
+                        wait = None
+                    # A new arrival or a finished call wakes the waiters, so an interactive
+                    # call can take the head of the line from a batch call that is waiting
+                    self._condition.wait(timeout=wait)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self.stats["waited_seconds"] += time.monotonic() - started
+                self._condition.notify_all()
+
+    def _backoff(self, attempt, retry_after):
+        """Returns the delay before a retry: exponential with jitter, never below retry_after"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay * random.uniform(1, 1 + self.jitter)
+
+    def call(self, request, estimated_tokens=0, priority="batch"):
+        """
+        Runs request() once admitted, retrying transient API errors
+
+        Args:
+            request: Zero-argument callable that performs the API call
+            estimated_tokens: Prompt plus maximum completion tokens of the call
+            priority: "interactive" or "batch"
+
+        Returns:
+            What request() returns; the last error is raised when retries run out
+        """
+        lane = PRIORITIES[priority]
+        for attempt in range(self.max_retries + 1):
+            self._admit(estimated_tokens, lane)
+            try:
+                response = request()
+            except (RateLimitError, APIStatusError, APIConnectionError) as e:
+                status = getattr(e, "status_code", None)
+                if attempt == self.max_retries or (status is not None and status != 429 and status < 500):
+                    raise
+
+                response_obj = getattr(e, "response", None)
+                retry_after = retry_after_seconds(getattr(response_obj, "headers", None))
+                delay = self._backoff(attempt, retry_after)
+                with self._condition:
+                    self.stats["retries"] += 1
+                    if status == 429:
+                        self.stats["rate_limited"] += 1
+                        # The server's budget is exhausted for every caller, not just this one
+                        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                        self._condition.notify_all()
+                if status == 429:
+                    logger.warning(f"⏳ Rate limited, retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+                else:
+                    logger.warning(f"⚠️ API error {status or type(e).__name__}, retrying in {delay:.2f}s "
+                                   f"(attempt {attempt + 1}/{self.max_retries})")
+                    time.sleep(delay)
+                continue
+
+            # Settle the token reservation against the actual usage when it is reported
+            usage = getattr(response, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None) is not None:
+                with self._condition:
+                    self.tokens.give_back(estimated_tokens - usage.total_tokens)
+                    self._condition.notify_all()
+            return response
@@ -0,0 +1,60 @@
+# Fields returned by searches unless more are requested; the embedding and any
+# legacy base64 content are left on the server since callers only print and rank hits.
+# The blob digest and size are small and let callers fetch the raw content lazily.
+DEFAULT_SOURCE_FIELDS = ["modality", "description", "content_path", "metadata", "content_digest", "content_size"]
+
+class SearchHit:
+    """Compact search result that also supports dict-style access (hit["description"], hit.get(...))"""
+    
+    __slots__ = ("id", "score", "modality", "description", "content_path", "metadata", "extra")
+    
+    def __init__(self, id, score, modality=None, description=None, content_path=None, metadata=None, extra=None):
+        self.id = id
+        self.score = score
+        self.modality = modality
+        self.description = description
+        self.content_path = content_path
+        self.metadata = metadata
+        self.extra = extra or {}
+    
+    @classmethod
+    def from_hit(cls, hit):
+        """Builds a result from a raw Elasticsearch hit"""
+        source = dict(hit.get("_source") or {})
+        return cls(
+            hit.get("_id"),
+            hit.get("_score"),
+            source.pop("modality", None),
+            source.pop("description", None),
+            source.pop("content_path", None),
+            source.pop("metadata", None),
+            source
+        )
+    
+    def __getitem__(self, key):
+        if key in self.__slots__ and key != "extra":
+            return getattr(self, key)
+        return self.extra[key]
+    
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+    
+    def to_dict(self):
+        """Returns the result as a flat dict, like the raw source merged with the score"""
+        return {
+            "modality": self.modality,
+            "description": self.description,
+            "content_path": self.content_path,
+            "metadata": self.metadata,
+            **self.extra,
+            "score": self.score
+        }
+    
+    def __repr__(self):
+        # RRF-ranked hits come back without a _score
+        score = "None" if self.score is None else f"{self.score:.4f}"
+        return f"SearchHit(id={self.id!r}, score={score}, modality={self.modality!r}, description={self.description!r})"
@@ -0,0 +1,253 @@
+import os
+import json
+import uuid
+import logging
+import numpy as np
+
+from search_hit import SearchHit, DEFAULT_SOURCE_FIELDS
+from blob_store import BlobStore, fetch_content
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = "~/.cache/mmrag/vector_store"
+
+
+def create_vector_backend(backend=None, **kwargs):
+    """Creates the vector backend named by `backend` or the VECTOR_BACKEND env var (elasticsearch or numpy)"""
+    backend = backend or os.getenv("VECTOR_BACKEND", "elasticsearch")
+    if backend == "numpy":
+        return NumpyVectorStore(os.getenv("VECTOR_STORE_DIR", DEFAULT_STORE_DIR), **kwargs)
+    if backend == "elasticsearch":
+        from elastic_manager import ElasticsearchManager
+        return ElasticsearchManager(**kwargs)
+    raise ValueError(f"Unknown vector backend '{backend}'. Use 'elasticsearch' or 'numpy'")
+
+
+class NumpyVectorStore:
+    """
+    In-process vector store with the ElasticsearchManager indexing and search API
+
+    Embeddings are L2-normalized and kept in a memory-mapped float32 matrix next to
+    an int8 modality column, so a search is one matrix-vector product plus an
+    argpartition over the scores: exact cosine top-k, with no cluster. Documents
+    are appended to a JSON-lines file. Scores use the Elasticsearch cosine
+    formula, (1 + cosine) / 2, so they are comparable across backends. Indexing with
+    an existing _id overwrites its row and deleted rows are masked out of searches.
+    Meant for a single writer process.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, dim=1024, initial_capacity=1024, blob_store=None):
+        self.store_dir = os.path.expanduser(store_dir)
+        self.blob_store = blob_store or BlobStore(os.path.join(self.store_dir, "blobs"))
+        self.dim = dim
+        self.index_name = os.path.basename(self.store_dir.rstrip(os.sep))
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        self.documents_path = os.path.join(self.store_dir, "documents.jsonl")
+        self.modalities_path = os.path.join(self.store_dir, "modalities.json")
+        self.documents = self._load_documents()
+        self.modality_names = self._load_modality_names()
+        self.count = len(self.documents)
+        self.rows = {doc["_id"]: row for row, doc in enumerate(self.documents) if not doc.get("deleted")}
+        self._documents_dirty = False
+
+        capacity = max(initial_capacity, self.count)
+        self.vectors = self._open_column("vectors.npy", np.float32, (capacity, dim))
+        self.modality_codes = self._open_column("modalities.npy", np.int8, (capacity,))
+        logger.info(f"Vector store opened at {self.store_dir} with {self.count} documents")
+
+    def _load_documents(self):
+        """Loads the stored documents, one JSON object per line"""
+        if not os.path.exists(self.documents_path):
+            return []
+        with open(self.documents_path, "r") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _load_modality_names(self):
+        """Loads the modality names indexed by their code in the modality column"""
+        if not os.path.exists(self.modalities_path):
+            return []
+        with open(self.modalities_path, "r") as f:
+            return json.load(f)
+
+    def _open_column(self, name, dtype, shape):
+        """Opens a memory-mapped .npy column, creating or growing it to the requested shape"""
+        path = os.path.join(self.store_dir, name)
+        if os.path.exists(path):
+            column = np.load(path, mmap_mode="r+")
+            if column.shape[0] >= shape[0]:
+                return column
+            return self._grow(name, column, shape[0])
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    def _grow(self, name, column, capacity):
+        """Copies a column into a larger memory-mapped file"""
+        path = os.path.join(self.store_dir, name)
+        grown = np.lib.format.open_memmap(
+            path + ".tmp", mode="w+", dtype=column.dtype, shape=(capacity,) + column.shape[1:]
+        )
+        grown[:self.count] = column[:self.count]
+        grown.flush()
+        del grown, column
+        os.replace(path + ".tmp", path)
+        return np.load(path, mmap_mode="r+")
+
+    def _ensure_capacity(self, extra):
+        """Doubles the columns until `extra` more rows fit"""
+        capacity = len(self.vectors)
+        if self.count + extra <= capacity:
+            return
+        while capacity < self.count + extra:
+            capacity *= 2
+        self.vectors = self._grow("vectors.npy", self.vectors, capacity)
+        self.modality_codes = self._grow("modalities.npy", self.modality_codes, capacity)
+
+    def _modality_code(self, modality):
+        """Returns the code of a modality, registering new modalities"""
+        if modality not in self.modality_names:
+            self.modality_names.append(modality)
+            with open(self.modalities_path, "w") as f:
+                json.dump(self.modality_names, f)
+        return self.modality_names.index(modality)
+
+    def _write_documents(self):
+        """Rewrites the documents file after rows were overwritten or deleted"""
+        with open(self.documents_path + ".tmp", "w") as f:
+            for doc in self.documents:
+                f.write(json.dumps(doc) + "\n")
+        os.replace(self.documents_path + ".tmp", self.documents_path)
+        self._documents_dirty = False
+
+    def _append(self, embedding, modality, content=None, description="", metadata=None, content_path=None,
+                doc_id=None):
+        """Writes one row and its document, overwriting the row of an existing doc_id, and returns the id"""
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(embedding)
+        overwrite = doc_id in self.rows
+        if not overwrite:
+            self._ensure_capacity(1)
+
+        row = self.rows[doc_id] if overwrite else self.count
+        self.vectors[row] = embedding / norm if norm > 0 else embedding
+        self.modality_codes[row] = self._modality_code(modality)
+
+        doc = {
+            "_id": doc_id or uuid.uuid4().hex,
+            "modality": modality,
+            "description": description,
+            "metadata": metadata or {},
+            "content_path": content_path
+        }
+        if content:
+            blob = self.blob_store.put(content)
+            doc["content_digest"] = blob["digest"]
+            doc["content_size"] = blob["size"]
+
+        if overwrite:
+            self.documents[row] = doc
+            self._documents_dirty = True
+            return doc["_id"]
+
+        # The row only counts once its document line is written
+        with open(self.documents_path, "a") as f:
+            f.write(json.dumps(doc) + "\n")
+        self.documents.append(doc)
+        self.rows[doc["_id"]] = row
+        self.count += 1
+        return doc["_id"]
+
+    def index_content(self, embedding, modality, content=None, description="", metadata=None, content_path=None,
+                      doc_id=None):
+        """Indexes multimodal content; with a doc_id an existing document is overwritten instead of duplicated"""
+        result = "updated" if doc_id in self.rows else "created"
+        doc_id = self._append(embedding, modality, content, description, metadata, content_path, doc_id)
+        self.flush()
+        return {"result": result, "_id": doc_id, "_index": self.index_name}
+
+    def bulk_index(self, records, **kwargs):
+        """Indexes (embedding, modality, description, metadata, content_path[, _id]) records; bulk tuning options are ignored"""
+        summary = {"indexed": 0, "failed": []}
+        for embedding, modality, description, metadata, content_path, *doc_id in records:
+            try:
+                self._append(embedding, modality, None, description, metadata, content_path, *doc_id)
+                summary["indexed"] += 1
+            except Exception as e:
+                logger.warning(f"Failed to index document {content_path}: {str(e)}")
+                summary["failed"].append({"_id": None, "status": None, "error": str(e), "content_path": content_path})
+        self.flush()
+        return summary
+
+    def delete_documents(self, doc_ids, **kwargs):
+        """Deletes documents by _id; ids that are already gone count as deleted"""
+        summary = {"deleted": 0, "failed": []}
+        for doc_id in doc_ids:
+            row = self.rows.pop(doc_id, None)
+            if row is not None:
+                self.modality_codes[row] = -1
+                self.documents[row] = {"_id": None, "deleted": True}
+                self._documents_dirty = True
+            summary["deleted"] += 1
+        self.flush()
+        logger.info(f"Deleted {summary['deleted']} documents")
+        return summary
+
+    def fetch_content(self, doc):
+        """Returns the raw content of a search hit or document, loading it only when asked"""
+        return fetch_content(doc, self.blob_store)
+
+    def _top_k(self, query_embedding, modality, k):
+        """Returns the rows and cosine similarities of the k nearest documents"""
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(self.dim)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self.vectors[:self.count] @ query
+
+        codes = self.modality_codes[:self.count]
+        if modality:
+            if modality not in self.modality_names:
+                return np.empty(0, dtype=np.int64), scores[:0]
+            mask = codes != self.modality_names.index(modality)
+        else:
+            # Deleted rows have code -1
+            mask = codes < 0
+        scores[mask] = -np.inf
+
+        k = min(k, self.count - int(mask.sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), scores[:0]
+
+        rows = np.argpartition(-scores, k - 1)[:k]
+        rows = rows[np.argsort(-scores[rows])]
+        return rows, scores[rows]
+
+    def _hit(self, row, cosine, include_fields):
+        """Builds a SearchHit for a row, exposing only the requested fields"""
+        doc = self.documents[row]
+        source = {field: doc[field] for field in DEFAULT_SOURCE_FIELDS + list(include_fields or []) if field in doc}
+        if include_fields and "embedding" in include_fields:
+            source["embedding"] = self.vectors[row].tolist()
+        return SearchHit.from_hit({"_id": doc["_id"], "_score": float((1 + cosine) / 2), "_source": source})
+
+    def search_similar(self, query_embedding, modality=None, k=5, include_fields=None):
+        """Searches for similar contents with exact cosine similarity"""
+        rows, scores = self._top_k(query_embedding, modality, k)
+        return [self._hit(row, score, include_fields) for row, score in zip(rows, scores)]
+
+    def search_similar_many(self, query_embeddings, modality=None, k=5, include_fields=None):
+        """Searches for similar contents for many query vectors"""
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dim)
+        modalities = modality if isinstance(modality, (list, tuple)) else [modality] * len(query_embeddings)
+        return [
+            self.search_similar(query_embedding, query_modality, k, include_fields)
+            for query_embedding, query_modality in zip(query_embeddings, modalities)
+        ]
+
+    def flush(self):
+        """Flushes the memory-mapped columns and any pending document changes to disk"""
+        self.vectors.flush()
+        self.modality_codes.flush()
+        if self._documents_dirty:
+            self._write_documents()
+
+    def __len__(self):
+        return len(self.rows)
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+import sys
+import os
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TestAsyncElasticManager:
+    def __init__(self):
+        try:
+            from embedding_generator import EmbeddingGenerator
+            from async_elastic_manager import AsyncElasticsearchManager
+
+            self.manager_class = AsyncElasticsearchManager
+            self.embedding_generator = EmbeddingGenerator(modalities=["text"])
+            logger.info("✅ EmbeddingGenerator initialized successfully")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize components: {e}")
+            raise
+
+    async def _concurrent_search(self, queries):
+        """Runs one search per query concurrently and one after another, returning both timings"""
+        embeddings = [self.embedding_generator.generate_embedding([query], "text") for query in queries]
+
+        async with self.manager_class(connections_per_node=len(queries)) as es_manager:
+            start = time.perf_counter()
+            concurrent = await asyncio.gather(*[es_manager.search_similar(e, k=3) for e in embeddings])
+            concurrent_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            sequential = [await es_manager.search_similar(e, k=3) for e in embeddings]
+            sequential_time = time.perf_counter() - start
+
+        return concurrent, sequential, concurrent_time, sequential_time
+
+    def test_concurrent_search(self):
+        """Test that concurrent searches return the same results as sequential ones"""
+        try:
+            queries = ["Why so serious?", "A sinister laugh", "Playing cards in an alley", "Green hair"]
+            concurrent, sequential, concurrent_time, sequential_time = asyncio.run(self._concurrent_search(queries))
+            logger.info(f"Concurrent: {concurrent_time * 1000:.1f} ms, sequential: {sequential_time * 1000:.1f} ms")
+
+            for query, a, b in zip(queries, concurrent, sequential):
+                if [r["description"] for r in a] != [r["description"] for r in b]:
+                    raise ValueError(f"Concurrent results differ for '{query}'")
+
+            logger.info("✅ Concurrent searches match sequential searches")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in concurrent search test: {e}")
+            return False
+
+    async def _search_unreachable(self, embedding):
+        """Runs every search method against a closed port"""
+        endpoint = os.environ.get("ELASTICSEARCH_ENDPOINT")
+        os.environ["ELASTICSEARCH_ENDPOINT"] = "http://127.0.0.1:9"
+        try:
+            es_manager = self.manager_class()
+        finally:
+            if endpoint is None:
+                os.environ.pop("ELASTICSEARCH_ENDPOINT")
+            else:
+                os.environ["ELASTICSEARCH_ENDPOINT"] = endpoint
+        try:
+            return (
+                await es_manager.search_similar(embedding, k=3),
+                await es_manager.search_similar_many([embedding], k=3),
+                await es_manager.search_hybrid("sinister laugh", embedding, k=3)
+            )
+        finally:
+            await es_manager.close()
+
+    def test_search_errors_return_empty(self):
+        """Test that a failed search returns no hits, like the other search methods, instead of an error string"""
+        try:
+            embedding = self.embedding_generator.generate_embedding(["Why so serious?"], "text")
+            similar, many, hybrid = asyncio.run(self._search_unreachable(embedding))
+            if similar != [] or many != [[]] or hybrid != []:
+                raise ValueError(f"Unexpected results on failure: {similar!r}, {many!r}, {hybrid!r}")
+
+            logger.info("✅ Failed searches return empty results")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in failed search test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting AsyncElasticsearchManager tests...")
+
+    tester = TestAsyncElasticManager()
+
+    logger.info("\n📝 Testing concurrent search...")
+    concurrent_success = tester.test_concurrent_search()
+
+    logger.info("\n📝 Testing failed searches...")
+    error_success = tester.test_search_errors_return_empty()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Concurrent Search: {'✅' if concurrent_success else '❌'}")
+    logger.info(f"Failed Searches: {'✅' if error_success else '❌'}")
+
+    if concurrent_success and error_success:
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import logging
+import tempfile
+import wave
+import sys
+import os
+import numpy as np
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+# Add tests directory for the shared test helpers
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_utils import RecordingManager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TestAudioSegments:
+    def __init__(self):
+        try:
+            from embedding_generator import EmbeddingGenerator
+            from audio_segments import AudioSegmentEmbedder
+
+            self.embedder = AudioSegmentEmbedder(EmbeddingGenerator(modalities=["audio"]), batch_size=2)
+            self.wav_path = self._write_recording(tempfile.mkdtemp(prefix="audio_segments_"))
+            logger.info("✅ AudioSegmentEmbedder initialized successfully")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize components: {e}")
+            raise
+
+    @staticmethod
+    def _write_recording(directory, sample_rate=22050):
+        """Writes 21 s of stereo audio: a 6 s tone, 12 s of silence, then a 3 s tone"""
+        t = np.arange(sample_rate * 6) / sample_rate
+        tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+        signal = np.concatenate([tone, np.zeros(sample_rate * 12), tone[:sample_rate * 3]])
+        samples = (np.repeat(signal[:, None], 2, axis=1) * 32767).astype(np.int16)
+
+        path = os.path.join(directory, "wiretap.wav")
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(samples.tobytes())
+        return path
+
+    def test_silence_and_offsets(self):
+        """Test that silent windows are skipped and segments carry their offsets and parent id"""
+        try:
+            manager = RecordingManager()
+            summary = self.embedder.index_recording(self.wav_path, manager, "Wiretap", {"location": "Gotham"})
+            segments = [record[3] for record in manager.records]
+
+            offsets = [(s["start_seconds"], s["end_seconds"]) for s in segments]
+            if offsets != [(0.0, 6.0), (18.0, 21.0)]:
+                raise ValueError(f"Unexpected segment offsets {offsets}")
+            if len({s["parent_id"] for s in segments}) != 1 or segments[0]["location"] != "Gotham":
+                raise ValueError("Segments do not share the parent id and metadata")
+            if len({record[5] for record in manager.records}) != 2:
+                raise ValueError("Segment ids are not unique")
+            if any(np.asarray(record[0]).shape != (1024,) for record in manager.records):
+                raise ValueError("Segment embeddings have the wrong shape")
+
+            logger.info(f"✅ Indexed {summary['indexed']} segments: {offsets}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in segment test: {e}")
+            return False
+
+    def test_segment_tensor(self):
+        """Test that a window becomes three normalized mel clips and the caller's waveform is left untouched"""
+        try:
+            import torch
+            from audio_segments import segment_to_tensor, SAMPLE_RATE
+
+            t = torch.arange(SAMPLE_RATE * 6) / SAMPLE_RATE
+            waveform = (0.3 * torch.sin(2 * torch.pi * 440 * t) + 0.1).unsqueeze(0)
+            original = waveform.clone()
+            tensor = segment_to_tensor(waveform, SAMPLE_RATE)
+
+            if tuple(tensor.shape) != (3, 1, 128, 204):
+                raise ValueError(f"Unexpected segment tensor shape {tuple(tensor.shape)}")
+            if not torch.equal(waveform, original):
+                raise ValueError("segment_to_tensor modified the input waveform")
+
+            logger.info(f"✅ Segment tensor {tuple(tensor.shape)}, input unchanged")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in segment tensor test: {e}")
+            return False
+
+    def test_long_window(self, window_seconds=10):
+        """Test that a window longer than 6 s is embedded in full rather than cut after three clips"""
+        try:
+            import torch
+            from audio_segments import AudioSegmentEmbedder, segment_to_tensor, SAMPLE_RATE
+
+            embedder = AudioSegmentEmbedder(self.embedder.generator, window_seconds=window_seconds, batch_size=2)
+            t = torch.arange(SAMPLE_RATE * window_seconds) / SAMPLE_RATE
+            waveform = (0.3 * torch.sin(2 * torch.pi * 440 * t)).unsqueeze(0)
+            tail_zeroed = waveform.clone()
+            tail_zeroed[:, SAMPLE_RATE * 6:] = 0
+
+            full = segment_to_tensor(waveform, SAMPLE_RATE, embedder.clips_per_window)
+            cut = segment_to_tensor(tail_zeroed, SAMPLE_RATE, embedder.clips_per_window)
+            if tuple(full.shape) != (5, 1, 128, 204):
+                raise ValueError(f"Unexpected {window_seconds}s window tensor shape {tuple(full.shape)}")
+            if torch.equal(full, cut):
+                raise ValueError(f"Audio after 6 s does not reach the {window_seconds}s window tensor")
+
+            segments = [segment for segment, _ in embedder.embed_segments(self.wav_path)]
+            offsets = [(s["start_seconds"], s["end_seconds"]) for s in segments]
+            if offsets != [(0.0, 10.0), (10.0, 20.0), (20.0, 21.0)]:
+                raise ValueError(f"Unexpected {window_seconds}s segment offsets {offsets}")
+
+            logger.info(f"✅ {window_seconds}s windows use {embedder.clips_per_window} clips: {offsets}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in long window test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting AudioSegmentEmbedder tests...")
+
+    tester = TestAudioSegments()
+
+    logger.info("\n📝 Testing segmented audio embedding...")
+    segments_success = tester.test_silence_and_offsets()
+
+    logger.info("\n📝 Testing segment mel tensors...")
+    tensor_success = tester.test_segment_tensor()
+
+    logger.info("\n📝 Testing windows longer than 6 s...")
+    long_window_success = tester.test_long_window()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Segmented Audio: {'✅' if segments_success else '❌'}")
+    logger.info(f"Segment Tensors: {'✅' if tensor_success else '❌'}")
+    logger.info(f"Long Windows: {'✅' if long_window_success else '❌'}")
+
+    if all([segments_success, tensor_success, long_window_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import json
+import logging
+import sys
+import os
+
+# Add src and benchmarks directories to PYTHONPATH
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+sys.path.append(os.path.join(ROOT_DIR, 'benchmarks'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TestBenchmarks:
+    def __init__(self):
+        import run_benchmarks
+
+        self.benchmarks = run_benchmarks
+
+    def test_quick_run(self):
+        """Test that a quick offline run covers every suite and reports the expected metrics as JSON"""
+        try:
+            args = self.benchmarks.parse_args([
+                "--quick", "--model", "random", "--modalities", "text,depth", "--batch-sizes", "1,2"
+            ])
+            report = json.loads(json.dumps(self.benchmarks.run(args)))
+
+            names = {result["name"] for result in report["results"]}
+            expected = {"embedding/text/embed", "embedding/depth/preprocess", "elasticsearch/bulk_index",
+                        "elasticsearch/search_hybrid", "llm/evidence_prompt", "llm/cross_modal_pairs"}
+            if not expected <= names:
+                raise ValueError(f"Missing cases: {sorted(expected - names)}")
+            for result in report["results"]:
+                latency = result["latency_ms"]
+                if not 0 < latency["p50"] <= latency["p95"] or result["items_per_sec"] <= 0 or result["peak_rss_mb"] <= 0:
+                    raise ValueError(f"Implausible metrics for {result['name']}: {result}")
+            if report["meta"]["model"] != "random" or report["meta"]["elasticsearch"] != "stand-in":
+                raise ValueError(f"Unexpected run metadata {report['meta']}")
+
+            logger.info(f"✅ {len(report['results'])} cases, peak RSS {report['meta']['peak_rss_mb']} MB")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in benchmark run: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting benchmark suite tests...")
+
+    tester = TestBenchmarks()
+
+    logger.info("\n📝 Testing a quick benchmark run...")
+    run_success = tester.test_quick_run()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Quick Run: {'✅' if run_success else '❌'}")
+
+    if run_success:
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
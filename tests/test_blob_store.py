@@ -0,0 +1,90 @@
+import logging
+import tempfile
+import sys
+import os
+import numpy as np
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TestBlobStore:
+    def __init__(self):
+        from blob_store import BlobStore
+
+        self.store_class = BlobStore
+        self.work_dir = tempfile.mkdtemp(prefix="blob_store_")
+        logger.info(f"✅ Using temporary directory {self.work_dir}")
+
+    def test_layouts(self):
+        """Test roundtrip, deduplication and reopening for the sharded and pack layouts"""
+        try:
+            blobs = [os.urandom(size) for size in (10, 700, 700, 3000)] + [b"Why so serious?"]
+            for layout in ("sharded", "pack"):
+                root = os.path.join(self.work_dir, layout)
+                store = self.store_class(root, layout=layout, pack_max_bytes=1024)
+                refs = [store.put(blob) for blob in blobs]
+                if store.put(blobs[0]) != refs[0] or refs[4]["size"] != len(blobs[4]):
+                    raise ValueError(f"{layout}: duplicate put returned a different reference")
+
+                reopened = self.store_class(root, layout=layout, pack_max_bytes=1024)
+                for blob, ref in zip(blobs, refs):
+                    if reopened.get(ref["digest"]) != blob:
+                        raise ValueError(f"{layout}: blob {ref['digest']} changed after reopening")
+
+            packs = [name for name in os.listdir(os.path.join(self.work_dir, "pack")) if name.startswith("pack-")]
+            if len(packs) < 3:
+                raise ValueError(f"Pack files were not rotated: {packs}")
+
+            logger.info(f"✅ Sharded and pack layouts OK ({len(packs)} packs)")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in layout test: {e}")
+            return False
+
+    def test_documents_store_digest(self):
+        """Test that indexed documents keep only the digest and size, and fetch_content loads the bytes lazily"""
+        try:
+            from vector_store import NumpyVectorStore
+
+            store = NumpyVectorStore(os.path.join(self.work_dir, "vectors"), dim=4, initial_capacity=2)
+            content = os.urandom(2048)
+            store.index_content(np.ones(4, dtype=np.float32), "vision", content=content, description="Crime scene")
+
+            hit = store.search_similar(np.ones(4, dtype=np.float32), k=1)[0]
+            if "content" in store.documents[0] or hit["content_size"] != len(content):
+                raise ValueError("Document still carries the raw content")
+            if store.fetch_content(hit) != content:
+                raise ValueError("fetch_content returned different bytes")
+
+            logger.info(f"✅ Document holds digest {hit['content_digest'][:12]}... and fetches lazily")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in document test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting BlobStore tests...")
+
+    tester = TestBlobStore()
+
+    logger.info("\n📝 Testing blob layouts...")
+    layouts_success = tester.test_layouts()
+
+    logger.info("\n📝 Testing digest-only documents...")
+    documents_success = tester.test_documents_store_digest()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Blob Layouts: {'✅' if layouts_success else '❌'}")
+    logger.info(f"Digest-only Documents: {'✅' if documents_success else '❌'}")
+
+    if all([layouts_success, documents_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
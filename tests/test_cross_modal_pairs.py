@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+import sys
+import os
+from types import SimpleNamespace
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SlowCompletions:
+    """Stands in for client.chat.completions: each call takes `delay` seconds and the peak concurrency is recorded"""
+
+    def __init__(self, delay=0.2, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            prompt = kwargs["messages"][-1]["content"]
+            if self.fail_on and self.fail_on in prompt:
+                raise RuntimeError("Simulated API error")
+            message = SimpleNamespace(content=f"Analysis of {len(prompt)} prompt characters")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+class TestCrossModalPairs:
+    def __init__(self):
+        from llm_analyzer import LLMAnalyzer
+
+        os.environ.setdefault("OPENAI_API_KEY", "test-key")
+        self.analyzer_class = LLMAnalyzer
+        self.evidence = {
+            "vision": [{"id": "v1", "description": "Joker card on the vault floor", "score": 0.82}],
+            "audio": [{"id": "a1", "description": "Maniacal laughter", "score": 0.91}],
+            "text": [{"id": "t1", "description": "Why so serious?", "score": 0.88}],
+            "depth": [{"id": "d1", "description": "Figure dancing on the stairs", "score": 0.70}]
+        }
+
+    def _analyzer(self, completions):
+        analyzer = self.analyzer_class()
+        analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return analyzer
+
+    def test_all_pairs_bounded(self):
+        """Test that the six pairs run concurrently, never above max_concurrency, keyed by pair"""
+        try:
+            completions = SlowCompletions()
+            started = time.perf_counter()
+            analyses = self._analyzer(completions).analyze_all_cross_modal_connections(self.evidence, max_concurrency=3)
+            elapsed = time.perf_counter() - started
+
+            expected = [("vision", "audio"), ("vision", "text"), ("vision", "depth"),
+                        ("audio", "text"), ("audio", "depth"), ("text", "depth")]
+            if list(analyses) != expected or not all(analyses.values()):
+                raise ValueError(f"Unexpected pairs {list(analyses)}")
+            if completions.peak != 3:
+                raise ValueError(f"Peak concurrency {completions.peak}, expected 3")
+            # Two waves of 3 calls, against 6 sequential ones
+            if elapsed > 4 * completions.delay:
+                raise ValueError(f"Pairs did not run concurrently ({elapsed:.2f}s)")
+
+            logger.info(f"✅ 6 pairs in {elapsed:.2f}s, peak {completions.peak} in flight")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in all-pairs test: {e}")
+            return False
+
+    def test_subset_and_failures(self):
+        """Test that a subset only pairs its modalities and a failed pair maps to None"""
+        try:
+            completions = SlowCompletions(delay=0.01, fail_on="Maniacal laughter")
+            analyses = self._analyzer(completions).analyze_all_cross_modal_connections(
+                self.evidence, modalities=["audio", "text", "depth"], max_concurrency=2
+            )
+
+            if set(analyses) != {("audio", "text"), ("audio", "depth"), ("text", "depth")}:
+                raise ValueError(f"Unexpected pairs {list(analyses)}")
+            if analyses[("audio", "text")] is not None or analyses[("text", "depth")] is None:
+                raise ValueError("Failure of one pair was not isolated")
+
+            logger.info("✅ Subset and failure handling OK")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in subset test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting cross-modal pair tests...")
+
+    tester = TestCrossModalPairs()
+
+    logger.info("\n📝 Testing all pairs with bounded concurrency...")
+    pairs_success = tester.test_all_pairs_bounded()
+
+    logger.info("\n📝 Testing modality subset and failures...")
+    subset_success = tester.test_subset_and_failures()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"All Pairs: {'✅' if pairs_success else '❌'}")
+    logger.info(f"Subset and Failures: {'✅' if subset_success else '❌'}")
+
+    if all([pairs_success, subset_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,99 @@ from pathlib import Path
 
 # Adiciona o diretório src ao PYTHONPATH
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# elastic_manager imports its sibling modules by name
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class TestIndexMapping:
+    """Index body built from presets, explicit index_options and shard settings; needs no cluster"""
+
+    def test_default_mapping(self):
+        """Test that without options the embedding keeps the Elasticsearch defaults and no settings are sent"""
+        try:
+            from elastic_manager import build_index_mapping, resolve_index_options
+
+            body = build_index_mapping(resolve_index_options(None, None))
+            embedding = body["mappings"]["properties"]["embedding"]
+            if embedding != {"type": "dense_vector", "dims": 1024, "index": True, "similarity": "cosine"}:
+                raise ValueError(f"Unexpected default embedding mapping {embedding}")
+            if "settings" in body:
+                raise ValueError(f"Default mapping should not carry settings: {body['settings']}")
+
+            logger.info("✅ Default mapping leaves index_options and settings unset")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in default mapping test: {e}")
+            return False
+
+    def test_presets(self):
+        """Test that every preset ends up as the embedding's index_options"""
+        try:
+            from elastic_manager import INDEX_PRESETS, build_index_mapping, resolve_index_options
+
+            for name, preset in INDEX_PRESETS.items():
+                embedding = build_index_mapping(resolve_index_options(name, None))["mappings"]["properties"]["embedding"]
+                if embedding.get("index_options") != preset:
+                    raise ValueError(f"Preset '{name}' mapped to {embedding.get('index_options')}")
+                logger.info(f"✅ {name}: {embedding['index_options']}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in presets test: {e}")
+            return False
+
+    def test_override_merges_over_preset(self):
+        """Test that explicit index_options override only the keys they set, leaving the preset intact"""
+        try:
+            from elastic_manager import INDEX_PRESETS, resolve_index_options
+
+            before = dict(INDEX_PRESETS["balanced"])
+            options = resolve_index_options("balanced", {"type": "hnsw", "m": 48})
+            if options != {"type": "hnsw", "m": 48, "ef_construction": before["ef_construction"]}:
+                raise ValueError(f"Unexpected merged options {options}")
+            if INDEX_PRESETS["balanced"] != before:
+                raise ValueError("Overriding a preset modified INDEX_PRESETS")
+
+            logger.info(f"✅ Merged options {options}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in override test: {e}")
+            return False
+
+    def test_unknown_preset(self):
+        """Test that an unknown preset name raises ValueError"""
+        try:
+            from elastic_manager import resolve_index_options
+
+            try:
+                resolve_index_options("fastest", None)
+            except ValueError as e:
+                logger.info(f"✅ Rejected unknown preset: {e}")
+                return True
+            raise AssertionError("Unknown preset was accepted")
+        except Exception as e:
+            logger.error(f"❌ Error in unknown preset test: {e}")
+            return False
+
+    def test_shard_settings(self):
+        """Test that shard and replica counts, including zero replicas, go into the index settings"""
+        try:
+            from elastic_manager import build_index_mapping
+
+            body = build_index_mapping(number_of_shards=3, number_of_replicas=0)
+            if body.get("settings") != {"number_of_shards": 3, "number_of_replicas": 0}:
+                raise ValueError(f"Unexpected settings {body.get('settings')}")
+            body = build_index_mapping(number_of_replicas=2)
+            if body.get("settings") != {"number_of_replicas": 2}:
+                raise ValueError(f"Unexpected settings {body.get('settings')}")
+
+            logger.info(f"✅ Settings {body['settings']}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in shard settings test: {e}")
+            return False
+
 class TestElasticManager:
     def __init__(self):
         try:
@@ -96,6 +185,18 @@ class TestElasticManager:
 def main():
     logger.info("🚀 Starting ElasticManager tests...")
     
+    mapping_tester = TestIndexMapping()
+    
+    logger.info("\n📝 Testing index mapping...")
+    mapping_success = all([
+        mapping_tester.test_default_mapping(),
+        mapping_tester.test_presets(),
+        mapping_tester.test_override_merges_over_preset(),
+        mapping_tester.test_unknown_preset(),
+        mapping_tester.test_shard_settings()
+    ])
+    logger.info(f"Index Mapping: {'✅' if mapping_success else '❌'}")
+    
     tester = TestElasticManager()
     
     # Run tests
@@ -110,7 +211,9 @@ def main():
     logger.info(f"Basic Index/Search: {'✅' if index_search_success else '❌'}")
     logger.info(f"Multiple Modalities: {'✅' if multi_modal_success else '❌'}")
     
-    if index_search_success and multi_modal_success:
+    logger.info(f"Index Mapping: {'✅' if mapping_success else '❌'}")
+    
+    if mapping_success and index_search_success and multi_modal_success:
         logger.info("\n✨ All tests passed successfully!")
     else:
         logger.error("\n❌ Some tests failed")
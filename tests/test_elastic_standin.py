@@ -0,0 +1,191 @@
+import logging
+import sys
+import os
+import numpy as np
+
+# Add src and benchmarks directories to PYTHONPATH
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+sys.path.append(os.path.join(ROOT_DIR, 'benchmarks'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DESCRIPTIONS = [
+    "A sinister laugh echoing in the alley",
+    "Playing cards scattered by the vault",
+    "Why so serious? written on the mirror",
+    "Green footprints on the stairs",
+    "A riddle left at the bank"
+]
+
+class TestElasticStandin:
+    """ElasticsearchManager bulk indexing and search against the in-process Elasticsearch stand-in"""
+
+    def __init__(self):
+        try:
+            from es_standin import ElasticsearchStandin
+            from elastic_manager import ElasticsearchManager
+
+            self.standin = ElasticsearchStandin().__enter__()
+            os.environ["ELASTICSEARCH_ENDPOINT"] = self.standin.url
+            os.environ.pop("ELASTIC_API_KEY", None)
+            self.elastic = ElasticsearchManager(inline_content=True)
+
+            rng = np.random.default_rng(0)
+            self.embeddings = rng.standard_normal((len(DESCRIPTIONS), 1024)).astype(np.float32)
+            logger.info(f"✅ ElasticsearchManager connected to the stand-in at {self.standin.url}")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize managers: {e}")
+            raise
+
+    def close(self):
+        self.standin.__exit__(None, None, None)
+
+    def test_bulk_index(self):
+        """Test streaming bulk indexing of several records"""
+        try:
+            records = (
+                (embedding, "text", description, {"source": "test"}, None)
+                for embedding, description in zip(self.embeddings, DESCRIPTIONS)
+            )
+            summary = self.elastic.bulk_index(records, chunk_size=2)
+            logger.info(f"Bulk indexed {summary['indexed']} documents, {len(summary['failed'])} failed")
+
+            if summary["indexed"] != len(DESCRIPTIONS) or summary["failed"]:
+                raise ValueError(f"Unexpected bulk summary {summary}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in bulk index test: {e}")
+            return False
+
+    def test_bulk_failure_paths(self):
+        """Test that a rejected document is reported with its own content_path, with or without an _id"""
+        try:
+            records = [
+                (self.embeddings[0], "text", "Good", {}, "evidence/good.txt"),
+                (self.embeddings[1][:512], "text", "Truncated", {}, "evidence/truncated.txt"),
+                (self.embeddings[2][:256], "text", "Truncated with id", {}, "evidence/with_id.txt", "doc-with-id")
+            ]
+            summary = self.elastic.bulk_index(iter(records), chunk_size=2)
+
+            failed = {failure["content_path"]: failure for failure in summary["failed"]}
+            if summary["indexed"] != 1 or set(failed) != {"evidence/truncated.txt", "evidence/with_id.txt"}:
+                raise ValueError(f"Failures not traced to their content paths: {summary}")
+            if failed["evidence/with_id.txt"]["_id"] != "doc-with-id" or failed["evidence/with_id.txt"]["status"] != 400:
+                raise ValueError(f"Unexpected failure {failed['evidence/with_id.txt']}")
+
+            logger.info(f"✅ Failures traced to {sorted(failed)}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in bulk failure test: {e}")
+            return False
+
+    def test_search_many(self):
+        """Test that a multi-search returns the same results as individual searches"""
+        try:
+            queries = self.embeddings[:3] + 0.1
+            batched = self.elastic.search_similar_many(queries, k=3)
+            if len(batched) != len(queries):
+                raise ValueError(f"Expected {len(queries)} result lists, got {len(batched)}")
+            for i, (query, results) in enumerate(zip(queries, batched)):
+                single = self.elastic.search_similar(query, k=3)
+                if not results or [r.id for r in results] != [r.id for r in single]:
+                    raise ValueError(f"Multi-search results differ for query {i}")
+
+            logger.info(f"✅ Multi-search returned {len(batched)} result lists")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in multi-search test: {e}")
+            return False
+
+    def test_hybrid_search(self):
+        """Test that both fusion modes rank a keyword match on description among the results"""
+        try:
+            # The vector points at an unrelated document, so only the keyword can surface the laugh
+            for fusion in ("rrf", "linear"):
+                results = self.elastic.search_hybrid("sinister laugh", self.embeddings[3], k=3, fusion=fusion)
+                if not any("laugh" in (r["description"] or "").lower() for r in results):
+                    raise ValueError(f"No keyword match among the {fusion} results")
+                logger.info(f"✅ {fusion} hybrid search: {[r['description'] for r in results]}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in hybrid search test: {e}")
+            return False
+
+    def test_legacy_content_fetch(self):
+        """Test that base64 content left out of a default-filtered hit is fetched by _id"""
+        try:
+            content = b"Legacy evidence stored inline"
+            self.elastic.index_content(self.embeddings[4] * -1, "text", content=content,
+                                       description="Legacy evidence", doc_id="legacy-doc")
+            hit = next(r for r in self.elastic.search_similar(self.embeddings[4] * -1, k=3) if r.id == "legacy-doc")
+            if hit.get("content") is not None or hit.get("content_digest") is not None:
+                raise ValueError("Default search should leave content out of the hit")
+
+            fetched = self.elastic.fetch_content(hit)
+            if fetched != content:
+                raise ValueError(f"Fetched {fetched!r} instead of the legacy content")
+
+            logger.info(f"✅ Fetched {len(fetched)} legacy bytes by _id")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in legacy content test: {e}")
+            return False
+
+    def test_unscored_hit_repr(self):
+        """Test that a hit returned without a _score still prints"""
+        try:
+            from search_hit import SearchHit
+
+            hit = SearchHit.from_hit({"_id": "doc-1", "_score": None, "_source": {"description": DESCRIPTIONS[0]}})
+            if "score=None" not in repr(hit):
+                raise ValueError(f"Unexpected repr {hit!r}")
+
+            logger.info(f"✅ {hit!r}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in unscored hit test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting ElasticsearchManager stand-in tests...")
+
+    tester = TestElasticStandin()
+    try:
+        logger.info("\n📝 Testing bulk indexing...")
+        bulk_success = tester.test_bulk_index()
+
+        logger.info("\n📝 Testing bulk failure reporting...")
+        bulk_failure_success = tester.test_bulk_failure_paths()
+
+        logger.info("\n📝 Testing multi-search...")
+        search_many_success = tester.test_search_many()
+
+        logger.info("\n📝 Testing hybrid search...")
+        hybrid_success = tester.test_hybrid_search()
+
+        logger.info("\n📝 Testing legacy content fetch...")
+        legacy_success = tester.test_legacy_content_fetch()
+
+        logger.info("\n📝 Testing unscored hits...")
+        repr_success = tester.test_unscored_hit_repr()
+    finally:
+        tester.close()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Bulk Indexing: {'✅' if bulk_success else '❌'}")
+    logger.info(f"Bulk Failure Paths: {'✅' if bulk_failure_success else '❌'}")
+    logger.info(f"Multi-Search: {'✅' if search_many_success else '❌'}")
+    logger.info(f"Hybrid Search: {'✅' if hybrid_success else '❌'}")
+    logger.info(f"Legacy Content Fetch: {'✅' if legacy_success else '❌'}")
+    logger.info(f"Unscored Hit Repr: {'✅' if repr_success else '❌'}")
+
+    if all([bulk_success, bulk_failure_success, search_many_success, hybrid_success, legacy_success, repr_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
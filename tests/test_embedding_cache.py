@@ -0,0 +1,85 @@
+import logging
+import tempfile
+import sys
+import os
+import numpy as np
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TestEmbeddingCache:
+    def __init__(self):
+        from embedding_cache import EmbeddingCache
+
+        self.cache_class = EmbeddingCache
+        self.cache_dir = tempfile.mkdtemp(prefix="embedding_cache_")
+        logger.info(f"✅ Using temporary cache directory {self.cache_dir}")
+
+    def test_roundtrip_and_persistence(self):
+        """Test that stored vectors survive reopening the cache"""
+        try:
+            cache = self.cache_class(self.cache_dir, max_entries=4, dim=8)
+            key = cache.make_key("Why so serious?", "text", "model-a")
+            vector = np.arange(8, dtype=np.float32)
+            cache.put(key, vector)
+            cache.flush()
+            del cache
+
+            reopened = self.cache_class(self.cache_dir, max_entries=4, dim=8)
+            cached = reopened.get(key)
+            if cached is None or not np.array_equal(cached, vector):
+                raise ValueError("Cached vector was not persisted")
+
+            # A different model fingerprint must not hit the same entry
+            if reopened.get(reopened.make_key("Why so serious?", "text", "model-b")) is not None:
+                raise ValueError("Key ignores the model fingerprint")
+
+            logger.info("✅ Cache roundtrip and persistence OK")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in roundtrip test: {e}")
+            return False
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when the cache is full"""
+        try:
+            cache = self.cache_class(os.path.join(self.cache_dir, "lru"), max_entries=2, dim=4)
+            keys = [cache.make_key(text, "text", "model-a") for text in ("a", "b", "c")]
+
+            cache.put(keys[0], np.zeros(4, dtype=np.float32))
+            cache.put(keys[1], np.ones(4, dtype=np.float32))
+            cache.get(keys[0])
+            cache.put(keys[2], np.full(4, 2, dtype=np.float32))
+
+            if cache.get(keys[1]) is not None or cache.get(keys[0]) is None or len(cache) != 2:
+                raise ValueError("Wrong entry evicted")
+
+            logger.info("✅ LRU eviction OK")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in eviction test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting EmbeddingCache tests...")
+
+    tester = TestEmbeddingCache()
+
+    roundtrip_success = tester.test_roundtrip_and_persistence()
+    eviction_success = tester.test_lru_eviction()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Roundtrip/Persistence: {'✅' if roundtrip_success else '❌'}")
+    logger.info(f"LRU Eviction: {'✅' if eviction_success else '❌'}")
+
+    if roundtrip_success and eviction_success:
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
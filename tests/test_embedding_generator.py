@@ -1,4 +1,5 @@
 import numpy as np
+import time
 import logging
 from pathlib import Path
 import sys
@@ -10,6 +11,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def tiny_imagebind_config():
+    """ImageBindModel arguments for small trunks, so a checkpoint can be saved and loaded in a test"""
+    config = {"out_embed_dim": 1024}
+    for modality in ("vision", "audio", "text", "depth", "thermal", "imu"):
+        config.update({f"{modality}_embed_dim": 192, f"{modality}_num_blocks": 2, f"{modality}_num_heads": 3})
+    return config
+
 class TestEmbeddingGenerator:
     def __init__(self):
         try:
@@ -71,7 +79,251 @@ class TestEmbeddingGenerator:
         except Exception as e:
             logger.error(f"Error processing depth map: {str(e)}", exc_info=True)
             return None
+
+    def test_batch_embedding(self, texts=("Why so serious?", "A riddle at the vault", "Playing cards in the alley")):
+        """Test batched embedding generation matches per-item embeddings row by row"""
+        try:
+            texts = list(texts)
+            embeddings = self.generator.generate_embeddings(texts, "text", batch_size=2)
+            logger.info(f"Batch embedding shape: {embeddings.shape}, dtype: {embeddings.dtype}")
+            
+            if embeddings.shape != (len(texts), 1024) or embeddings.dtype != np.float32:
+                raise ValueError(f"Unexpected batch output: {embeddings.shape} {embeddings.dtype}")
+            if not embeddings.flags["C_CONTIGUOUS"]:
+                raise ValueError("Batch output is not contiguous")
+            
+            for i, text in enumerate(texts):
+                single = self.generator.generate_embedding([text], "text")
+                if not np.allclose(embeddings[i], single, atol=1e-4):
+                    raise ValueError(f"Row {i} does not match the single-item embedding")
+            
+            logger.info("✅ Batched embeddings match per-item embeddings")
+            return embeddings
+        except Exception as e:
+            logger.error(f"Error in batch embedding: {str(e)}", exc_info=True)
+            return None
+
+    def test_batch_skips_unreadable(self):
+        """Test that an unreadable file leaves a NaN row and the rest of its micro-batch is still embedded"""
+        try:
+            import tempfile
+            from PIL import Image
+            with tempfile.TemporaryDirectory() as tmp:
+                paths = []
+                for name in ("first.png", "broken.png", "last.png"):
+                    path = os.path.join(tmp, name)
+                    if name == "broken.png":
+                        with open(path, "wb") as f:
+                            f.write(b"not a png")
+                    else:
+                        Image.fromarray(np.random.default_rng(len(paths)).integers(0, 256, (96, 128), dtype=np.uint8)).save(path)
+                    paths.append(path)
+                
+                embeddings = self.generator.generate_embeddings(paths + [os.path.join(tmp, "missing.png")], "depth",
+                                                                batch_size=4)
+                singles = [self.generator.generate_embedding([paths[i]], "depth") for i in (0, 2)]
+            
+            failed = np.isnan(embeddings).any(axis=1).tolist()
+            if failed != [False, True, False, True]:
+                raise ValueError(f"Unexpected failed rows {failed}")
+            if not all(np.allclose(embeddings[i], single, atol=1e-4) for i, single in zip((0, 2), singles)):
+                raise ValueError("Readable inputs do not match their single-item embeddings")
+            
+            logger.info("✅ Unreadable inputs skipped, the rest of the batch embedded")
+            return True
+        except Exception as e:
+            logger.error(f"Error in unreadable batch: {str(e)}", exc_info=True)
+            return False
+
+    def test_quantized_agreement(self, min_cosine=0.95):
+        """Test that int8 quantized text embeddings stay close to the fp32 ones"""
+        try:
+            from src.embedding_generator import EmbeddingGenerator
+            quantized = EmbeddingGenerator(device="cpu", modalities=["text"], quantize=True)
+            agreement = quantized.quantization_agreement["text"]
+            logger.info(f"int8 text agreement - Mean: {agreement['mean']:.4f}, Min: {agreement['min']:.4f}")
+            
+            if agreement["min"] < min_cosine:
+                raise ValueError(f"Quantized embeddings drift too far from fp32: {agreement}")
+            return agreement
+        except Exception as e:
+            logger.error(f"Error in quantized embedding: {str(e)}", exc_info=True)
+            return None
+
+    def test_quantization_samples_cover_modalities(self, modalities=("vision", "depth", "text")):
+        """Test that int8 agreement is measured for every loaded modality and that missing samples are refused"""
+        try:
+            from src.embedding_generator import EmbeddingGenerator
+            quantized = EmbeddingGenerator(device="cpu", modalities=list(modalities), quantize=True)
+            if set(quantized.quantization_agreement) != set(modalities):
+                raise ValueError(f"Agreement measured for {sorted(quantized.quantization_agreement)} only")
+            
+            try:
+                EmbeddingGenerator(device="cpu", modalities=["text", "depth"], quantize=True,
+                                   quantization_samples={"text": ["Why so serious?"]})
+            except ValueError as e:
+                logger.info(f"✅ Missing samples refused: {e}")
+            else:
+                raise ValueError("Quantization without depth samples was not refused")
+            
+            logger.info(f"✅ int8 agreement measured for {sorted(quantized.quantization_agreement)}")
+            return True
+        except Exception as e:
+            logger.error(f"Error in quantization samples: {str(e)}", exc_info=True)
+            return False
+    
+    def test_fast_vision_agreement(self, image_dir="data/images", min_cosine=0.99):
+        """Test that the draft-mode vision loader yields the same tensors and embeddings as the ImageBind loader"""
+        try:
+            from imagebind import data
+            from src.embedding_generator import load_and_transform_vision_data_fast
+            image_paths = sorted(str(p) for p in Path(image_dir).glob("*.jpg"))
+            
+            start = time.perf_counter()
+            reference = data.load_and_transform_vision_data(image_paths, "cpu")
+            reference_time = time.perf_counter() - start
+            start = time.perf_counter()
+            fast = load_and_transform_vision_data_fast(image_paths, "cpu")
+            fast_time = time.perf_counter() - start
+            
+            pixel_error = (reference - fast).abs().mean().item()
+            reference_embeddings = self.generator.embed_tensors(reference, "vision")
+            fast_embeddings = self.generator.embed_tensors(fast, "vision")
+            cosine = np.sum(reference_embeddings * fast_embeddings, axis=1) / (
+                np.linalg.norm(reference_embeddings, axis=1) * np.linalg.norm(fast_embeddings, axis=1)
+            )
+            logger.info(f"Decode: {reference_time * 1000:.0f} ms -> {fast_time * 1000:.0f} ms, "
+                        f"mean pixel error {pixel_error:.4f}, min cosine {cosine.min():.5f}")
+            
+            if cosine.min() < min_cosine:
+                raise ValueError(f"Fast vision embeddings drift too far: min cosine {cosine.min():.5f}")
+            return cosine
+        except Exception as e:
+            logger.error(f"Error in fast vision loader: {str(e)}", exc_info=True)
+            return None
+    
+    def test_depth_loader_throughput(self, depth_dir="data/depths", repeats=16):
+        """Test that the batched depth loader matches the per-image transform path and compare their throughput"""
+        try:
+            import torch
+            from PIL import Image
+            from torchvision import transforms
+            import tempfile
+            from src.embedding_generator import load_and_transform_depth_data
+            depth_paths = sorted(str(p) for p in Path(depth_dir).glob("*.png"))
+            if not depth_paths:
+                # No sample depth maps in this checkout, so time the loaders on synthetic ones
+                synthetic_dir = tempfile.mkdtemp(prefix="depths_")
+                rng = np.random.default_rng(0)
+                for i, size in enumerate([(640, 480), (320, 240), (512, 512)]):
+                    path = os.path.join(synthetic_dir, f"depth_{i}.png")
+                    Image.fromarray(rng.integers(0, 256, size[::-1], dtype=np.uint8), mode="L").save(path)
+                    depth_paths.append(path)
+                logger.info(f"No depth maps in {depth_dir}; using {len(depth_paths)} synthetic ones")
+            depth_paths = depth_paths * repeats
+            
+            def per_image(paths):
+                images = [Image.open(path).convert("L") for path in paths]
+                transform = transforms.Compose([transforms.Resize((224, 224)), transforms.ToTensor()])
+                return torch.stack([transform(img) for img in images])
             
+            timings = {}
+            for name, loader in (("per-image", per_image), ("batched", load_and_transform_depth_data)):
+                start = time.perf_counter()
+                tensors = loader(depth_paths)
+                timings[name] = len(depth_paths) / (time.perf_counter() - start)
+                timings[name + " tensors"] = tensors
+            
+            max_error = (timings["per-image tensors"] - timings["batched tensors"]).abs().max().item()
+            logger.info(f"Depth maps/s: per-image {timings['per-image']:.1f}, batched {timings['batched']:.1f}, "
+                        f"max difference {max_error:.6f}")
+            
+            if max_error > 1e-6:
+                raise ValueError(f"Batched depth tensors differ from the per-image path by {max_error}")
+            return timings["batched"]
+        except Exception as e:
+            logger.error(f"Error in depth loader: {str(e)}", exc_info=True)
+            return None
+
+    def test_checkpoint_loading(self, modalities=("text", "vision")):
+        """Test that _load_model builds, trims and loads a small saved ImageBind checkpoint"""
+        try:
+            import tempfile
+            import torch
+            from imagebind.models import imagebind_model
+            from src.embedding_generator import EmbeddingGenerator, preprocess
+
+            torch.manual_seed(0)
+            config = tiny_imagebind_config()
+            reference = imagebind_model.ImageBindModel(**config).eval()
+
+            with tempfile.TemporaryDirectory() as tmp:
+                checkpoint_path = os.path.join(tmp, "imagebind_tiny.pth")
+                torch.save(reference.state_dict(), checkpoint_path)
+                generator = EmbeddingGenerator(device="cpu", modalities=list(modalities),
+                                               checkpoint_path=checkpoint_path, model_config=config)
+
+            tensors = dict(generator.model.named_parameters())
+            tensors.update(generator.model.named_buffers())
+            on_meta = [name for name, tensor in tensors.items() if tensor.is_meta]
+            if on_meta:
+                raise ValueError(f"Tensors left on the meta device: {on_meta[:5]}")
+            if set(generator.model.modality_trunks) != set(modalities):
+                raise ValueError(f"Trunks not trimmed to {modalities}: {list(generator.model.modality_trunks)}")
+
+            texts = ["Why so serious?", "A playing card left at the crime scene"]
+            with torch.no_grad():
+                expected = reference({"text": preprocess(texts, "text")})["text"].numpy()
+            embedding = generator.generate_embedding(texts, "text")
+            max_error = np.abs(embedding - expected).max()
+            if max_error > 1e-5:
+                raise ValueError(f"Loaded model differs from the saved one by {max_error}")
+
+            logger.info(f"✅ Loaded {len(tensors)} tensors for {list(modalities)}, max difference {max_error:.2e}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading checkpoint: {str(e)}", exc_info=True)
+            return False
+
+    def test_legacy_checkpoint_conversion(self):
+        """Test that a legacy-format checkpoint is converted once to a memory-mappable copy and loads the same weights"""
+        try:
+            import tempfile
+            import zipfile
+            import torch
+            from imagebind.models import imagebind_model
+            from src.embedding_generator import EmbeddingGenerator
+
+            torch.manual_seed(0)
+            config = tiny_imagebind_config()
+            reference = imagebind_model.ImageBindModel(**config).eval()
+
+            with tempfile.TemporaryDirectory() as tmp:
+                checkpoint_path = os.path.join(tmp, "imagebind_tiny.pth")
+                torch.save(reference.state_dict(), checkpoint_path, _use_new_zipfile_serialization=False)
+                generator = EmbeddingGenerator(device="cpu", modalities=["text"],
+                                               checkpoint_path=checkpoint_path, model_config=config)
+
+                converted_path = os.path.join(tmp, "imagebind_tiny.mmap.pth")
+                if not zipfile.is_zipfile(converted_path):
+                    raise ValueError(f"No memory-mappable copy at {converted_path}")
+                modified = os.path.getmtime(converted_path)
+                EmbeddingGenerator(device="cpu", modalities=["text"],
+                                   checkpoint_path=checkpoint_path, model_config=config)
+                if os.path.getmtime(converted_path) != modified:
+                    raise ValueError("Checkpoint was converted a second time")
+
+            expected = reference.state_dict()
+            for name, tensor in generator.model.state_dict().items():
+                if not torch.equal(tensor, expected[name]):
+                    raise ValueError(f"{name} differs from the saved checkpoint")
+
+            logger.info("✅ Legacy checkpoint converted once and loaded unchanged")
+            return True
+        except Exception as e:
+            logger.error(f"Error converting checkpoint: {str(e)}", exc_info=True)
+            return False
+
 def main():
     logger.info("🚀 Starting embedding generator tests...")
     
@@ -90,6 +342,26 @@ def main():
     logger.info("\n📊 Testing depth embedding...")
     depth_emb = tester.test_depth_embedding()
     
+    logger.info("\n📦 Testing batched embedding...")
+    tester.test_batch_embedding()
+    tester.test_batch_skips_unreadable()
+    
+    logger.info("\n🗜️ Testing int8 quantized embedding...")
+    tester.test_quantized_agreement()
+    tester.test_quantization_samples_cover_modalities()
+    
+    logger.info("\n⚡ Testing fast vision loader...")
+    tester.test_fast_vision_agreement()
+    
+    logger.info("\n🗺️ Testing batched depth loader...")
+    tester.test_depth_loader_throughput()
+    
+    logger.info("\n💾 Testing checkpoint loading...")
+    tester.test_checkpoint_loading()
+    
+    logger.info("\n🔁 Testing legacy checkpoint conversion...")
+    tester.test_legacy_checkpoint_conversion()
+    
     # Check if all embeddings have the same dimensionality
     embeddings = [e for e in [image_emb, audio_emb, text_emb, depth_emb] if e is not None]
     if embeddings:
@@ -0,0 +1,94 @@
+import logging
+import sys
+import os
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TestEvidencePacker:
+    def __init__(self):
+        from evidence_packer import EvidencePacker, TokenCounter
+        from search_hit import SearchHit
+
+        self.packer_class = EvidencePacker
+        self.counter = TokenCounter()
+        joker = SearchHit("doc-joker", 0.82, "vision", "Joker card left on the vault floor")
+        laugh = SearchHit("doc-laugh", 0.91, "audio", "Maniacal laughter recorded near the vault")
+        long_note = SearchHit("doc-note", 0.65, "text", "Ransom note " + "with smeared purple ink " * 40)
+        # The RAG stage searches without a modality filter, so queries find the same documents
+        self.evidence = {
+            "vision": [joker, laugh],
+            "audio": [laugh, joker],
+            "text": [long_note, SearchHit("doc-joker", 0.88, "vision", "Joker card left on the vault floor")],
+            "depth": [{"id": "doc-laugh", "score": 0.70, "description": "Maniacal laughter recorded near the vault"}]
+        }
+
+    def test_dedupe_and_rank(self):
+        """Test that each document is listed once, with its best score, in score order"""
+        try:
+            text, stats = self.packer_class(token_budget=None, counter=self.counter).pack(self.evidence)
+            lines = text.split("\n")
+
+            if stats["candidates"] != 7 or stats["unique"] != 3 or len(lines) != 3:
+                raise ValueError(f"Duplicates were not merged: {stats}")
+            if "laughter" not in lines[0] or "(Similarity: 0.91)" not in lines[0]:
+                raise ValueError(f"Best hit is not first: {lines[0]}")
+            if "(Similarity: 0.88)" not in lines[1] or "[VISION, AUDIO, TEXT]" not in lines[1]:
+                raise ValueError(f"Merged hit lost its best score or modalities: {lines[1]}")
+
+            logger.info(f"✅ Deduplicated and ranked: {stats}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in dedupe test: {e}")
+            return False
+
+    def test_budget_and_truncation(self):
+        """Test that the packed text fits the budget and the last description is truncated"""
+        try:
+            full, _ = self.packer_class(token_budget=None, counter=self.counter).pack(self.evidence)
+            budget = self.counter.count(full) // 2
+            text, stats = self.packer_class(token_budget=budget, counter=self.counter).pack(self.evidence)
+
+            if self.counter.count(text) > budget or stats["tokens"] > budget:
+                raise ValueError(f"Packed {self.counter.count(text)} tokens into a budget of {budget}")
+            if stats["included"] != 3 or stats["truncated"] != 1 or not text.split("\n")[-1].split(" (Similarity")[0].endswith("…"):
+                raise ValueError(f"Long description was not truncated: {stats}")
+
+            # Too little room left for a useful description drops the line instead
+            tight = self.counter.count(text.split("\n")[0]) + 5
+            _, tight_stats = self.packer_class(token_budget=tight, counter=self.counter).pack(self.evidence)
+            if tight_stats["included"] != 1 or tight_stats["truncated"] != 0:
+                raise ValueError(f"Unexpected packing for a tight budget: {tight_stats}")
+
+            logger.info(f"✅ {budget} token budget respected: {stats}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in budget test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting EvidencePacker tests...")
+
+    tester = TestEvidencePacker()
+
+    logger.info("\n📝 Testing deduplication and ranking...")
+    dedupe_success = tester.test_dedupe_and_rank()
+
+    logger.info("\n📝 Testing token budget...")
+    budget_success = tester.test_budget_and_truncation()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Dedupe and Rank: {'✅' if dedupe_success else '❌'}")
+    logger.info(f"Token Budget: {'✅' if budget_success else '❌'}")
+
+    if all([dedupe_success, budget_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import logging
+import shutil
+import tempfile
+import sys
+import os
+from pathlib import Path
+import numpy as np
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+# Add tests directory for the shared test helpers
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_utils import RecordingManager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RejectingStore:
+    """Wraps a vector store and rejects the record of one content_path, like a per-document bulk error"""
+
+    def __init__(self, store, reject=None):
+        self.store = store
+        self.reject = reject
+
+    def bulk_index(self, records, **kwargs):
+        failed = []
+
+        def accepted():
+            for record in records:
+                if record[4] == self.reject:
+                    failed.append({"_id": None, "status": 400, "error": "rejected", "content_path": record[4]})
+                else:
+                    yield record
+
+        summary = self.store.bulk_index(accepted(), **kwargs)
+        summary["failed"].extend(failed)
+        return summary
+
+    def delete_documents(self, doc_ids, **kwargs):
+        return self.store.delete_documents(doc_ids, **kwargs)
+
+class TestIngestionPipeline:
+    def __init__(self):
+        try:
+            from embedding_generator import EmbeddingGenerator
+            from ingestion_pipeline import IngestionPipeline
+
+            self.embedding_generator = EmbeddingGenerator(modalities=["vision", "depth"])
+            self.pipeline_class = IngestionPipeline
+            logger.info("✅ EmbeddingGenerator initialized successfully")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize components: {e}")
+            raise
+
+    def test_pipeline_matches_sequential(self, data_dir="data"):
+        """Test that pipelined ingestion produces the same vectors as sequential embedding"""
+        try:
+            paths = {
+                "vision": sorted(str(p) for p in (Path(data_dir) / "images").glob("*.jpg")),
+                "depth": sorted(str(p) for p in (Path(data_dir) / "depths").glob("*.png"))
+            }
+            items = [
+                {"input": path, "modality": modality, "description": Path(path).name, "content_path": path}
+                for modality, modality_paths in paths.items()
+                for path in modality_paths
+            ]
+            if not items:
+                raise ValueError(f"No images or depth maps found under {data_dir}")
+
+            manager = RecordingManager()
+            summary = self.pipeline_class(self.embedding_generator, manager, decode_workers=2, batch_size=2).run(items)
+            logger.info(f"Pipeline indexed {summary['indexed']} items, {len(summary['failed'])} failed")
+
+            pipelined = {record[4]: record[0] for record in manager.records}
+            for modality, modality_paths in paths.items():
+                if not modality_paths:
+                    continue
+                sequential = self.embedding_generator.generate_embeddings(modality_paths, modality)
+                for path, embedding in zip(modality_paths, sequential):
+                    if not np.allclose(pipelined[path], embedding, atol=1e-4):
+                        raise ValueError(f"Pipelined embedding differs for {path}")
+
+            logger.info("✅ Pipelined embeddings match sequential embeddings")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in pipeline test: {e}")
+            return False
+
+    def test_incremental_reindex(self, data_dir="data"):
+        """Test that re-runs only embed changed files, never duplicate documents and drop vanished ones"""
+        try:
+            from index_manifest import IndexManifest
+            from vector_store import NumpyVectorStore
+
+            work_dir = tempfile.mkdtemp(prefix="incremental_")
+            sources = sorted((Path(data_dir) / "images").glob("*.jpg"))[:3]
+            if len(sources) < 3:
+                raise ValueError(f"Need three images under {data_dir}/images")
+            paths = [shutil.copy(source, os.path.join(work_dir, source.name)) for source in sources]
+            items = [
+                {"input": path, "modality": "vision", "description": Path(path).name, "content_path": path}
+                for path in paths
+            ]
+
+            store = NumpyVectorStore(os.path.join(work_dir, "store"), initial_capacity=4)
+            pipeline = self.pipeline_class(self.embedding_generator, store, decode_workers=1)
+            manifest = IndexManifest("test", manifest_dir=work_dir)
+
+            first = pipeline.run_incremental(items, manifest)
+            second = pipeline.run_incremental(items, manifest)
+            if first["indexed"] != 3 or second["indexed"] != 0 or second["unchanged"] != 3 or len(store) != 3:
+                raise ValueError(f"Unchanged re-run was not a no-op: {first}, {second}")
+
+            # Overwrite one file with another's bytes and drop a third from the evidence set
+            shutil.copy(sources[1], paths[0])
+            third = pipeline.run_incremental(items[:2], IndexManifest("test", manifest_dir=work_dir))
+            if third["indexed"] != 1 or third["deleted"] != 2 or len(store) != 2:
+                raise ValueError(f"Changed and vanished files were not reconciled: {third}")
+
+            logger.info(f"✅ Incremental re-index OK: {first['indexed']} → {second['indexed']} → {third['indexed']}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in incremental re-index test: {e}")
+            return False
+
+    def test_incremental_partial_failure(self, data_dir="data"):
+        """Test that one rejected document is retried next run without blocking the manifest for the others"""
+        try:
+            from index_manifest import IndexManifest
+            from vector_store import NumpyVectorStore
+
+            work_dir = tempfile.mkdtemp(prefix="incremental_failure_")
+            sources = sorted((Path(data_dir) / "images").glob("*.jpg"))[:3]
+            if len(sources) < 3:
+                raise ValueError(f"Need three images under {data_dir}/images")
+            paths = [shutil.copy(source, os.path.join(work_dir, source.name)) for source in sources]
+            items = [
+                {"input": path, "modality": "vision", "description": Path(path).name, "content_path": path}
+                for path in paths
+            ]
+
+            store = NumpyVectorStore(os.path.join(work_dir, "store"), initial_capacity=4)
+            manager = RejectingStore(store, reject=paths[1])
+            pipeline = self.pipeline_class(self.embedding_generator, manager, decode_workers=1)
+
+            first = pipeline.run_incremental(items, IndexManifest("test", manifest_dir=work_dir))
+            failed_paths = [failure["content_path"] for failure in first["failed"]]
+            if first["indexed"] != 2 or failed_paths != [paths[1]]:
+                raise ValueError(f"Expected two indexed and {paths[1]} failed: {first}")
+
+            manager.reject = None
+            second = pipeline.run_incremental(items, IndexManifest("test", manifest_dir=work_dir))
+            if second["indexed"] != 1 or second["unchanged"] != 2 or len(store) != 3:
+                raise ValueError(f"Only the failed document should be retried: {second}")
+
+            logger.info(f"✅ Failed document retried alone: {first['indexed']} + {second['indexed']} indexed")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in partial failure test: {e}")
+            return False
+
+    def test_incremental_duplicate_content(self, data_dir="data"):
+        """Test that identical files at two paths keep separate documents and the survivor outlives the other's removal"""
+        try:
+            from index_manifest import IndexManifest
+            from vector_store import NumpyVectorStore
+
+            work_dir = tempfile.mkdtemp(prefix="incremental_duplicate_")
+            sources = sorted((Path(data_dir) / "images").glob("*.jpg"))[:1]
+            if not sources:
+                raise ValueError(f"Need an image under {data_dir}/images")
+            paths = [shutil.copy(sources[0], os.path.join(work_dir, name)) for name in ("a.jpg", "b.jpg")]
+            items = [
+                {"input": path, "modality": "vision", "description": f"desc {Path(path).name}", "content_path": path}
+                for path in paths
+            ]
+
+            store = NumpyVectorStore(os.path.join(work_dir, "store"), initial_capacity=4)
+            pipeline = self.pipeline_class(self.embedding_generator, store, decode_workers=1)
+
+            def documents():
+                return sorted((store.documents[row]["description"], store.documents[row]["content_path"])
+                              for row in store.rows.values())
+
+            first = pipeline.run_incremental(items, IndexManifest("test", manifest_dir=work_dir))
+            if first["indexed"] != 2 or documents() != [("desc a.jpg", paths[0]), ("desc b.jpg", paths[1])]:
+                raise ValueError(f"Identical files did not get a document each: {first}, {documents()}")
+
+            os.remove(paths[1])
+            second = pipeline.run_incremental(items[:1], IndexManifest("test", manifest_dir=work_dir))
+            if second["deleted"] != 1 or second["unchanged"] != 1 or documents() != [("desc a.jpg", paths[0])]:
+                raise ValueError(f"Removing the duplicate did not leave a.jpg's document: {second}, {documents()}")
+
+            logger.info(f"✅ Duplicate content kept apart: {documents()}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in duplicate content test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting IngestionPipeline tests...")
+
+    tester = TestIngestionPipeline()
+
+    logger.info("\n📝 Testing pipelined ingestion...")
+    pipeline_success = tester.test_pipeline_matches_sequential()
+
+    logger.info("\n📝 Testing incremental re-indexing...")
+    incremental_success = tester.test_incremental_reindex()
+
+    logger.info("\n📝 Testing incremental re-indexing after a partial failure...")
+    partial_failure_success = tester.test_incremental_partial_failure()
+
+    logger.info("\n📝 Testing incremental re-indexing of duplicate content...")
+    duplicate_success = tester.test_incremental_duplicate_content()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Pipelined Ingestion: {'✅' if pipeline_success else '❌'}")
+    logger.info(f"Incremental Re-index: {'✅' if incremental_success else '❌'}")
+    logger.info(f"Partial Failure: {'✅' if partial_failure_success else '❌'}")
+    logger.info(f"Duplicate Content: {'✅' if duplicate_success else '❌'}")
+
+    if all([pipeline_success, incremental_success, partial_failure_success, duplicate_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
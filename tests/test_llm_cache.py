@@ -0,0 +1,115 @@
+import logging
+import tempfile
+import time
+import sys
+import os
+from types import SimpleNamespace
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class CountingCompletions:
+    """Stands in for client.chat.completions and counts the API calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=f"Report #{self.calls} at temperature {kwargs['temperature']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+class TestLLMCache:
+    def __init__(self):
+        from llm_cache import LLMResponseCache
+        from llm_analyzer import LLMAnalyzer
+
+        os.environ.setdefault("OPENAI_API_KEY", "test-key")
+        self.cache_class = LLMResponseCache
+        self.analyzer_class = LLMAnalyzer
+        self.work_dir = tempfile.mkdtemp(prefix="llm_cache_")
+        self.evidence = {"text": [{"description": "Why so serious?", "score": 0.91}]}
+        logger.info(f"✅ Using temporary directory {self.work_dir}")
+
+    def _analyzer(self, cache):
+        """Builds an analyzer whose API client only counts calls"""
+        analyzer = self.analyzer_class(cache=cache)
+        completions = CountingCompletions()
+        analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return analyzer, completions
+
+    def test_repeated_report_is_cached(self):
+        """Test that an identical report request skips the API, and that bypass_cache calls it again"""
+        try:
+            cache = self.cache_class(os.path.join(self.work_dir, "reports.sqlite"))
+            analyzer, completions = self._analyzer(cache)
+
+            first = analyzer.analyze_evidence(self.evidence)
+            second = analyzer.analyze_evidence(self.evidence)
+            if first != second or completions.calls != 1:
+                raise ValueError(f"Repeated request called the API {completions.calls} times")
+
+            bypassed = analyzer.analyze_evidence(self.evidence, bypass_cache=True)
+            if completions.calls != 2 or analyzer.analyze_evidence(self.evidence) != bypassed:
+                raise ValueError("Bypass did not call the API or refresh the cached response")
+
+            analyzer.analyze_cross_modal_connections(self.evidence["text"], "text", self.evidence["text"], "text")
+            if completions.calls != 3:
+                raise ValueError("Different request was served from the cache")
+
+            logger.info(f"✅ Report cache OK: {cache.stats()}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in report cache test: {e}")
+            return False
+
+    def test_ttl_and_size_eviction(self):
+        """Test that expired entries are ignored and the least recently used ones are evicted"""
+        try:
+            cache = self.cache_class(os.path.join(self.work_dir, "eviction.sqlite"), ttl_seconds=0.2, max_entries=2)
+            keys = [cache.make_key("model", [{"role": "user", "content": str(i)}], 0.2, 10) for i in range(3)]
+
+            cache.put(keys[0], "a")
+            time.sleep(0.3)
+            if cache.get(keys[0]) is not None:
+                raise ValueError("Expired entry was served")
+
+            cache.ttl_seconds = 60
+            for key, response in zip(keys, "abc"):
+                cache.put(key, response)
+                time.sleep(0.01)
+            if cache.get(keys[0]) is not None or cache.get(keys[2]) != "c" or cache.stats()["entries"] != 2:
+                raise ValueError(f"Wrong entries evicted: {cache.stats()}")
+
+            logger.info("✅ TTL and size eviction OK")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in eviction test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting LLMResponseCache tests...")
+
+    tester = TestLLMCache()
+
+    logger.info("\n📝 Testing cached reports...")
+    report_success = tester.test_repeated_report_is_cached()
+
+    logger.info("\n📝 Testing TTL and size eviction...")
+    eviction_success = tester.test_ttl_and_size_eviction()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Cached Reports: {'✅' if report_success else '❌'}")
+    logger.info(f"TTL and Eviction: {'✅' if eviction_success else '❌'}")
+
+    if all([report_success, eviction_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
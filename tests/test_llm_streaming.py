@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import tempfile
+import time
+import sys
+import os
+from types import SimpleNamespace
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DELTAS = ["Prime Suspect: ", "The Joker", "\nConfidence Level: ", "92%"]
+
+def _chunk(content):
+    """Builds a streamed completion chunk carrying one text delta"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+class StreamingCompletions:
+    """Stands in for client.chat.completions and streams DELTAS with a delay between chunks"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if not kwargs.get("stream"):
+            raise ValueError("Expected a streamed request")
+        return self._chunks()
+
+    def _chunks(self):
+        yield _chunk(None)  # The first chunk only carries the role
+        for delta in DELTAS:
+            time.sleep(self.delay)
+            yield _chunk(delta)
+
+class AsyncStreamingCompletions(StreamingCompletions):
+    """Async counterpart: create is awaited and returns an async iterator of chunks"""
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return self._async_chunks()
+
+    async def _async_chunks(self):
+        for delta in DELTAS:
+            await asyncio.sleep(self.delay)
+            yield _chunk(delta)
+
+class TestLLMStreaming:
+    def __init__(self):
+        from llm_cache import LLMResponseCache
+        from llm_analyzer import LLMAnalyzer
+
+        os.environ.setdefault("OPENAI_API_KEY", "test-key")
+        self.cache = LLMResponseCache(os.path.join(tempfile.mkdtemp(prefix="llm_stream_"), "reports.sqlite"))
+        self.analyzer = LLMAnalyzer(cache=self.cache)
+        self.completions = StreamingCompletions()
+        self.async_completions = AsyncStreamingCompletions()
+        self.analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+        self.analyzer._async_client = SimpleNamespace(chat=SimpleNamespace(completions=self.async_completions))
+        self.evidence = {"text": [{"description": "Why so serious?", "score": 0.91}]}
+
+    def test_stream_assembles_report(self):
+        """Test that deltas arrive incrementally, assemble the report and record latency metrics"""
+        try:
+            stream = self.analyzer.analyze_evidence(self.evidence, stream=True)
+            received = list(stream)
+            metrics = stream.metrics
+
+            if received != DELTAS or stream.report != "".join(DELTAS):
+                raise ValueError(f"Unexpected deltas {received}")
+            if not 0 < metrics["time_to_first_token"] < metrics["total_time"]:
+                raise ValueError(f"Time to first token not before the end: {metrics}")
+            if metrics["total_time"] < len(DELTAS) * self.completions.delay:
+                raise ValueError(f"Total time shorter than the stream: {metrics}")
+
+            # The assembled report is cached, so a repeat is one delta without an API call
+            repeat = self.analyzer.analyze_evidence(self.evidence, stream=True)
+            if list(repeat) != [stream.report] or not repeat.metrics["cached"] or self.completions.calls != 1:
+                raise ValueError("Streamed report was not served from the cache")
+            if self.analyzer.analyze_evidence(self.evidence) != stream.report:
+                raise ValueError("Non-streamed call does not return the streamed report")
+
+            logger.info(f"✅ Streamed report OK: {metrics}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in streaming test: {e}")
+            return False
+
+    def test_async_stream(self):
+        """Test that the async stream yields the same deltas and metrics"""
+        try:
+            async def consume():
+                stream = self.analyzer.analyze_evidence_async(self.evidence, bypass_cache=True)
+                return stream, [delta async for delta in stream]
+
+            stream, received = asyncio.run(consume())
+            if received != DELTAS or self.async_completions.calls != 1:
+                raise ValueError(f"Unexpected async deltas {received}")
+            if not 0 < stream.metrics["time_to_first_token"] < stream.metrics["total_time"]:
+                raise ValueError(f"Unexpected async metrics {stream.metrics}")
+
+            logger.info(f"✅ Async stream OK: {stream.metrics}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in async streaming test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting LLM streaming tests...")
+
+    tester = TestLLMStreaming()
+
+    logger.info("\n📝 Testing streamed report...")
+    stream_success = tester.test_stream_assembles_report()
+
+    logger.info("\n📝 Testing async stream...")
+    async_success = tester.test_async_stream()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Streamed Report: {'✅' if stream_success else '❌'}")
+    logger.info(f"Async Stream: {'✅' if async_success else '❌'}")
+
+    if all([stream_success, async_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
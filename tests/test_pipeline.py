@@ -1,6 +1,7 @@
 import logging
 from pathlib import Path
 import os
+import numpy as np
 
 from embedding_generator import EmbeddingGenerator
 from elastic_manager import ElasticManager
@@ -18,66 +19,50 @@ class MultimodalPipelineTester:
         logger.info("🚀 Iniciando indexação de todo o conteúdo...")
         
         # Processa imagens
-        image_dir = Path(data_dir) / "images"
-        for img_path in image_dir.glob("*.jpg"):
-            try:
-                embedding = self.embedding_generator.generate_embedding([str(img_path)], "vision")
-                self.elastic_manager.index_content(
-                    embedding=embedding,
-                    modality="vision",
-                    description=f"Imagem: {img_path.name}",
-                    content_path=str(img_path)
-                )
-                logger.info(f"✅ Indexada imagem: {img_path.name}")
-            except Exception as e:
-                logger.error(f"❌ Erro ao indexar imagem {img_path}: {str(e)}")
+        image_paths = sorted((Path(data_dir) / "images").glob("*.jpg"))
+        self._index_batch(image_paths, [str(p) for p in image_paths], "vision", "Imagem")
         
         # Processa áudios
-        audio_dir = Path(data_dir) / "audios"
-        for audio_path in audio_dir.glob("*.wav"):
-            try:
-                embedding = self.embedding_generator.generate_embedding([str(audio_path)], "audio")
-                self.elastic_manager.index_content(
-                    embedding=embedding,
-                    modality="audio",
-                    description=f"Áudio: {audio_path.name}",
-                    content_path=str(audio_path)
-                )
-                logger.info(f"✅ Indexado áudio: {audio_path.name}")
-            except Exception as e:
-                logger.error(f"❌ Erro ao indexar áudio {audio_path}: {str(e)}")
+        audio_paths = sorted((Path(data_dir) / "audios").glob("*.wav"))
+        self._index_batch(audio_paths, [str(p) for p in audio_paths], "audio", "Áudio")
         
         # Processa textos
-        text_dir = Path(data_dir) / "texts"
-        for text_path in text_dir.glob("*.txt"):
-            try:
-                with open(text_path, 'r') as f:
-                    text = f.read()
-                embedding = self.embedding_generator.generate_embedding([text], "text")
-                self.elastic_manager.index_content(
-                    embedding=embedding,
-                    modality="text",
-                    description=f"Texto: {text_path.name}",
-                    content_path=str(text_path)
-                )
-                logger.info(f"✅ Indexado texto: {text_path.name}")
-            except Exception as e:
-                logger.error(f"❌ Erro ao indexar texto {text_path}: {str(e)}")
+        text_paths = sorted((Path(data_dir) / "texts").glob("*.txt"))
+        texts = []
+        for text_path in text_paths:
+            with open(text_path, 'r') as f:
+                texts.append(f.read())
+        self._index_batch(text_paths, texts, "text", "Texto")
                 
         # Processa depth maps
-        depth_dir = Path(data_dir) / "depths"
-        for depth_path in depth_dir.glob("*.jpg"):  # Procura por .jpg e .png
+        depth_paths = sorted((Path(data_dir) / "depths").glob("*.jpg"))  # Procura por .jpg e .png
+        self._index_batch(depth_paths, [str(p) for p in depth_paths], "depth", "Depth Map")
+
+    def _index_batch(self, paths, inputs, modality, label):
+        """Gera embeddings de uma modalidade em lote e indexa cada arquivo"""
+        if not paths:
+            return
+        
+        try:
+            embeddings = self.embedding_generator.generate_embeddings(inputs, modality)
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar embeddings ({label}): {str(e)}")
+            return
+        
+        for path, embedding in zip(paths, embeddings):
+            if np.isnan(embedding).any():
+                logger.warning(f"⚠️ Ignorado {label.lower()} ilegível: {path.name}")
+                continue
             try:
-                embedding = self.embedding_generator.generate_embedding([str(depth_path)], "depth")
                 self.elastic_manager.index_content(
                     embedding=embedding,
-                    modality="depth",
-                    description=f"Depth Map: {depth_path.name}",
-                    content_path=str(depth_path)
+                    modality=modality,
+                    description=f"{label}: {path.name}",
+                    content_path=str(path)
                 )
-                logger.info(f"✅ Indexado depth map: {depth_path.name}")
+                logger.info(f"✅ Indexado {label.lower()}: {path.name}")
             except Exception as e:
-                logger.error(f"❌ Erro ao indexar depth map {depth_path}: {str(e)}")
+                logger.error(f"❌ Erro ao indexar {label.lower()} {path}: {str(e)}")
     
     def test_cross_modal_search(self):
         """Testa busca cross-modal"""
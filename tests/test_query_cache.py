@@ -0,0 +1,101 @@
+import logging
+import tempfile
+import time
+import sys
+import os
+import numpy as np
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TestQueryCache:
+    def __init__(self):
+        from query_cache import QueryEmbeddingCache
+
+        self.cache_class = QueryEmbeddingCache
+        self.work_dir = tempfile.mkdtemp(prefix="query_cache_")
+        logger.info(f"✅ Using temporary directory {self.work_dir}")
+
+    def test_keys(self):
+        """Test that text keys ignore case and spacing and file keys follow mtime and size"""
+        try:
+            make_key = self.cache_class.make_key
+            if make_key("Why so  serious?", "text", "m") != make_key(" why so serious? ", "text", "m"):
+                raise ValueError("Equivalent queries produce different keys")
+            if make_key("Why so serious?", "text", "m") == make_key("Why so serious?", "text", "other"):
+                raise ValueError("Key ignores the model fingerprint")
+
+            path = os.path.join(self.work_dir, "evidence.bin")
+            with open(path, "wb") as f:
+                f.write(b"laugh")
+            key = make_key(path, "audio", "m")
+            if key == make_key(path, "vision", "m"):
+                raise ValueError("File keys are not scoped per modality")
+
+            time.sleep(0.01)
+            with open(path, "wb") as f:
+                f.write(b"laughs")
+            if key == make_key(path, "audio", "m"):
+                raise ValueError("Changed file keeps its key")
+
+            logger.info("✅ Query keys OK")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in key test: {e}")
+            return False
+
+    def test_lru_and_spill(self):
+        """Test LRU eviction, hit/miss counters and recovery from the disk spill"""
+        try:
+            spill_dir = os.path.join(self.work_dir, "spill")
+            cache = self.cache_class.with_spill(spill_dir, max_entries=2, spill_entries=8)
+            keys = [self.cache_class.make_key(text, "text", "m") for text in ("a", "b", "c")]
+            for i, key in enumerate(keys):
+                cache.put(key, np.full(1024, i, dtype=np.float32))
+            cache.flush()
+
+            if len(cache) != 2 or keys[0] in cache.entries:
+                raise ValueError("Least recently used entry was not evicted")
+            if cache.get(keys[2])[0] != 2 or cache.stats()["hits"] != 1:
+                raise ValueError("Resident entry was not a hit")
+            if cache.get(keys[0])[0] != 0 or cache.stats()["spill_hits"] != 1:
+                raise ValueError("Evicted entry was not recovered from the spill")
+
+            reopened = self.cache_class.with_spill(spill_dir, max_entries=2, spill_entries=8)
+            if reopened.get(keys[1]) is None or reopened.get(self.cache_class.make_key("d", "text", "m")) is not None:
+                raise ValueError("Spill did not survive reopening")
+            if reopened.stats()["misses"] != 1:
+                raise ValueError(f"Unexpected counters {reopened.stats()}")
+
+            logger.info(f"✅ LRU and spill OK: {cache.stats()}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in LRU test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting QueryEmbeddingCache tests...")
+
+    tester = TestQueryCache()
+
+    logger.info("\n📝 Testing query keys...")
+    keys_success = tester.test_keys()
+
+    logger.info("\n📝 Testing LRU and disk spill...")
+    lru_success = tester.test_lru_and_spill()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Query Keys: {'✅' if keys_success else '❌'}")
+    logger.info(f"LRU and Spill: {'✅' if lru_success else '❌'}")
+
+    if all([keys_success, lru_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import json
+import logging
+import threading
+import time
+import sys
+import os
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /v1/chat/completions that answers 429 to the first `rate_limited` requests"""
+
+    rate_limited = 0
+    retry_after_ms = 300
+    request_times = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        MockOpenAIHandler.request_times.append(time.monotonic())
+
+        if len(MockOpenAIHandler.request_times) <= MockOpenAIHandler.rate_limited:
+            status = 429
+            headers = {"retry-after-ms": str(MockOpenAIHandler.retry_after_ms)}
+            payload = {"error": {"message": "Rate limit reached for requests", "type": "requests"}}
+        else:
+            status = 200
+            headers = {}
+            payload = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "Prime Suspect: The Joker"}
+                }],
+                "usage": {"prompt_tokens": 200, "completion_tokens": 6, "total_tokens": 206}
+            }
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class TestRequestScheduler:
+    def __init__(self):
+        from request_scheduler import RequestScheduler
+        from llm_analyzer import LLMAnalyzer
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), MockOpenAIHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        os.environ["OPENAI_API_KEY"] = "test-key"
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+        self.scheduler_class = RequestScheduler
+        self.analyzer_class = LLMAnalyzer
+        self.evidence = {"text": [{"id": "t1", "description": "Why so serious?", "score": 0.91}]}
+        logger.info(f"✅ Mock endpoint at {os.environ['OPENAI_BASE_URL']}")
+
+    def test_retry_after(self):
+        """Test that 429 responses are retried no sooner than the retry-after-ms header asks"""
+        try:
+            MockOpenAIHandler.rate_limited = 2
+            MockOpenAIHandler.request_times = []
+            scheduler = self.scheduler_class(base_delay=0.01)
+            report = self.analyzer_class(scheduler=scheduler).analyze_evidence(self.evidence)
+
+            times = MockOpenAIHandler.request_times
+            gaps = [b - a for a, b in zip(times, times[1:])]
+            if report != "Prime Suspect: The Joker" or len(times) != 3:
+                raise ValueError(f"Expected 3 requests and a report, got {len(times)} and {report!r}")
+            if min(gaps) < MockOpenAIHandler.retry_after_ms / 1000:
+                raise ValueError(f"Retried before retry-after elapsed: {gaps}")
+            if scheduler.stats["rate_limited"] != 2:
+                raise ValueError(f"Unexpected stats {scheduler.stats}")
+
+            logger.info(f"✅ Retried after {[f'{gap:.2f}s' for gap in gaps]}: {scheduler.stats}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in retry-after test: {e}")
+            return False
+
+    def test_backoff_floor(self):
+        """Test that a short retry-after never shortens the exponential backoff and that stats count every call"""
+        try:
+            scheduler = self.scheduler_class(base_delay=0.5, jitter=0)
+            delays = [scheduler._backoff(0, 0.1), scheduler._backoff(0, 2.0), scheduler._backoff(3, None)]
+            if delays != [0.5, 2.0, 4.0]:
+                raise ValueError(f"Unexpected backoff delays {delays}")
+
+            scheduler = self.scheduler_class(requests_per_minute=10 ** 6)
+            threads = [
+                threading.Thread(target=lambda: [scheduler.call(lambda: None) for _ in range(50)])
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if scheduler.stats["requests"] != 400:
+                raise ValueError(f"Lost request counts: {scheduler.stats}")
+
+            logger.info(f"✅ Backoff delays {delays}, {scheduler.stats['requests']} requests counted")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in backoff floor test: {e}")
+            return False
+
+    def test_token_bucket_pacing(self):
+        """Test that calls beyond the burst are paced to the request and token rates"""
+        try:
+            # 20 requests/s with a burst of 5: 15 calls need at least (15 - 5) / 20 = 0.5 s
+            scheduler = self.scheduler_class(requests_per_minute=1200, tokens_per_minute=10 ** 6, burst_seconds=0.25)
+            started = time.monotonic()
+            for _ in range(15):
+                scheduler.call(lambda: None)
+            request_paced = time.monotonic() - started
+
+            # 1000 tokens/s with a burst of 1000: three 800-token calls need at least 1.4 s
+            scheduler = self.scheduler_class(requests_per_minute=10 ** 6, tokens_per_minute=60000, burst_seconds=1)
+            started = time.monotonic()
+            for _ in range(3):
+                scheduler.call(lambda: None, estimated_tokens=800)
+            token_paced = time.monotonic() - started
+
+            if not 0.45 <= request_paced < 1.0 or not 1.35 <= token_paced < 2.0:
+                raise ValueError(f"Unexpected pacing: {request_paced:.2f}s and {token_paced:.2f}s")
+
+            logger.info(f"✅ Paced by requests in {request_paced:.2f}s and by tokens in {token_paced:.2f}s")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in pacing test: {e}")
+            return False
+
+    def test_interactive_priority(self):
+        """Test that an interactive call overtakes batch calls already waiting for budget"""
+        try:
+            scheduler = self.scheduler_class(requests_per_minute=600, burst_seconds=0.1)
+            order = []
+
+            def submit(name, priority):
+                scheduler.call(lambda: order.append(name), priority=priority)
+
+            threads = [threading.Thread(target=submit, args=(f"batch-{i}", "batch")) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.05)
+            interactive = threading.Thread(target=submit, args=("interactive", "interactive"))
+            interactive.start()
+            for thread in threads + [interactive]:
+                thread.join()
+
+            if order[1] != "interactive":
+                raise ValueError(f"Interactive call was not next: {order}")
+
+            logger.info(f"✅ Admission order: {order}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in priority test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting RequestScheduler tests...")
+
+    tester = TestRequestScheduler()
+
+    logger.info("\n📝 Testing retry-after backoff...")
+    retry_success = tester.test_retry_after()
+
+    logger.info("\n📝 Testing backoff floor...")
+    backoff_success = tester.test_backoff_floor()
+
+    logger.info("\n📝 Testing token bucket pacing...")
+    pacing_success = tester.test_token_bucket_pacing()
+
+    logger.info("\n📝 Testing interactive priority...")
+    priority_success = tester.test_interactive_priority()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Retry-After Backoff: {'✅' if retry_success else '❌'}")
+    logger.info(f"Backoff Floor: {'✅' if backoff_success else '❌'}")
+    logger.info(f"Token Bucket Pacing: {'✅' if pacing_success else '❌'}")
+    logger.info(f"Interactive Priority: {'✅' if priority_success else '❌'}")
+
+    if all([retry_success, backoff_success, pacing_success, priority_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,17 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class RecordingManager:
+    """Stands in for ElasticsearchManager and keeps the bulk records in memory"""
+
+    def __init__(self):
+        self.records = []
+
+    def bulk_index(self, records, **kwargs):
+        for record in records:
+            self.records.append(record)
+        return {"indexed": len(self.records), "failed": []}
+
 def test_env_vars():
     """Testa se as variáveis de ambiente estão configuradas corretamente"""
     logger.info("Testando variáveis de ambiente...")
@@ -0,0 +1,109 @@
+import logging
+import tempfile
+import sys
+import os
+import numpy as np
+
+# Add src directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TestVectorStore:
+    def __init__(self):
+        from vector_store import NumpyVectorStore
+
+        self.store_class = NumpyVectorStore
+        self.store_dir = tempfile.mkdtemp(prefix="vector_store_")
+        self.rng = np.random.default_rng(0)
+        logger.info(f"✅ Using temporary store directory {self.store_dir}")
+
+    def _records(self, count, dim):
+        """Builds random bulk records cycling through the modalities"""
+        modalities = ["vision", "audio", "text", "depth"]
+        vectors = self.rng.standard_normal((count, dim)).astype(np.float32)
+        return vectors, [
+            (vector, modalities[i % 4], f"doc {i}", {"n": i}, f"data/{i}") for i, vector in enumerate(vectors)
+        ]
+
+    def test_exact_top_k(self):
+        """Test that search results match a brute-force cosine ranking, with and without a modality filter"""
+        try:
+            store = self.store_class(os.path.join(self.store_dir, "topk"), dim=16, initial_capacity=8)
+            vectors, records = self._records(100, 16)
+            summary = store.bulk_index(records)
+            if summary["indexed"] != 100 or len(store) != 100:
+                raise ValueError(f"Unexpected bulk summary {summary}")
+
+            normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            query = self.rng.standard_normal(16).astype(np.float32)
+            cosine = normalized @ (query / np.linalg.norm(query))
+
+            hits = store.search_similar(query, k=5)
+            expected = np.argsort(-cosine)[:5]
+            if [hit.content_path for hit in hits] != [f"data/{i}" for i in expected]:
+                raise ValueError("Top-k differs from brute force")
+            if not np.allclose([hit.score for hit in hits], (1 + cosine[expected]) / 2, atol=1e-5):
+                raise ValueError("Scores do not follow the Elasticsearch cosine formula")
+
+            audio = store.search_similar(query, modality="audio", k=5)
+            expected = [i for i in np.argsort(-cosine) if i % 4 == 1][:5]
+            if [hit.content_path for hit in audio] != [f"data/{i}" for i in expected]:
+                raise ValueError("Modality filter returned the wrong documents")
+
+            if "embedding" in audio[0].to_dict():
+                raise ValueError("Embedding returned without being requested")
+
+            logger.info("✅ Exact top-k matches brute force")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in top-k test: {e}")
+            return False
+
+    def test_persistence(self):
+        """Test that documents and vectors survive reopening the store"""
+        try:
+            store_dir = os.path.join(self.store_dir, "persist")
+            store = self.store_class(store_dir, dim=8, initial_capacity=2)
+            vectors, records = self._records(5, 8)
+            store.bulk_index(records)
+            before = store.search_similar_many(vectors[:2], k=3)
+            del store
+
+            reopened = self.store_class(store_dir, dim=8)
+            after = reopened.search_similar_many(vectors[:2], k=3)
+            if len(reopened) != 5 or [[h.id for h in r] for r in before] != [[h.id for h in r] for r in after]:
+                raise ValueError("Reopened store returns different results")
+            if after[0][0].content_path != "data/0":
+                raise ValueError("A stored vector is not its own nearest neighbour")
+
+            logger.info("✅ Store persistence OK")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error in persistence test: {e}")
+            return False
+
+def main():
+    logger.info("🚀 Starting NumpyVectorStore tests...")
+
+    tester = TestVectorStore()
+
+    logger.info("\n📝 Testing exact top-k...")
+    top_k_success = tester.test_exact_top_k()
+
+    logger.info("\n📝 Testing persistence...")
+    persistence_success = tester.test_persistence()
+
+    # Report results
+    logger.info("\n📊 Test Results:")
+    logger.info(f"Exact Top-k: {'✅' if top_k_success else '❌'}")
+    logger.info(f"Persistence: {'✅' if persistence_success else '❌'}")
+
+    if all([top_k_success, persistence_success]):
+        logger.info("\n✨ All tests passed successfully!")
+    else:
+        logger.error("\n❌ Some tests failed")
+
+if __name__ == "__main__":
+    main()